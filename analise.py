@@ -0,0 +1,192 @@
+"""
+Indicadores de fluxo calculados sobre o histórico de status (tabela eventos_status): tempo em cada status,
+lead time de ponta a ponta, idade dos pedidos em aberto (WIP) e p50/p90 por semana, separados em TERAVIX e PV.
+
+O histórico é lido uma vez e depois só os eventos novos (id maior que o último lido) são incorporados; uma atualização
+sem mudanças de status não lê nada e só recalcula as idades do WIP, que dependem do horário atual.
+pandas e numpy são importados dentro das funções.
+"""
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from planilha import STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_URGENTE, STATUS_CONCLUIDO, STATUS_CANCELADO
+from banco import conectar_banco, migrar_banco_de_dados, ultimo_evento_status, ler_historico_status, anexar_historico
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+STATUS_FINAIS = [STATUS_CONCLUIDO, STATUS_CANCELADO]
+# Ordem em que os status abertos aparecem no painel; status desconhecidos vão para o fim
+ORDEM_STATUS = [STATUS_PENDENTE, STATUS_AGUARDANDO_CHEGADA, STATUS_AGUARDANDO, STATUS_URGENTE, STATUS_EM_MONTAGEM]
+SEMANAS_PAINEL = 4  # janela do lead time mostrado no painel
+
+@dataclass(frozen=True)
+class AgregadosFluxo:
+    """Agregados do histórico de status publicados para o painel e os relatórios."""
+    ciclo_por_status: 'pd.DataFrame'  # índice status: pedidos, p50_dias, p90_dias do tempo passado em cada status
+    lead_times: 'pd.DataFrame'        # um por pedido concluído: pedido_id, conclusao, lead_dias, is_teravix
+    lead_semanal: 'pd.DataFrame'      # semana, tipo ('TERAVIX'/'PV'), pedidos, p50_dias, p90_dias
+    wip: 'pd.DataFrame'               # pedidos em aberto: pedido_id, status, entrada, entrada_status
+    tempo_calculo: float
+
+def _dias(delta):
+    return delta.dt.total_seconds() / 86400
+
+def _percentis_por_grupo(valores, chaves):
+    import pandas as pd
+    grupos = valores.groupby(chaves)
+    return pd.DataFrame({'pedidos': grupos.size(), 'p50_dias': grupos.quantile(0.5), 'p90_dias': grupos.quantile(0.9)})
+
+class HistoricoFluxo:
+    """
+    Estado acumulado do histórico de um banco: último evento lido, situação de cada pedido, tempos já encerrados
+    em cada status e lead times. Os eventos só são acrescentados, então cada chamada lê apenas os eventos novos.
+
+    Cada evento marca a entrada do pedido num status; o tempo no status vai até o evento seguinte do mesmo pedido.
+    O lead time vai do primeiro evento (pedido visto ainda em aberto) até o primeiro 'Concluído'; pedidos que
+    já estavam concluídos quando o histórico começou não têm lead time.
+    """
+    def __init__(self):
+        import numpy as np
+        import pandas as pd
+        self.ultimo_id = 0
+        self.pedidos = pd.DataFrame({'entrada': pd.Series(dtype='datetime64[ns]'), 'entrou_aberto': pd.Series(dtype=bool),
+                                     'concluido': pd.Series(dtype=bool), 'aberto': pd.Series(dtype=bool), 'status': pd.Series(dtype=object),
+                                     'momento': pd.Series(dtype='datetime64[ns]')}, index=pd.Index([], dtype=object, name='pedido_id'))
+        # Tempos encerrados em cada status, com o status como código inteiro: os percentis agrupam inteiros, não textos
+        self.codigos_status = {}; self.ciclos_status = np.empty(0, dtype=np.int16); self.ciclos_duracao = np.empty(0)
+        self.lead_times = pd.DataFrame({'pedido_id': pd.Series(dtype=object), 'conclusao': pd.Series(dtype='datetime64[ns]'),
+                                        'lead_dias': pd.Series(dtype=float), 'is_teravix': pd.Series(dtype=bool)})
+        self.agregados = None
+
+    def incorporar(self, linhas):
+        """Acrescenta as linhas de ler_historico_status (em ordem de id) e recalcula os agregados."""
+        import numpy as np
+        import pandas as pd
+        inicio = time.perf_counter()
+        novos = pd.DataFrame(linhas, columns=['ordem', 'pedido_id', 'status', 'momento', 'is_teravix'])
+        novos['momento'] = pd.to_datetime(novos['momento'], format='%Y-%m-%d %H:%M:%S', errors='coerce').astype('datetime64[ns]')
+        novos['status'] = novos['status'].astype(object)
+
+        # O último status conhecido de cada pedido tocado entra antes dos eventos novos, para fechar o intervalo em aberto
+        posicoes = self.pedidos.index.get_indexer(novos['pedido_id'].unique())
+        anteriores = self.pedidos.iloc[posicoes[posicoes >= 0]][['status', 'momento']].reset_index()
+        anteriores['ordem'] = 0
+        ev = pd.concat([anteriores, novos], ignore_index=True).sort_values(['pedido_id', 'ordem'], kind='stable', ignore_index=True)
+        em_aberto = ev['status'].notna() & ~ev['status'].isin(STATUS_FINAIS)
+        mesmo_pedido = ev['pedido_id'].shift(-1).eq(ev['pedido_id'])
+        ev['duracao'] = _dias(ev['momento'].shift(-1) - ev['momento']).where(mesmo_pedido)
+        ciclos = ev.loc[em_aberto & (ev['duracao'] >= 0), ['status', 'duracao']]
+
+        # Pedidos vistos pela primeira vez: entrada no quadro e se já chegaram em aberto
+        eh_novo = ev['ordem'] > 0
+        primeiros = ev[eh_novo & (self.pedidos.index.get_indexer(ev['pedido_id']) < 0)]
+        primeiros = primeiros[~primeiros['pedido_id'].duplicated(keep='first')]
+        entrantes = pd.DataFrame({'entrada': primeiros['momento'].to_numpy(), 'entrou_aberto': em_aberto[primeiros.index].to_numpy(),
+                                  'concluido': False, 'aberto': False, 'status': None, 'momento': pd.NaT},
+                                 index=pd.Index(primeiros['pedido_id'], name='pedido_id'))
+        pedidos = pd.concat([self.pedidos, entrantes]) if len(entrantes) else self.pedidos.copy()
+
+        conclusoes = ev[eh_novo & (ev['status'] == STATUS_CONCLUIDO)]
+        conclusoes = conclusoes[~conclusoes['pedido_id'].duplicated(keep='first')]
+        situacao = pedidos.loc[conclusoes['pedido_id']]
+        contadas = conclusoes[(situacao['entrou_aberto'] & ~situacao['concluido']).to_numpy()]
+        lead = pd.DataFrame({'pedido_id': contadas['pedido_id'].to_numpy(), 'conclusao': contadas['momento'].to_numpy(),
+                             'lead_dias': _dias(contadas['momento'] - pedidos.loc[contadas['pedido_id'], 'entrada'].to_numpy()).to_numpy(),
+                             'is_teravix': contadas['is_teravix'].fillna(0).astype(bool).to_numpy()})
+        lead = lead[lead['lead_dias'] >= 0]
+
+        ultimos = ev[eh_novo & ~ev['pedido_id'].duplicated(keep='last')]
+        pedidos.loc[ultimos['pedido_id'], 'status'] = ultimos['status'].to_numpy()
+        pedidos.loc[ultimos['pedido_id'], 'momento'] = ultimos['momento'].to_numpy()
+        pedidos.loc[ultimos['pedido_id'], 'aberto'] = em_aberto[ultimos.index].to_numpy()
+        pedidos.loc[conclusoes['pedido_id'], 'concluido'] = True
+
+        self.pedidos = pedidos
+        if len(novos): self.ultimo_id = int(novos['ordem'].iloc[-1])
+        anterior = self.agregados
+        # Só recalcula os percentis que receberam dados novos; os demais vêm da chamada anterior
+        ciclo_por_status, lead_semanal = (anterior.ciclo_por_status, anterior.lead_semanal) if anterior else (None, None)
+        if len(ciclos):
+            for status in ciclos['status'].unique(): self.codigos_status.setdefault(status, len(self.codigos_status))
+            self.ciclos_status = np.concatenate([self.ciclos_status, ciclos['status'].map(self.codigos_status).to_numpy(dtype=np.int16)])
+            self.ciclos_duracao = np.concatenate([self.ciclos_duracao, ciclos['duracao'].to_numpy(dtype=float)])
+        if len(ciclos) or anterior is None:
+            ciclo_por_status = _percentis_por_grupo(pd.Series(self.ciclos_duracao), pd.Series(self.ciclos_status, name='status'))
+            ciclo_por_status.index = pd.Index([list(self.codigos_status)[codigo] for codigo in ciclo_por_status.index], name='status')
+        if len(lead) or anterior is None:
+            self.lead_times = pd.concat([self.lead_times, lead], ignore_index=True) if len(lead) else self.lead_times
+            semana = self.lead_times['conclusao'].dt.to_period('W-SUN').dt.start_time.rename('semana')
+            tipo = pd.Series(np.where(self.lead_times['is_teravix'], 'TERAVIX', 'PV'), index=self.lead_times.index, name='tipo')
+            lead_semanal = _percentis_por_grupo(self.lead_times['lead_dias'], [semana, tipo]).reset_index()
+
+        abertos = pedidos[pedidos['aberto'].to_numpy(dtype=bool)]
+        self.agregados = AgregadosFluxo(
+            ciclo_por_status=ciclo_por_status, lead_times=self.lead_times, lead_semanal=lead_semanal,
+            wip=pd.DataFrame({'pedido_id': abertos.index.to_numpy(), 'status': abertos['status'].to_numpy(),
+                              'entrada': abertos['entrada'].to_numpy(), 'entrada_status': abertos['momento'].to_numpy()}),
+            tempo_calculo=time.perf_counter() - inicio)
+        return self.agregados
+
+# Histórico acumulado por banco
+_memo_historico = {}
+
+def carregar_agregados(caminho_banco):
+    """Agregados do histórico do banco; só os eventos gravados desde a última chamada são lidos e incorporados."""
+    conexao = conectar_banco(caminho_banco)
+    try:
+        migrar_banco_de_dados(conexao)
+        ultimo = ultimo_evento_status(conexao) or 0
+        historico = _memo_historico.get(caminho_banco)
+        # Banco recriado ou trocado (o último id voltou): recomeça do zero
+        if historico is None or ultimo < historico.ultimo_id: historico = _memo_historico[caminho_banco] = HistoricoFluxo()
+        if historico.agregados is not None and ultimo == historico.ultimo_id: return historico.agregados
+        # Conclusões antigas buscam a classificação TERAVIX/PV também no histórico arquivado
+        anexar_historico(conexao, caminho_banco)
+        linhas = ler_historico_status(conexao, historico.ultimo_id, 'todos_concluidos')
+    finally:
+        conexao.close()
+    agregados = historico.incorporar(linhas)
+    print(f"INFO: Indicadores de fluxo atualizados em {agregados.tempo_calculo:.3f}s ({len(linhas)} evento(s) novo(s), "
+          f"{len(agregados.lead_times)} lead times, {len(agregados.wip)} em aberto).")
+    return agregados
+
+# --- RESUMOS EM TIPOS NATIVOS (painel e relatórios) ---
+def percentis(valores):
+    """(quantidade, p50, p90) em dias de uma Series, ou (0, None, None) se ela estiver vazia."""
+    valores = valores.dropna()
+    if valores.empty: return 0, None, None
+    p50, p90 = valores.quantile([0.5, 0.9]).tolist()
+    return len(valores), float(p50), float(p90)
+
+def resumir_lead_times(agregados, inicio, fim=None):
+    """Lead time (quantidade, p50, p90) dos pedidos concluídos em [inicio, fim), por tipo ('TERAVIX' e 'PV')."""
+    import pandas as pd
+    lead = agregados.lead_times
+    mascara = lead['conclusao'] >= pd.Timestamp(inicio)
+    if fim is not None: mascara &= lead['conclusao'] < pd.Timestamp(fim)
+    lead = lead[mascara]
+    return {'TERAVIX': percentis(lead.loc[lead['is_teravix'], 'lead_dias']), 'PV': percentis(lead.loc[~lead['is_teravix'], 'lead_dias'])}
+
+def idades_wip(agregados, agora):
+    """Pedidos em aberto com a idade (dias) desde a entrada no quadro e desde a entrada no status atual."""
+    import pandas as pd
+    wip = agregados.wip.copy()
+    agora = pd.Timestamp(agora)
+    wip['idade_dias'] = _dias(agora - wip['entrada']); wip['idade_status_dias'] = _dias(agora - wip['entrada_status'])
+    return wip
+
+def resumir_wip(agregados, agora):
+    """(quantidade, p50, p90, mais antigo) das idades dos pedidos em aberto, em dias."""
+    idades = idades_wip(agregados, agora)['idade_dias']
+    quantidade, p50, p90 = percentis(idades)
+    return quantidade, p50, p90, (float(idades.max()) if quantidade else None)
+
+def resumo_fluxo(agregados, agora, semanas=SEMANAS_PAINEL):
+    """Indicadores do painel: lead time das últimas semanas, WIP e tempo (p50, p90) em cada status aberto."""
+    from datetime import timedelta
+    ciclo_por_status = agregados.ciclo_por_status
+    ordem = sorted(ciclo_por_status.index, key=lambda status: ORDEM_STATUS.index(status) if status in ORDEM_STATUS else len(ORDEM_STATUS))
+    ciclo = {status: (int(linha.pedidos), float(linha.p50_dias), float(linha.p90_dias)) for status, linha in ciclo_por_status.loc[ordem].iterrows()}
+    return {'lead': resumir_lead_times(agregados, agora - timedelta(weeks=semanas)), 'wip': resumir_wip(agregados, agora), 'ciclo': ciclo}
@@ -0,0 +1,91 @@
+"""
+Download condicional da planilha no modo online (USAR_LINK_ONLINE): envia If-None-Match/If-Modified-Since,
+grava a resposta em streaming num arquivo temporário e só substitui a cópia local quando o conteúdo realmente mudou.
+"""
+import os
+import time
+import hashlib
+import tempfile
+import http.client
+import urllib.request
+import urllib.error
+from dataclasses import dataclass
+
+from planilha import hash_arquivo
+
+TAMANHO_BLOCO = 64 * 1024
+TIMEOUT_DOWNLOAD = 30
+
+@dataclass(frozen=True)
+class ResultadoDownload:
+    """Resultado de uma verificação do link: se a cópia local mudou, quanto foi transferido e quanto demorou."""
+    mudou: bool
+    status: int              # 200 ou 304
+    bytes_recebidos: int
+    latencia: float          # segundos até a resposta (cabeçalhos)
+    duracao: float           # segundos até o fim do download
+    hash_conteudo: str
+
+    def descrever(self):
+        if self.status == 304: motivo = "não modificada (304)"
+        elif not self.mudou: motivo = "baixada, mas com o mesmo conteúdo"
+        else: motivo = "atualizada"
+        return f"Planilha online {motivo}: {self.bytes_recebidos} bytes em {self.duracao:.3f}s (resposta em {self.latencia:.3f}s)"
+
+class BaixadorPlanilha:
+    """Mantém uma cópia local da planilha do link, baixando-a apenas quando o servidor indica mudança."""
+    def __init__(self, url, destino, timeout=TIMEOUT_DOWNLOAD):
+        self.url = url; self.destino = destino; self.timeout = timeout
+        self.etag = None; self.ultima_modificacao = None
+        self.hash_conteudo = hash_arquivo(destino) if os.path.exists(destino) else None
+        self.verificacoes = 0; self.respostas_304 = 0; self.downloads_sem_mudanca = 0; self.bytes_totais = 0
+
+    def cabecalhos(self):
+        cabecalhos = {}
+        # Só faz sentido pedir uma resposta condicional se a cópia local ainda existe
+        if os.path.exists(self.destino):
+            if self.etag: cabecalhos['If-None-Match'] = self.etag
+            if self.ultima_modificacao: cabecalhos['If-Modified-Since'] = self.ultima_modificacao
+        return cabecalhos
+
+    def baixar(self):
+        """Verifica o link e atualiza a cópia local se necessário; devolve um ResultadoDownload."""
+        self.verificacoes += 1
+        inicio = time.perf_counter()
+        requisicao = urllib.request.Request(self.url, headers=self.cabecalhos())
+        try:
+            resposta = urllib.request.urlopen(requisicao, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 304: raise
+            self.respostas_304 += 1
+            duracao = time.perf_counter() - inicio
+            return ResultadoDownload(False, 304, 0, duracao, duracao, self.hash_conteudo)
+
+        with resposta:
+            latencia = time.perf_counter() - inicio
+            pasta = os.path.dirname(self.destino) or "."
+            os.makedirs(pasta, exist_ok=True)
+            h = hashlib.blake2b(digest_size=16); recebidos = 0
+            descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".download")
+            try:
+                with os.fdopen(descritor, 'wb') as arquivo:
+                    for bloco in iter(lambda: resposta.read(TAMANHO_BLOCO), b''):
+                        arquivo.write(bloco); h.update(bloco); recebidos += len(bloco)
+                # Conexão cortada no meio: o read() só devolve b'' e a cópia truncada não pode substituir a boa
+                esperados = resposta.headers.get('Content-Length')
+                if esperados and esperados.isdigit() and recebidos < int(esperados):
+                    raise http.client.IncompleteRead(b'', int(esperados) - recebidos)
+                hash_conteudo = h.hexdigest()
+                mudou = hash_conteudo != self.hash_conteudo or not os.path.exists(self.destino)
+                if mudou: os.replace(temporario, self.destino)
+            finally:
+                if os.path.exists(temporario): os.remove(temporario)
+            self.etag = resposta.headers.get('ETag'); self.ultima_modificacao = resposta.headers.get('Last-Modified')
+
+        self.bytes_totais += recebidos; self.hash_conteudo = hash_conteudo
+        if not mudou: self.downloads_sem_mudanca += 1
+        return ResultadoDownload(mudou, resposta.status, recebidos, latencia, time.perf_counter() - inicio, hash_conteudo)
+
+    def resumo(self):
+        return (f"verificações: {self.verificacoes}, 304: {self.respostas_304}, downloads sem mudança: {self.downloads_sem_mudanca}, "
+                f"bytes baixados: {self.bytes_totais}")
@@ -0,0 +1,302 @@
+"""Esquema, migrações e conexão do banco de dados da produção (producao.db), compartilhados pelo painel e pelos relatórios."""
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+
+COLUNAS_CONCLUIDOS = ['data_conclusao', 'pedido_id', 'pv', 'qtd_maquinas', 'equipamento', 'servico']
+
+SQL_CRIAR_CONCLUIDOS = '''
+    CREATE TABLE IF NOT EXISTS concluidos (
+        data_conclusao TEXT,
+        pedido_id TEXT PRIMARY KEY,
+        pv TEXT,
+        qtd_maquinas INTEGER,
+        equipamento TEXT,
+        servico TEXT
+    )
+'''
+
+# Resumo diário dos concluídos, mantido pela sincronização: o dashboard e os relatórios leem
+# algumas dezenas de linhas daqui em vez de agregar todos os pedidos a cada atualização.
+SQL_CRIAR_PRODUCAO_DIARIA = '''
+    CREATE TABLE IF NOT EXISTS producao_diaria (
+        dia TEXT PRIMARY KEY,
+        pedidos_teravix INTEGER NOT NULL DEFAULT 0,
+        qtd_teravix INTEGER NOT NULL DEFAULT 0,
+        pedidos_pv INTEGER NOT NULL DEFAULT 0,
+        qtd_pv INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+SQL_AGREGAR_DIAS = '''
+    SELECT dia, SUM(teravix), SUM(teravix * qtd), SUM(1 - teravix), SUM((1 - teravix) * qtd)
+    FROM (SELECT substr(data_conclusao, 1, 10) AS dia, COALESCE(is_teravix, 0) AS teravix, COALESCE(qtd_maquinas, 0) AS qtd
+          FROM {concluidos} WHERE {filtro})
+    GROUP BY dia
+'''
+
+# Resumos diários mantidos juntos, com o filtro de pedidos de cada um: producao_diaria tem todos os concluídos (relatórios)
+# e producao_diaria_painel só os pedidos 'CV-', os mesmos do quadro do painel (planilha.separar_pedidos_painel), para
+# que o dashboard dê os mesmos números com e sem sincronização do banco.
+RESUMOS_DIARIOS = {'producao_diaria': "1", 'producao_diaria_painel': "substr(pedido_id, 1, 3) = 'CV-'"}
+SQL_CRIAR_PRODUCAO_DIARIA_PAINEL = SQL_CRIAR_PRODUCAO_DIARIA.replace('producao_diaria', 'producao_diaria_painel')
+
+def sql_inserir_resumo(tabela, filtro, esquema='main'):
+    """INSERT do resumo diário 'tabela' com os concluídos que atendem a filtro; esquema escolhe o banco ('arquivo' = histórico anexado)."""
+    return f"INSERT INTO {esquema}.{tabela} " + SQL_AGREGAR_DIAS.format(concluidos=f"{esquema}.concluidos", filtro=f"({filtro}) AND {RESUMOS_DIARIOS[tabela]}")
+
+# Histórico de mudanças de status: a sincronização compara cada snapshot da planilha com o anterior (status_atual)
+# e acrescenta uma linha por pedido que mudou. status_anterior NULL = pedido novo; status_novo NULL = saiu da planilha.
+SQL_CRIAR_EVENTOS_STATUS = '''
+    CREATE TABLE IF NOT EXISTS eventos_status (
+        id INTEGER PRIMARY KEY,
+        pedido_id TEXT NOT NULL,
+        status_anterior TEXT,
+        status_novo TEXT,
+        data_status TEXT,
+        registrado_em TEXT NOT NULL
+    )
+'''
+
+SQL_CRIAR_STATUS_ATUAL = '''
+    CREATE TABLE IF NOT EXISTS status_atual (
+        pedido_id TEXT PRIMARY KEY,
+        status TEXT
+    ) WITHOUT ROWID
+'''
+
+# Data de corte do histórico: os concluídos anteriores a ela ficam no arquivo frio (caminho_historico), fora do banco principal
+SQL_CRIAR_ARQUIVAMENTO = '''
+    CREATE TABLE IF NOT EXISTS arquivamento (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        corte TEXT NOT NULL,
+        pedidos_arquivados INTEGER NOT NULL,
+        arquivado_em TEXT NOT NULL
+    )
+'''
+
+COLUNAS_EVENTOS_STATUS = ['pedido_id', 'status_anterior', 'status_novo', 'data_status', 'registrado_em']
+
+# Cada migração é aplicada uma única vez, na ordem; PRAGMA user_version guarda quantas já foram aplicadas.
+MIGRACOES_BANCO = [
+    # 1: assinatura (hash) de cada linha, usada pela sincronização para detectar pedidos editados
+    ["ALTER TABLE concluidos ADD COLUMN assinatura INTEGER"],
+    # 2: datas sempre em 'AAAA-MM-DD HH:MM:SS' (ordenáveis como texto), classificação TERAVIX/PV
+    #    calculada pelo próprio SQLite e índices para as consultas por período
+    ["UPDATE concluidos SET data_conclusao = strftime('%Y-%m-%d %H:%M:%S', data_conclusao) "
+     "WHERE strftime('%Y-%m-%d %H:%M:%S', data_conclusao) IS NOT NULL",
+     "ALTER TABLE concluidos ADD COLUMN is_teravix INTEGER GENERATED ALWAYS AS (instr(pv, 'TERAVIX') > 0) VIRTUAL",
+     "CREATE INDEX IF NOT EXISTS idx_concluidos_data ON concluidos (data_conclusao)",
+     "CREATE INDEX IF NOT EXISTS idx_concluidos_teravix_data ON concluidos (is_teravix, data_conclusao)"],
+    # 3: resumo diário por TERAVIX/PV, preenchido com o histórico já existente
+    [SQL_CRIAR_PRODUCAO_DIARIA,
+     "INSERT OR REPLACE INTO producao_diaria " + SQL_AGREGAR_DIAS.format(concluidos="concluidos", filtro="data_conclusao IS NOT NULL")],
+    # 4: histórico de mudanças de status e último status conhecido de cada pedido
+    [SQL_CRIAR_EVENTOS_STATUS, SQL_CRIAR_STATUS_ATUAL,
+     "CREATE INDEX IF NOT EXISTS idx_eventos_pedido ON eventos_status (pedido_id, id)",
+     "CREATE INDEX IF NOT EXISTS idx_eventos_status_data ON eventos_status (status_novo, data_status)"],
+    # 5: arquivo de onde a linha foi importada (concluidos_csv.py); NULL = linha sincronizada da planilha.
+    #    A sincronização só remove as linhas da planilha: o histórico importado fica no banco.
+    ["ALTER TABLE concluidos ADD COLUMN origem TEXT"],
+    # 6: corte do histórico arquivado (arquivar_historico)
+    [SQL_CRIAR_ARQUIVAMENTO],
+    # 7: resumo diário só dos pedidos 'CV-', lido pelo dashboard
+    [SQL_CRIAR_PRODUCAO_DIARIA_PAINEL, sql_inserir_resumo('producao_diaria_painel', "data_conclusao IS NOT NULL")],
+]
+
+def conectar_banco(caminho):
+    conexao = sqlite3.connect(caminho, timeout=10)
+    conexao.execute("PRAGMA synchronous = NORMAL")  # seguro em modo WAL e bem mais rápido que FULL
+    return conexao
+
+def migrar_banco_de_dados(conexao):
+    """Aplica as migrações pendentes de MIGRACOES_BANCO e ativa o modo WAL."""
+    conexao.execute("PRAGMA journal_mode = WAL")
+    versao = conexao.execute("PRAGMA user_version").fetchone()[0]
+    for numero, comandos in enumerate(MIGRACOES_BANCO[versao:], start=versao + 1):
+        print(f"INFO: Aplicando migração {numero} do banco de dados...")
+        with conexao:
+            for comando in comandos:
+                conexao.execute(comando)
+            conexao.execute(f"PRAGMA user_version = {numero}")
+
+def inicializar_banco(caminho):
+    """Cria a tabela 'concluidos', se necessário, e atualiza o esquema para a versão mais recente."""
+    conexao = conectar_banco(caminho)
+    with conexao:
+        conexao.execute(SQL_CRIAR_CONCLUIDOS)
+    migrar_banco_de_dados(conexao)
+    conexao.close()
+
+def intervalo_dias(data_inicial, data_final):
+    """
+    Converte um período de dias inteiros (datas inclusivas) no intervalo semiaberto [início, fim)
+    usado nas consultas, que assim comparam a coluna data_conclusao diretamente e aproveitam o índice.
+    """
+    return data_inicial.strftime('%Y-%m-%d'), (data_final + timedelta(days=1)).strftime('%Y-%m-%d')
+
+def atualizar_producao_diaria(conexao, dias, esquema='main'):
+    """
+    Recalcula os resumos diários apenas dos dias informados ('AAAA-MM-DD'); usado dentro da transação da sincronização,
+    também para o histórico anexado (esquema='arquivo').
+    """
+    for tabela in RESUMOS_DIARIOS:
+        sql_inserir = sql_inserir_resumo(tabela, "data_conclusao >= ? AND data_conclusao < ?", esquema)
+        for dia in dias:
+            conexao.execute(f"DELETE FROM {esquema}.{tabela} WHERE dia = ?", (dia,))
+            conexao.execute(sql_inserir, intervalo_dias(date.fromisoformat(dia), date.fromisoformat(dia)))
+
+def recalcular_producao_diaria_periodo(conexao, primeiro_dia, ultimo_dia):
+    """
+    Recalcula os resumos diários de todos os dias entre primeiro_dia e ultimo_dia ('AAAA-MM-DD', inclusive) com uma única
+    agregação por resumo; usado pela importação em lote, em que cada transação afeta centenas de dias.
+    """
+    inicio, fim = intervalo_dias(date.fromisoformat(primeiro_dia), date.fromisoformat(ultimo_dia))
+    for tabela in RESUMOS_DIARIOS:
+        conexao.execute(f"DELETE FROM {tabela} WHERE dia >= ? AND dia < ?", (inicio, fim))
+        conexao.execute(sql_inserir_resumo(tabela, "data_conclusao >= ? AND data_conclusao < ?"), (inicio, fim))
+
+def ler_producao_diaria(conexao, dia_inicial=None, tabela='producao_diaria'):
+    """Linhas (dia, pedidos_teravix, qtd_teravix, pedidos_pv, qtd_pv) do resumo diário 'tabela', a partir de dia_inicial."""
+    if dia_inicial is None:
+        return conexao.execute(f"SELECT * FROM {tabela} ORDER BY dia").fetchall()
+    return conexao.execute(f"SELECT * FROM {tabela} WHERE dia >= ? ORDER BY dia", (dia_inicial.strftime('%Y-%m-%d'),)).fetchall()
+
+def ler_producao_diaria_periodo(conexao, data_inicial, data_final, tabela='producao_diaria'):
+    """
+    Linhas (dia, pedidos_teravix, qtd_teravix, pedidos_pv, qtd_pv) do resumo diário entre data_inicial e data_final, inclusive.
+    Com tabela='toda_producao_diaria' (anexar_historico), inclui os dias arquivados.
+    """
+    return conexao.execute(f"SELECT * FROM {tabela} WHERE dia >= ? AND dia < ? ORDER BY dia",
+                           intervalo_dias(data_inicial, data_final)).fetchall()
+
+def resumir_periodo(conexao, data_inicial, data_final, tabela='producao_diaria'):
+    """Totais (pedidos_teravix, qtd_teravix, pedidos_pv, qtd_pv) dos dias entre data_inicial e data_final, inclusive."""
+    linha = conexao.execute(f"""
+        SELECT COALESCE(SUM(pedidos_teravix), 0), COALESCE(SUM(qtd_teravix), 0), COALESCE(SUM(pedidos_pv), 0), COALESCE(SUM(qtd_pv), 0)
+        FROM {tabela} WHERE dia >= ? AND dia < ?
+    """, intervalo_dias(data_inicial, data_final)).fetchone()
+    return tuple(linha)
+
+def ultimo_evento_status(conexao):
+    """Id do último evento de status gravado (None se não houver); usado para saber se o status_atual em memória ainda vale."""
+    return conexao.execute("SELECT MAX(id) FROM eventos_status").fetchone()[0]
+
+def ler_status_atual(conexao):
+    """Linhas (pedido_id, status) com o último status conhecido de cada pedido."""
+    return conexao.execute("SELECT pedido_id, status FROM status_atual").fetchall()
+
+def registrar_eventos_status(conexao, eventos):
+    """
+    Acrescenta os eventos (tuplas na ordem de COLUNAS_EVENTOS_STATUS) e atualiza o status_atual de cada pedido;
+    usado dentro da transação da sincronização.
+    """
+    conexao.executemany(f"INSERT INTO eventos_status ({', '.join(COLUNAS_EVENTOS_STATUS)}) VALUES ({', '.join('?' * len(COLUNAS_EVENTOS_STATUS))})", eventos)
+    conexao.executemany("DELETE FROM status_atual WHERE pedido_id = ?", [(e[0],) for e in eventos if e[2] is None])
+    conexao.executemany("INSERT OR REPLACE INTO status_atual (pedido_id, status) VALUES (?, ?)", [(e[0], e[2]) for e in eventos if e[2] is not None])
+
+def ler_historico_status(conexao, apos_id=0, tabela_concluidos='concluidos'):
+    """
+    Linhas (id, pedido_id, status_novo, momento, is_teravix) dos eventos de status com id maior que apos_id, em ordem de id.
+    momento é a Data Status da planilha ou, sem ela, o horário da sincronização; is_teravix só é preenchido nas conclusões.
+    """
+    return conexao.execute(f"""
+        SELECT e.id, e.pedido_id, e.status_novo, COALESCE(e.data_status, e.registrado_em),
+               CASE WHEN e.status_novo = ? THEN (SELECT c.is_teravix FROM {tabela_concluidos} c WHERE c.pedido_id = e.pedido_id) END
+        FROM eventos_status e WHERE e.id > ? ORDER BY e.id
+    """, ('Concluído', apos_id)).fetchall()
+
+# Histórico quente/frio: o banco principal guarda só os concluídos a partir do corte (os meses que o painel e a
+# sincronização usam), e os anteriores vão para o arquivo frio ao lado dele. O resumo diário segue a mesma divisão,
+# então cada dia está em um lugar só. Os relatórios leem as duas partes pelas visões de anexar_historico.
+def caminho_historico(caminho_banco):
+    """Arquivo frio de um banco: 'dados/producao.db' -> 'dados/producao_historico.db'."""
+    raiz, extensao = os.path.splitext(caminho_banco)
+    return f"{raiz}_historico{extensao}"
+
+def ler_corte_historico(conexao):
+    """Primeiro dia ('AAAA-MM-DD') guardado no banco principal, ou None se nada foi arquivado."""
+    linha = conexao.execute("SELECT corte FROM arquivamento").fetchone()
+    return linha[0] if linha else None
+
+def anexar_historico(conexao, caminho_banco):
+    """
+    Anexa o arquivo frio do banco, se houver, e cria as visões temporárias todos_concluidos e toda_producao_diaria com o
+    histórico completo. Cada parte só contribui com os dias do seu lado do corte, então uma linha antiga ainda não movida
+    (importação recente, arquivamento interrompido) não é contada duas vezes. Chamar fora de transações.
+    """
+    colunas = ', '.join(COLUNAS_CONCLUIDOS + ['is_teravix'])
+    visoes = {'todos_concluidos': f"SELECT {colunas} FROM main.concluidos", 'toda_producao_diaria': "SELECT * FROM main.producao_diaria"}
+    corte = ler_corte_historico(conexao); caminho = caminho_historico(caminho_banco)
+    if corte is not None and not os.path.exists(caminho):
+        print(f"AVISO: Arquivo do histórico não encontrado ({caminho}); os relatórios só têm os concluídos a partir de {corte}.")
+    elif corte is not None:
+        corte = date.fromisoformat(corte).isoformat()  # vai como literal nas visões
+        if not historico_anexado(conexao):
+            conexao.execute("ATTACH DATABASE ? AS arquivo", (caminho,))
+        visoes = {
+            'todos_concluidos': f"SELECT {colunas} FROM main.concluidos WHERE data_conclusao >= '{corte}' "
+                                f"UNION ALL SELECT {colunas} FROM arquivo.concluidos WHERE data_conclusao < '{corte}'",
+            'toda_producao_diaria': f"SELECT * FROM main.producao_diaria WHERE dia >= '{corte}' "
+                                    f"UNION ALL SELECT * FROM arquivo.producao_diaria WHERE dia < '{corte}'",
+        }
+    for nome, sql in visoes.items():
+        conexao.execute(f"DROP VIEW IF EXISTS temp.{nome}")
+        conexao.execute(f"CREATE TEMP VIEW {nome} AS {sql}")
+
+def historico_anexado(conexao):
+    """Se o arquivo do histórico está anexado à conexão (anexar_historico) como 'arquivo'."""
+    return 'arquivo' in [nome for _, nome, _ in conexao.execute("PRAGMA database_list")]
+
+def arquivar_historico(caminho_banco, corte):
+    """
+    Move para o arquivo frio os concluídos anteriores a corte (date) e grava o novo corte; o corte nunca volta.
+    A cópia é um upsert confirmado no arquivo antes de apagar do banco principal, então uma interrupção no meio só
+    faz a próxima execução repetir a cópia. No arquivo, uma linha da planilha (origem NULL) não é sobrescrita por uma
+    importada. Devolve quantos pedidos foram movidos.
+    """
+    conexao = conectar_banco(caminho_banco)
+    try:
+        atual = ler_corte_historico(conexao)
+        corte = max(corte.isoformat(), atual or '')
+        primeira, ultima, total = conexao.execute(
+            "SELECT MIN(data_conclusao), MAX(data_conclusao), COUNT(*) FROM concluidos WHERE data_conclusao < ?", (corte,)).fetchone()
+        if total == 0 and (atual is None or atual == corte): return 0
+
+        if total:
+            caminho_frio = caminho_historico(caminho_banco)
+            inicializar_banco(caminho_frio)
+            frio = conectar_banco(caminho_frio)
+            try:
+                frio.execute("ATTACH DATABASE ? AS quente", (caminho_banco,))
+                colunas = COLUNAS_CONCLUIDOS + ['assinatura', 'origem']
+                atualizacoes = ', '.join(f'{col} = excluded.{col}' for col in colunas if col != 'pedido_id')
+                with frio:
+                    frio.execute(f"INSERT INTO concluidos ({', '.join(colunas)}) SELECT {', '.join(colunas)} FROM quente.concluidos "
+                                 f"WHERE data_conclusao < ? ON CONFLICT(pedido_id) DO UPDATE SET {atualizacoes} "
+                                 f"WHERE concluidos.origem IS NOT NULL OR excluded.origem IS NULL", (corte,))
+                    recalcular_producao_diaria_periodo(frio, primeira[:10], ultima[:10])
+            finally:
+                frio.close()
+
+        with conexao:
+            conexao.execute("DELETE FROM concluidos WHERE data_conclusao < ?", (corte,))
+            for tabela in RESUMOS_DIARIOS: conexao.execute(f"DELETE FROM {tabela} WHERE dia < ?", (corte,))
+            conexao.execute("INSERT INTO arquivamento (id, corte, pedidos_arquivados, arquivado_em) VALUES (1, ?, ?, ?) "
+                            "ON CONFLICT(id) DO UPDATE SET corte = excluded.corte, arquivado_em = excluded.arquivado_em, "
+                            "pedidos_arquivados = pedidos_arquivados + excluded.pedidos_arquivados",
+                            (corte, total, datetime.now().isoformat(timespec='seconds')))
+        return total
+    finally:
+        conexao.close()
+
+def compactar_banco(caminho):
+    """Reescreve o banco (VACUUM) para devolver ao disco o espaço das linhas apagadas; precisa que ninguém esteja gravando nele."""
+    conexao = conectar_banco(caminho)
+    try:
+        antes = os.path.getsize(caminho)
+        conexao.execute("VACUUM")
+        conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return antes, os.path.getsize(caminho)
+    finally:
+        conexao.close()
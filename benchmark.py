@@ -0,0 +1,191 @@
+"""
+Benchmark sem interface gráfica do caminho de atualização do painel e das consultas dos relatórios.
+Gera (ou reaproveita) dados sintéticos de cada tamanho com dados_sinteticos.py e mede tempo e pico de memória de cada etapa.
+Com --inicializacao, mede também o tempo de importação a frio do motor, da linha de comando e das duas interfaces.
+
+Uso:
+    python benchmark.py                                  # 1 mil, 10 mil e 100 mil pedidos
+    python benchmark.py --tamanhos 1000 1000000 --json resultado.json
+    python benchmark.py --comparar resultado.json        # mostra a variação em relação a uma execução anterior
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+import contextlib
+import subprocess
+from datetime import date, datetime, timedelta
+
+import dados_sinteticos
+import planilha
+import banco
+import analise
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+PASTA_PADRAO = os.path.join(tempfile.gettempdir(), "mtec_benchmark")
+
+def preparar_motor(pasta, caminho_planilha):
+    """Aponta o motor para a planilha sintética; a sincronização usa um banco próprio, separado do banco gerado."""
+    import motor
+    motor.CAMINHO_PASTA_DADOS = pasta
+    motor.CAMINHO_PLANILHA_STATUS = caminho_planilha
+    motor.CAMINHO_BANCO_DE_DADOS = os.path.join(pasta, "sincronizado.db")
+    return motor
+
+def criar_etapas(motor, caminho_banco_fixture):
+    """Lista de (nome, preparação, execução); a preparação roda fora da medição e recebe o contexto compartilhado."""
+    def sem_cache(ctx):
+        cache = planilha.caminho_cache(motor.CAMINHO_PLANILHA_STATUS)
+        if os.path.exists(cache): os.remove(cache)
+
+    def com_cache(ctx):
+        if not os.path.exists(planilha.caminho_cache(motor.CAMINHO_PLANILHA_STATUS)): motor.ler_snapshot_planilha()
+
+    def banco_vazio(ctx):
+        for caminho in (motor.CAMINHO_BANCO_DE_DADOS, banco.caminho_historico(motor.CAMINHO_BANCO_DE_DADOS)):
+            for sufixo in ("", "-wal", "-shm"):
+                if os.path.exists(caminho + sufixo): os.remove(caminho + sufixo)
+        banco.inicializar_banco(motor.CAMINHO_BANCO_DE_DADOS)
+
+    def banco_sincronizado(ctx):
+        if not ctx.get('sincronizado'):
+            banco_vazio(ctx); motor.sincronizar_banco_de_dados(ctx['snapshot']); ctx['sincronizado'] = True
+
+    def ler(ctx): ctx['snapshot'] = motor.ler_snapshot_planilha()
+    def sincronizar(ctx): motor.sincronizar_banco_de_dados(ctx['snapshot']); ctx['sincronizado'] = True
+    def producao_diaria(ctx): ctx['producao_diaria'] = motor.carregar_producao_diaria(motor.inicio_janela_dashboard(datetime.now()))
+    def historico_sem_memoria(ctx):
+        banco_sincronizado(ctx); analise._memo_historico.clear()
+
+    def resumo(dias): return lambda ctx: motor.buscar_resumo_periodo(date.today() - timedelta(days=dias), date.today(), caminho_banco_fixture)
+
+    nada = lambda ctx: None
+    return [
+        ("leitura da planilha (sem cache)", sem_cache, ler),
+        ("leitura da planilha (cache)", com_cache, ler),
+        ("carregar_dados", nada, lambda ctx: motor.carregar_dados(ctx['snapshot'])),
+        ("sincronizar_banco_de_dados (banco vazio)", lambda ctx: (banco_vazio(ctx), ctx.update(sincronizado=False)), sincronizar),
+        ("sincronizar_banco_de_dados (sem mudanças)", banco_sincronizado, sincronizar),
+        ("carregar_producao_diaria", banco_sincronizado, producao_diaria),
+        ("calcular_metricas_dashboard", nada, lambda ctx: motor.calcular_metricas_dashboard(ctx['producao_diaria'])),
+        ("calcular_dados_grafico", nada, lambda ctx: motor.calcular_dados_grafico(ctx['producao_diaria'])),
+        ("indicadores de fluxo (histórico completo)", historico_sem_memoria, lambda ctx: analise.carregar_agregados(motor.CAMINHO_BANCO_DE_DADOS)),
+        ("indicadores de fluxo (sem eventos novos)", banco_sincronizado, lambda ctx: analise.carregar_agregados(motor.CAMINHO_BANCO_DE_DADOS)),
+        ("buscar_resumo_periodo (30 dias)", nada, resumo(30)),
+        ("buscar_resumo_periodo (365 dias)", nada, resumo(365)),
+    ]
+
+def medir_etapa(ctx, preparar, executar, repeticoes, medir_memoria):
+    """Tempos (s) de cada repetição e pico de memória alocada (bytes) numa execução extra com tracemalloc."""
+    tempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            preparar(ctx)
+            inicio = time.perf_counter(); executar(ctx); tempos.append(time.perf_counter() - inicio)
+        pico = None
+        if medir_memoria:
+            preparar(ctx)
+            tracemalloc.start()
+            try:
+                executar(ctx); pico = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return tempos, pico
+
+def executar_benchmark(tamanhos, pasta, repeticoes=3, medir_memoria=True, semente=0, regerar=False):
+    """Roda todas as etapas para cada tamanho e devolve uma lista de resultados (um dicionário por etapa)."""
+    resultados = []
+    for tamanho in tamanhos:
+        pasta_tamanho = os.path.join(pasta, f"{tamanho}_{semente}")
+        caminho_planilha = os.path.join(pasta_tamanho, "Status_dos_pedidos.xlsm"); caminho_banco = os.path.join(pasta_tamanho, "producao.db")
+        if regerar or not (os.path.exists(caminho_planilha) and os.path.exists(caminho_banco)):
+            shutil.rmtree(pasta_tamanho, ignore_errors=True)
+            print(f"INFO: Gerando {tamanho} pedidos sintéticos em {pasta_tamanho}...")
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                dados_sinteticos.gerar_fixtures(tamanho, pasta_tamanho, semente)
+            print(f"INFO: Dados gerados em {time.perf_counter() - inicio:.1f}s.")
+
+        motor = preparar_motor(pasta_tamanho, caminho_planilha)
+        ctx = {}
+        print(f"\n=== {tamanho} pedidos ===")
+        print(f"{'etapa':<44}{'mediana (s)':>12}{'mínimo (s)':>12}{'pico mem (MB)':>15}")
+        for nome, preparar, executar in criar_etapas(motor, caminho_banco):
+            tempos, pico = medir_etapa(ctx, preparar, executar, repeticoes, medir_memoria)
+            resultado = {'tamanho': tamanho, 'etapa': nome, 'mediana_s': statistics.median(tempos), 'minimo_s': min(tempos),
+                         'pico_memoria_mb': None if pico is None else pico / 2**20}
+            resultados.append(resultado)
+            memoria = "-" if pico is None else f"{resultado['pico_memoria_mb']:.1f}"
+            print(f"{nome:<44}{resultado['mediana_s']:>12.4f}{resultado['minimo_s']:>12.4f}{memoria:>15}")
+        # Memória ocupada pelo snapshot em si (planilha tipada + pedidos do painel), que o painel mantém entre atualizações
+        memoria_snapshot = sum(ctx['snapshot'].memoria.values()) / 2**20
+        resultados.append({'tamanho': tamanho, 'etapa': "memória do snapshot", 'mediana_s': None, 'minimo_s': None, 'pico_memoria_mb': memoria_snapshot})
+        print(f"{'memória do snapshot (planilha + painel)':<44}{'-':>12}{'-':>12}{memoria_snapshot:>15.1f}")
+    return resultados
+
+# Pontos de entrada medidos na inicialização a frio: cada um é importado num interpretador novo
+PONTOS_DE_ENTRADA = {
+    'motor': "import motor",
+    'cli': "import cli",
+    'relatorios': "import relatorios",
+    'prioridades': "import prioridades",
+    'motor + pandas': "import motor, pandas",
+}
+
+def medir_inicializacao(repeticoes=5):
+    """Tempo de importação de cada ponto de entrada num processo Python novo, descontado o próprio interpretador."""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    def medir(codigo):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, "-c", codigo], cwd=pasta, check=True, stdout=subprocess.DEVNULL)
+            tempos.append(time.perf_counter() - inicio)
+        return statistics.median(tempos)
+
+    base = medir("pass")
+    resultados = []
+    print(f"\n=== Inicialização a frio (interpretador vazio: {base:.3f}s) ===")
+    for nome, codigo in PONTOS_DE_ENTRADA.items():
+        tempo = medir(codigo) - base
+        resultados.append({'tamanho': 0, 'etapa': f"inicialização: {nome}", 'mediana_s': tempo, 'minimo_s': tempo, 'pico_memoria_mb': None})
+        print(f"{nome:<44}{tempo:>12.4f}")
+    return resultados
+
+def comparar_resultados(resultados, caminho_base):
+    """Mostra a variação de tempo de cada etapa em relação a um JSON salvo por uma execução anterior."""
+    with open(caminho_base, encoding='utf-8') as arquivo:
+        base = {(r['tamanho'], r['etapa']): r for r in json.load(arquivo)['resultados']}
+    print(f"\n=== Comparação com {caminho_base} ===")
+    for r in resultados:
+        anterior = base.get((r['tamanho'], r['etapa']))
+        if anterior is None or not anterior['mediana_s']: continue
+        variacao = (r['mediana_s'] / anterior['mediana_s'] - 1) * 100
+        print(f"{r['tamanho']:>8} {r['etapa']:<44}{anterior['mediana_s']:>10.4f} -> {r['mediana_s']:>8.4f}s ({variacao:+.0f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede tempo e memória das etapas de atualização do painel e dos relatórios.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="quantidades de pedidos (ex.: 1000 10000 1000000)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="pasta onde os dados sintéticos são gerados e reaproveitados")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--regerar", action="store_true", help="gera os dados sintéticos novamente mesmo se já existirem")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória (evita a execução extra com tracemalloc)")
+    parser.add_argument("--inicializacao", action="store_true", help="mede também o tempo de importação de cada ponto de entrada")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark(args.tamanhos, args.pasta, args.repeticoes, not args.sem_memoria, args.semente, args.regerar)
+    if args.inicializacao: resultados += medir_inicializacao(args.repeticoes)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump({'executado_em': datetime.now().isoformat(timespec='seconds'), 'resultados': resultados}, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nINFO: Resultados salvos em {args.json}")
+    if args.comparar: comparar_resultados(resultados, args.comparar)
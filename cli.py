@@ -0,0 +1,148 @@
+"""
+Linha de comando do painel de produção, sem interface gráfica.
+
+Uso:
+    python cli.py sincronizar                       # lê a planilha e sincroniza o producao.db
+    python cli.py painel                            # resumo do painel (colunas, concluídos do dia e métricas)
+    python cli.py relatorio --inicio 01/10/2025 --fim 31/10/2025
+    python cli.py lote --inicio 01/10/2025 --fim 31/10/2025 --granularidade dia [--saida resumo.csv|resumo.xlsx]
+    python cli.py publicar [--endereco 0.0.0.0:8765] [--http 0.0.0.0:8080]   # processo único que atualiza e envia o painel aos clientes
+    python cli.py importar historico.csv [--tamanho-lote 50000]                # carrega um arquivo no formato do concluidos.csv no producao.db
+    python cli.py exportar concluidos.csv [--inicio 01/01/2024] [--fim 31/12/2024]
+    python cli.py arquivar [--meses 3] [--compactar]                          # move os concluídos antigos para o producao_historico.db
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+
+import motor
+import transmissao
+import servidor_http
+import concluidos_csv
+
+def data_br(texto):
+    """Converte 'dd/mm/aaaa' em date, para os argumentos de período."""
+    try:
+        return datetime.strptime(texto, '%d/%m/%Y').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida '{texto}', use dd/mm/aaaa")
+
+def meses_retencao(texto):
+    """Número de meses do argumento --meses, a partir de 1 (o painel usa o mês atual e o anterior)."""
+    if not texto.isdigit() or int(texto) < 1: raise argparse.ArgumentTypeError("use um número inteiro de meses a partir de 1")
+    return int(texto)
+
+def comando_sincronizar(args):
+    motor.inicializar_banco_de_dados()
+    motor.atualizar_copia_online()
+    resultado = motor.sincronizar_banco_de_dados(motor.ler_snapshot_planilha())
+    if isinstance(resultado, motor.FalhaSincronizacao): raise Exception(f"A sincronização do banco de dados falhou: {resultado.erro}")
+
+def comando_painel(args):
+    if not args.sem_sincronizar: motor.inicializar_banco_de_dados()
+    motor.atualizar_copia_online()
+    modelo = motor.executar_atualizacao(sincronizar=not args.sem_sincronizar)
+    print(f"\nPrioridades: {len(modelo.prioridades)} | Em montagem: {len(modelo.em_montagem)} | Pendentes: {len(modelo.pendentes)} | "
+          f"Aguardando montagem: {len(modelo.aguardando_montagem)} | Aguardando chegada: {len(modelo.aguardando_chegada)}")
+    for titulo, totais in (("Concluídos hoje", modelo.totais_concluidos), ("Cancelados hoje", modelo.totais_cancelados)):
+        teravix, pv, total, teravix_qtd, pv_qtd, total_qtd = totais
+        print(f"{titulo}: {total} ({total_qtd} máq.) - TERAVIX: {teravix} ({teravix_qtd} máq.), PV: {pv} ({pv_qtd} máq.)")
+    m = modelo.metricas
+    print(f"Mês atual: {m['total_mes_atual']} pedidos, {m['total_mes_atual_qtd']} máq., média diária {m['media_diaria_atual']:.1f} | "
+          f"Mês anterior: {m['total_mes_anterior']} pedidos, média diária {m['media_diaria_anterior']:.1f}")
+    for semana, valor in modelo.dados_grafico:
+        print(f"Semana de {semana.strftime('%d/%m')}: {valor}/{motor.META_SEMANAL} máq.")
+    if modelo.fluxo:
+        for tipo, (pedidos, p50, p90) in modelo.fluxo['lead'].items():
+            if pedidos: print(f"Lead time {tipo}: p50 {p50:.1f} dias, p90 {p90:.1f} dias ({pedidos} pedidos)")
+        pedidos, p50, p90, mais_antigo = modelo.fluxo['wip']
+        if pedidos: print(f"Em aberto: {pedidos} pedidos, idade p50 {p50:.1f} dias, p90 {p90:.1f} dias, mais antigo {mais_antigo:.1f} dias")
+        for status, (pedidos, p50, p90) in modelo.fluxo['ciclo'].items():
+            print(f"Tempo em '{status}': p50 {p50:.1f} dias, p90 {p90:.1f} dias ({pedidos} passagens)")
+    erro = (modelo.contagens or {}).get('erro_sincronizacao')
+    if erro: raise Exception(f"A sincronização do banco de dados falhou; as métricas acima são as que o banco já tinha: {erro}")
+
+def comando_relatorio(args):
+    fim = args.fim or args.inicio
+    resumo = motor.buscar_resumo_periodo(args.inicio, fim)
+    print(motor.montar_texto_relatorio(args.inicio, fim, resumo, motor.buscar_backlog(), motor.buscar_fluxo_periodo(args.inicio, fim)))
+
+def comando_lote(args):
+    resumo, textos = motor.gerar_relatorios_em_lote(args.inicio, args.fim, args.granularidade, args.saida)
+    if args.saida: print(f"INFO: Resumo de {len(resumo)} período(s) exportado para {args.saida}")
+    else: print(motor.SEPARADOR_LOTE.join(textos))
+
+def comando_publicar(args):
+    estado_http = servidor = None
+    if args.http:
+        estado_http = servidor_http.EstadoPainel()
+        servidor = servidor_http.ServidorPainel(estado_http, *args.http); servidor.iniciar()
+    try:
+        transmissao.executar_publicador(*args.endereco, estado_http=estado_http)
+    finally:
+        if servidor is not None: servidor.encerrar()
+
+def comando_importar(args):
+    motor.inicializar_banco_de_dados()
+    print(concluidos_csv.importar_concluidos(args.arquivo, motor.CAMINHO_BANCO_DE_DADOS, args.tamanho_lote).descrever())
+
+def comando_exportar(args):
+    total = concluidos_csv.exportar_concluidos(motor.CAMINHO_BANCO_DE_DADOS, args.saida, args.inicio, args.fim, args.tamanho_lote)
+    print(f"INFO: {total} pedido(s) concluído(s) exportado(s) para {args.saida}")
+
+def comando_arquivar(args):
+    motor.inicializar_banco_de_dados()
+    if not motor.arquivar_historico_antigo(args.meses, args.compactar):
+        print(f"INFO: Nenhum concluído anterior a {motor.corte_historico(datetime.now(), args.meses).strftime('%d/%m/%Y')} no banco principal.")
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Painel de produção MTEC sem interface gráfica.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    subcomandos.add_parser("sincronizar", help="lê a planilha e sincroniza o banco de dados").set_defaults(funcao=comando_sincronizar)
+    painel = subcomandos.add_parser("painel", help="mostra o resumo que o painel exibiria agora")
+    painel.add_argument("--sem-sincronizar", action="store_true", help="calcula as métricas direto da planilha, sem tocar no banco")
+    painel.set_defaults(funcao=comando_painel)
+    relatorio = subcomandos.add_parser("relatorio", help="gera o texto do relatório de atividades do período")
+    relatorio.add_argument("--inicio", type=data_br, default=datetime.now().date(), help="data inicial (dd/mm/aaaa), padrão hoje")
+    relatorio.add_argument("--fim", type=data_br, help="data final (dd/mm/aaaa), padrão igual à inicial")
+    relatorio.set_defaults(funcao=comando_relatorio)
+    lote = subcomandos.add_parser("lote", help="gera os relatórios de cada dia, semana ou mês de um período de uma só vez")
+    lote.add_argument("--inicio", type=data_br, required=True, help="data inicial (dd/mm/aaaa)")
+    lote.add_argument("--fim", type=data_br, required=True, help="data final (dd/mm/aaaa)")
+    lote.add_argument("--granularidade", choices=list(motor.GRANULARIDADES), default="dia")
+    lote.add_argument("--saida", help="exporta o resumo por período para um arquivo .csv ou .xlsx em vez de imprimir os textos")
+    lote.set_defaults(funcao=comando_lote)
+    publicar = subcomandos.add_parser("publicar", help="monitora a planilha, sincroniza o banco e envia o painel pronto aos painéis em modo cliente")
+    publicar.add_argument("--endereco", type=transmissao.endereco, default=(transmissao.HOST_PADRAO, transmissao.PORTA_PADRAO),
+                          help="host:porta em que os painéis se conectam (padrão 127.0.0.1:8765; use 0.0.0.0 para outras máquinas)")
+    publicar.add_argument("--http", nargs="?", const=f"{servidor_http.HOST_HTTP_PADRAO}:{servidor_http.PORTA_HTTP_PADRAO}", type=servidor_http.endereco_http,
+                          metavar="HOST:PORTA", help="serve também o estado do painel em JSON por HTTP (padrão 127.0.0.1:8080)")
+    publicar.set_defaults(funcao=comando_publicar)
+    importar = subcomandos.add_parser("importar", help="importa para o banco um arquivo de concluídos no formato do concluidos.csv")
+    importar.add_argument("arquivo", help="arquivo .csv separado por ';' (data_conclusao;pedido_id;pv;qtd_maquinas;equipamento;servico)")
+    importar.add_argument("--tamanho-lote", type=int, default=concluidos_csv.TAMANHO_LOTE, help="linhas gravadas por transação")
+    importar.set_defaults(funcao=comando_importar)
+    exportar = subcomandos.add_parser("exportar", help="exporta os concluídos do banco no formato do concluidos.csv")
+    exportar.add_argument("saida", help="arquivo .csv de destino")
+    exportar.add_argument("--inicio", type=data_br, help="data inicial (dd/mm/aaaa), padrão o primeiro concluído")
+    exportar.add_argument("--fim", type=data_br, help="data final (dd/mm/aaaa), padrão o último concluído")
+    exportar.add_argument("--tamanho-lote", type=int, default=concluidos_csv.TAMANHO_LOTE, help="linhas lidas do banco por vez")
+    exportar.set_defaults(funcao=comando_exportar)
+    arquivar = subcomandos.add_parser("arquivar", help="move os concluídos antigos do banco principal para o arquivo do histórico")
+    arquivar.add_argument("--meses", type=meses_retencao, default=motor.MESES_BANCO_PRINCIPAL,
+                          help=f"meses completos, além do atual, mantidos no banco principal (padrão {motor.MESES_BANCO_PRINCIPAL})")
+    arquivar.add_argument("--compactar", action="store_true", help="reescreve o banco principal (VACUUM) para devolver o espaço ao disco; feche os painéis antes")
+    arquivar.set_defaults(funcao=comando_arquivar)
+    return parser
+
+if __name__ == '__main__':
+    inicio = time.perf_counter()
+    args = criar_parser().parse_args()
+    print(motor.descrever_fonte_dados())
+    try:
+        args.funcao(args)
+    except Exception as e:
+        print(f"ERRO: {e}")
+        sys.exit(1)
+    print(f"INFO: Concluído em {time.perf_counter() - inicio:.3f}s.")
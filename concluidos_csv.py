@@ -0,0 +1,215 @@
+"""
+Importação e exportação em lote entre arquivos no formato do concluidos.csv e a tabela 'concluidos' do producao.db.
+O arquivo é separado por ';', com cabeçalho (data_conclusao;pedido_id;pv;qtd_maquinas;equipamento;servico) e datas
+'dd/mm/aaaa hh:mm'. Os dois sentidos trabalham em lotes, sem carregar o arquivo ou a tabela inteira na memória, e só
+usam a biblioteca padrão.
+
+A importação valida linha a linha e pula, com um relatório, o que não é um pedido (marcadores de conflito de merge,
+campos a mais, pedido vazio, data ou quantidade inválida). Cada lote é gravado numa transação: as linhas entram com
+origem = nome do arquivo, para que a sincronização com a planilha não as remova, e nunca sobrescrevem um pedido que
+veio da planilha.
+"""
+import os
+import re
+import csv
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from banco import (COLUNAS_CONCLUIDOS, conectar_banco, migrar_banco_de_dados, recalcular_producao_diaria_periodo, intervalo_dias,
+                   ler_corte_historico, anexar_historico, historico_anexado, arquivar_historico)
+
+SEPARADOR = ';'
+TAMANHO_LOTE = 50_000            # linhas por transação na importação e por leitura do cursor na exportação
+MAXIMO_EXEMPLOS = 20             # linhas ignoradas mostradas no relatório
+MARCADORES_CONFLITO = ('<<<<<<<', '=======', '>>>>>>>', '|||||||')
+COLUNAS_OBRIGATORIAS = ['data_conclusao', 'pedido_id']
+
+# 'dd/mm/aaaa', 'dd/mm/aaaa hh:mm' ou 'dd/mm/aaaa hh:mm:ss'; também aceita o formato do banco, 'aaaa-mm-dd hh:mm:ss'
+_DATA_BR = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+_DATA_ISO = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?)?')
+
+SQL_CRIAR_IMPORTACAO = '''
+    CREATE TEMP TABLE IF NOT EXISTS importacao_concluidos (
+        data_conclusao TEXT,
+        pedido_id TEXT PRIMARY KEY,
+        pv TEXT,
+        qtd_maquinas INTEGER,
+        equipamento TEXT,
+        servico TEXT
+    )
+'''
+
+def normalizar_data(texto):
+    """'dd/mm/aaaa hh:mm' (ou aaaa-mm-dd) em 'AAAA-MM-DD HH:MM:SS', o formato do banco; None se não for uma data válida."""
+    texto = texto.strip()
+    encontrado = _DATA_BR.fullmatch(texto)
+    if encontrado: dia, mes, ano, hora, minuto, segundo = encontrado.groups()
+    else:
+        encontrado = _DATA_ISO.fullmatch(texto)
+        if not encontrado: return None
+        ano, mes, dia, hora, minuto, segundo = encontrado.groups()
+    partes = (int(ano), int(mes), int(dia), int(hora or 0), int(minuto or 0), int(segundo or 0))
+    try:
+        datetime(*partes)  # só valida (31/02, 25:00...); a formatação à mão é bem mais rápida que strftime
+    except ValueError:
+        return None
+    return '%04d-%02d-%02d %02d:%02d:%02d' % partes
+
+@dataclass
+class RelatorioImportacao:
+    """Contagens de uma importação; 'ignoradas' é motivo -> linhas e 'exemplos' guarda (número da linha, motivo, texto)."""
+    arquivo: str
+    linhas_lidas: int = 0
+    linhas_validas: int = 0
+    novos: int = 0
+    atualizados: int = 0          # pedidos já importados antes (deste ou de outro arquivo), regravados
+    mantidos_planilha: int = 0    # pedidos que já vieram da planilha: o banco fica com a versão da planilha
+    repetidos: int = 0            # pedidos que aparecem de novo no mesmo lote; vale a última linha
+    lotes: int = 0
+    arquivados: int = 0           # pedidos anteriores ao corte do histórico, movidos ao fim para o arquivo do histórico
+    ignoradas: dict = field(default_factory=dict)
+    exemplos: list = field(default_factory=list)
+    duracao: float = 0.0
+
+    def ignorar(self, numero, motivo, linha):
+        self.ignoradas[motivo] = self.ignoradas.get(motivo, 0) + 1
+        if len(self.exemplos) < MAXIMO_EXEMPLOS: self.exemplos.append((numero, motivo, SEPARADOR.join(linha)[:80]))
+
+    def descrever(self):
+        linhas = [f"Importação de {self.arquivo}: {self.linhas_lidas} linha(s) lida(s) em {self.duracao:.2f}s, {self.linhas_validas} válida(s) em {self.lotes} lote(s).",
+                  f"  {self.novos} pedido(s) novo(s), {self.atualizados} atualizado(s), {self.mantidos_planilha} mantido(s) como estão na planilha, "
+                  f"{self.repetidos} repetido(s) no arquivo (vale a última linha)."]
+        if self.arquivados: linhas.append(f"  {self.arquivados} pedido(s) anteriores ao corte do histórico gravado(s) no arquivo do histórico.")
+        if self.ignoradas:
+            linhas.append(f"  {sum(self.ignoradas.values())} linha(s) ignorada(s): " + ', '.join(f"{motivo}: {total}" for motivo, total in self.ignoradas.items()))
+            linhas += [f"    linha {numero} ({motivo}): {texto}" for numero, motivo, texto in self.exemplos]
+        return '\n'.join(linhas)
+
+def detectar_codificacao(caminho):
+    """utf-8 (com ou sem BOM) quando o começo do arquivo é utf-8 válido; senão cp1252, o padrão do Excel no Windows."""
+    with open(caminho, 'rb') as arquivo:
+        amostra = arquivo.read(64 * 1024)
+    try:
+        amostra.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(amostra) - 3: return 'cp1252'  # um caractere cortado no fim da amostra não conta
+    return 'utf-8-sig'
+
+def ler_linhas_validas(caminho, relatorio, codificacao=None):
+    """Gera (linha do arquivo, tupla na ordem de COLUNAS_CONCLUIDOS) das linhas válidas, registrando as ignoradas no relatório."""
+    with open(caminho, newline='', encoding=codificacao or detectar_codificacao(caminho)) as arquivo:
+        leitor = csv.reader(arquivo, delimiter=SEPARADOR)
+        cabecalho = [nome.strip().lower() for nome in next(leitor, [])]
+        faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in cabecalho]
+        if faltando: raise ValueError(f"cabeçalho de {caminho} sem a(s) coluna(s) {', '.join(faltando)}: {SEPARADOR.join(cabecalho)}")
+        posicoes = [cabecalho.index(coluna) if coluna in cabecalho else None for coluna in COLUNAS_CONCLUIDOS]
+        i_data, i_pedido, i_pv, i_qtd, i_equipamento, i_servico = posicoes
+        texto = lambda linha, posicao: (linha[posicao].strip() or None) if posicao is not None else None
+        for linha in leitor:
+            if not any(campo.strip() for campo in linha): continue  # linhas em branco não contam
+            numero = leitor.line_num; relatorio.linhas_lidas += 1
+            if linha[0].startswith(MARCADORES_CONFLITO): relatorio.ignorar(numero, "marcador de conflito", linha); continue
+            if len(linha) > len(cabecalho): relatorio.ignorar(numero, "campos a mais", linha); continue
+            linha = linha + [''] * (len(cabecalho) - len(linha))
+            pedido = linha[i_pedido].strip()
+            if not pedido: relatorio.ignorar(numero, "pedido vazio", linha); continue
+            data = normalizar_data(linha[i_data])
+            if data is None: relatorio.ignorar(numero, "data inválida", linha); continue
+            qtd = linha[i_qtd].strip() if i_qtd is not None else ''
+            if qtd and not qtd.isdigit(): relatorio.ignorar(numero, "quantidade inválida", linha); continue
+            relatorio.linhas_validas += 1
+            yield numero, (data, pedido, texto(linha, i_pv), int(qtd or 0), texto(linha, i_equipamento), texto(linha, i_servico))
+
+def gravar_lote(conexao, lote, origem, relatorio, existentes=('main.concluidos',)):
+    """
+    Upsert de um lote numa única transação, com o resumo diário do período afetado recalculado numa só agregação.
+    Arquivos em ordem de data (como os exportados) afetam só alguns dias por lote. As contagens do relatório olham
+    as tabelas de concluídos em 'existentes' (o banco principal e, se anexado, o arquivo do histórico): um pedido já
+    arquivado não é novo, e o que veio da planilha continua valendo também lá.
+    """
+    existe = lambda filtro: ' OR '.join(f"EXISTS (SELECT 1 FROM {tabela} e WHERE e.pedido_id = i.pedido_id{filtro})" for tabela in existentes)
+    colunas = ', '.join(COLUNAS_CONCLUIDOS)
+    atualizacoes = ', '.join(f'{col} = excluded.{col}' for col in COLUNAS_CONCLUIDOS + ['origem'] if col != 'pedido_id')
+    with conexao:
+        conexao.execute("DELETE FROM importacao_concluidos")
+        conexao.executemany(f"INSERT OR REPLACE INTO importacao_concluidos ({colunas}) VALUES ({', '.join('?' * len(COLUNAS_CONCLUIDOS))})", lote)
+        distintos, novos, da_planilha = conexao.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(NOT ({existe('')})), 0), COALESCE(SUM({existe(' AND e.origem IS NULL')}), 0) "
+            f"FROM importacao_concluidos i").fetchone()
+        # Período do resumo que muda: das datas novas e das antigas das linhas importadas que são regravadas
+        primeiro_dia, ultimo_dia = conexao.execute(
+            "SELECT MIN(dia), MAX(dia) FROM (SELECT substr(i.data_conclusao, 1, 10) AS dia FROM importacao_concluidos i "
+            "LEFT JOIN concluidos c ON c.pedido_id = i.pedido_id WHERE c.pedido_id IS NULL OR c.origem IS NOT NULL "
+            "UNION ALL SELECT substr(c.data_conclusao, 1, 10) FROM importacao_concluidos i JOIN concluidos c ON c.pedido_id = i.pedido_id "
+            "WHERE c.origem IS NOT NULL AND c.data_conclusao IS NOT NULL)").fetchone()
+        conexao.execute(f"INSERT INTO concluidos ({colunas}, origem) SELECT {colunas}, ? FROM importacao_concluidos WHERE true "
+                        f"ON CONFLICT(pedido_id) DO UPDATE SET {atualizacoes} WHERE concluidos.origem IS NOT NULL", (origem,))
+        if primeiro_dia is not None: recalcular_producao_diaria_periodo(conexao, primeiro_dia, ultimo_dia)
+    relatorio.lotes += 1; relatorio.repetidos += len(lote) - distintos
+    relatorio.novos += novos; relatorio.mantidos_planilha += da_planilha; relatorio.atualizados += distintos - novos - da_planilha
+
+def importar_concluidos(caminho_csv, caminho_banco, tamanho_lote=TAMANHO_LOTE, codificacao=None):
+    """
+    Importa o arquivo para a tabela 'concluidos' em lotes de tamanho_lote linhas; devolve o RelatorioImportacao.
+    As linhas anteriores ao corte do histórico são movidas no fim para o arquivo do histórico (banco.arquivar_historico).
+    """
+    inicio = time.perf_counter()
+    origem = os.path.basename(caminho_csv)
+    relatorio = RelatorioImportacao(origem)
+    conexao = conectar_banco(caminho_banco)
+    try:
+        migrar_banco_de_dados(conexao)
+        conexao.execute(SQL_CRIAR_IMPORTACAO)
+        # Pedidos já arquivados contam como existentes: sem isso o relatório os daria como novos
+        anexar_historico(conexao, caminho_banco)
+        existentes = ['main.concluidos'] + (['arquivo.concluidos'] if historico_anexado(conexao) else [])
+        lote = []
+        for _, valores in ler_linhas_validas(caminho_csv, relatorio, codificacao):
+            lote.append(valores)
+            if len(lote) >= tamanho_lote:
+                gravar_lote(conexao, lote, origem, relatorio, existentes); lote = []
+                print(f"INFO: {relatorio.linhas_validas} linha(s) importada(s)...")
+        if lote: gravar_lote(conexao, lote, origem, relatorio, existentes)
+        corte = ler_corte_historico(conexao)
+    finally:
+        conexao.close()
+    # Linhas anteriores ao corte pertencem ao histórico arquivado: vão para lá já nesta importação
+    if corte is not None: relatorio.arquivados = arquivar_historico(caminho_banco, date.fromisoformat(corte))
+    relatorio.duracao = time.perf_counter() - inicio
+    return relatorio
+
+def formatar_data_br(texto):
+    """'AAAA-MM-DD HH:MM:SS' do banco em 'dd/mm/aaaa hh:mm', como no concluidos.csv; datas fora do padrão saem como estão."""
+    if texto is None: return ''
+    if len(texto) >= 16 and texto[4] == '-' and texto[7] == '-': return f"{texto[8:10]}/{texto[5:7]}/{texto[0:4]} {texto[11:16]}"
+    return texto
+
+def exportar_concluidos(caminho_banco, caminho_csv, data_inicial=None, data_final=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Exporta os concluídos entre data_inicial e data_final (inclusive; None = sem limite), incluindo o histórico arquivado,
+    para um arquivo no formato do concluidos.csv, lendo o cursor em lotes. O arquivo é escrito num temporário e renomeado
+    no fim. Devolve o número de linhas.
+    """
+    inicio_periodo = intervalo_dias(data_inicial, data_inicial)[0] if data_inicial else None
+    fim_periodo = intervalo_dias(data_final, data_final)[1] if data_final else None
+    filtros = [filtro for filtro, valor in (("data_conclusao >= ?", inicio_periodo), ("data_conclusao < ?", fim_periodo)) if valor]
+    sql = f"SELECT {', '.join(COLUNAS_CONCLUIDOS)} FROM todos_concluidos" + (f" WHERE {' AND '.join(filtros)}" if filtros else "") + " ORDER BY data_conclusao, pedido_id"
+    temporario = f"{caminho_csv}.{os.getpid()}.tmp"
+    conexao = conectar_banco(caminho_banco); total = 0
+    try:
+        anexar_historico(conexao, caminho_banco)
+        cursor = conexao.execute(sql, [valor for valor in (inicio_periodo, fim_periodo) if valor])
+        with open(temporario, 'w', newline='', encoding='utf-8-sig') as arquivo:
+            escritor = csv.writer(arquivo, delimiter=SEPARADOR, lineterminator='\n')
+            escritor.writerow(COLUNAS_CONCLUIDOS)
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas: break
+                escritor.writerows((formatar_data_br(data), *resto) for data, *resto in linhas)
+                total += len(linhas)
+        os.replace(temporario, caminho_csv)
+    finally:
+        conexao.close()
+        if os.path.exists(temporario): os.remove(temporario)
+    return total
@@ -0,0 +1,123 @@
+"""
+Gerador de dados sintéticos da produção: planilha de status (.xlsm) e banco producao.db com a mesma estrutura
+dos arquivos reais, de 1 mil a 1 milhão de pedidos. Usado pelo benchmark.py e em testes sem os dados da fábrica.
+
+Uso: python dados_sinteticos.py <quantidade_de_pedidos> <pasta_de_saida> [--semente N]
+"""
+import os
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from planilha import (COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO,
+                      STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_CONCLUIDO, STATUS_CANCELADO, STATUS_URGENTE)
+from banco import COLUNAS_CONCLUIDOS, RESUMOS_DIARIOS, conectar_banco, inicializar_banco, sql_inserir_resumo
+
+# Mesma ordem de colunas da planilha real
+COLUNAS_PLANILHA_REAL = [COLUNA_PEDIDO_ID, COLUNA_EQUIPAMENTO, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD]
+
+EQUIPAMENTOS = [
+    "Computador Teravix i5-12400 8Gb Ssd 512Gb W11P DTM12T510", "Computador Teravix i5-12400 2x8Gb Ssd 512Gb Linux DTM12T510",
+    "Computador Teravix i3-10105 8Gb Ssd 256Gb W11P DTM12T410", "Computador Teravix R7 5700G 16Gb Ssd 500Gb Linux DTM12A710",
+    "Notebook 14 Lenovo E14 R5 Pro 7535U 8Gb Ssd 512Gb W11P 21M4S5CD00__K", "Notebook Acer Aspire 5 15.6 i7-12650H 2x4Gb Ssd 512Gb W11P 1Ab_K",
+    "Notebook 15.6 Lenovo V15 G3 i5-1235U 8Gb Ssd 512Gb W11P 1Aos 82UM_K",
+]
+SERVICOS = ["montagem, win11pro", "montagem, win11pro, 1 sdd 256, intel i5", "montagem, linux", "formatação, win11pro"]
+
+# Metade dos pedidos mais recentes da planilha ainda está em aberto; os antigos já foram concluídos ou cancelados
+STATUS_EM_ABERTO = [STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_URGENTE]
+PESOS_EM_ABERTO = [0.25, 0.2, 0.35, 0.15, 0.05]
+PROPORCAO_EM_ABERTO = 0.03
+DIAS_DE_HISTORICO = 400
+
+def gerar_pedidos(quantidade, semente=0, agora=None):
+    """DataFrame de pedidos com as colunas, status e padrões de identificação ('CV-', 'TERAVIX (n)') da planilha real."""
+    rng = np.random.default_rng(semente)
+    agora = agora or datetime.now().replace(microsecond=0)
+    indices = np.arange(quantidade)
+
+    # Datas crescentes ao longo do histórico, em horário de expediente
+    dias_atras = (quantidade - 1 - indices) * DIAS_DE_HISTORICO / max(quantidade, 1)
+    datas = (pd.Timestamp(agora).normalize() - pd.to_timedelta(np.floor(dias_atras), unit='D')
+             + pd.to_timedelta(rng.integers(8 * 3600, 18 * 3600, quantidade), unit='s'))
+    datas = datas.where(datas <= pd.Timestamp(agora), pd.Timestamp(agora))
+
+    em_aberto = (indices >= quantidade * (1 - PROPORCAO_EM_ABERTO)) & (rng.random(quantidade) < 0.5)
+    status = np.where(rng.random(quantidade) < 0.95, STATUS_CONCLUIDO, STATUS_CANCELADO).astype(object)
+    status[em_aberto] = rng.choice(STATUS_EM_ABERTO, em_aberto.sum(), p=PESOS_EM_ABERTO)
+
+    # PV: 'TERAVIX (n)' para as OPs, às vezes só 'TERAVIX'; número (célula numérica) ou faixa de números para as PVs; às vezes vazio
+    sorteio = rng.random(quantidade)
+    numeros = 120000 + indices
+    pv = np.array([f"TERAVIX ({1000 + i})" if s < 0.38 else int(n) for i, s, n in zip(indices, sorteio, numeros)], dtype=object)
+    pv[(sorteio >= 0.38) & (sorteio < 0.42)] = "TERAVIX"
+    faixa = (sorteio >= 0.42) & (sorteio < 0.52)
+    pv[faixa] = [f"{n} -{n + k}" for n, k in zip(numeros[faixa], rng.integers(1, 8, faixa.sum()))]
+    pv[sorteio >= 0.99] = None
+
+    pedidos = np.array([f"CV-{120000 + i:010d}" for i in indices], dtype=object)
+    outros = rng.random(quantidade) < 0.02  # algumas linhas que não são pedidos 'CV-'
+    pedidos[outros] = [f"OS-{i:07d}" for i in indices[outros]]
+
+    servico = rng.choice(SERVICOS, quantidade).astype(object)
+    servico[rng.random(quantidade) < 0.6] = None
+    qtd = np.where(rng.random(quantidade) < 0.97, rng.integers(1, 41, quantidade), rng.integers(41, 400, quantidade))
+
+    return pd.DataFrame({
+        COLUNA_PEDIDO_ID: pedidos, COLUNA_EQUIPAMENTO: rng.choice(EQUIPAMENTOS, quantidade), COLUNA_PV: pv,
+        COLUNA_SERVICO: servico, COLUNA_STATUS: status, COLUNA_DATA_STATUS: datas.to_numpy(), COLUNA_QTD: qtd,
+    })[COLUNAS_PLANILHA_REAL]
+
+def gravar_planilha(df, caminho):
+    """Grava a planilha de status em modo write_only do openpyxl, com a aba e o formato de data da planilha real."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    aba = workbook.create_sheet("Status_dos_pedidos")
+    aba.append(COLUNAS_PLANILHA_REAL)
+    posicao_data = COLUNAS_PLANILHA_REAL.index(COLUNA_DATA_STATUS)
+    for linha in df.itertuples(index=False, name=None):
+        linha = [None if isinstance(valor, float) and np.isnan(valor) else valor for valor in linha]
+        celula = WriteOnlyCell(aba, value=linha[posicao_data].to_pydatetime()); celula.number_format = 'dd/mm/yyyy hh:mm'
+        linha[posicao_data] = celula
+        aba.append(linha)
+    workbook.save(caminho)
+
+def gravar_banco(df, caminho):
+    """Cria o producao.db com os pedidos concluídos de df e os resumos diários correspondentes."""
+    if os.path.exists(caminho): os.remove(caminho)
+    inicializar_banco(caminho)
+    concluidos = df[df[COLUNA_STATUS] == STATUS_CONCLUIDO].drop_duplicates(COLUNA_PEDIDO_ID)
+    linhas = pd.DataFrame({
+        'data_conclusao': pd.to_datetime(concluidos[COLUNA_DATA_STATUS]).dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'pedido_id': concluidos[COLUNA_PEDIDO_ID], 'pv': concluidos[COLUNA_PV].map(lambda v: None if v is None else str(v)), 'qtd_maquinas': concluidos[COLUNA_QTD].astype('int64'),
+        'equipamento': concluidos[COLUNA_EQUIPAMENTO], 'servico': concluidos[COLUNA_SERVICO],
+    })[COLUNAS_CONCLUIDOS].astype(object).where(lambda d: d.notna(), None)
+    conexao = conectar_banco(caminho)
+    with conexao:
+        conexao.executemany(f"INSERT INTO concluidos ({', '.join(COLUNAS_CONCLUIDOS)}) VALUES ({', '.join('?' * len(COLUNAS_CONCLUIDOS))})",
+                            linhas.itertuples(index=False, name=None))
+        for tabela in RESUMOS_DIARIOS: conexao.execute(sql_inserir_resumo(tabela, "data_conclusao IS NOT NULL"))
+    conexao.close()
+
+def gerar_fixtures(quantidade, pasta, semente=0, agora=None):
+    """Gera Status_dos_pedidos.xlsm e producao.db em pasta; devolve os dois caminhos."""
+    os.makedirs(pasta, exist_ok=True)
+    caminho_planilha = os.path.join(pasta, "Status_dos_pedidos.xlsm"); caminho_banco = os.path.join(pasta, "producao.db")
+    df = gerar_pedidos(quantidade, semente, agora)
+    gravar_planilha(df, caminho_planilha)
+    gravar_banco(df, caminho_banco)
+    return caminho_planilha, caminho_banco
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera planilha de status e banco de produção sintéticos.")
+    parser.add_argument("quantidade", type=int, help="número de pedidos (ex.: 1000 a 1000000)")
+    parser.add_argument("pasta", help="pasta de saída")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+    inicio = time.perf_counter()
+    caminhos = gerar_fixtures(args.quantidade, args.pasta, args.semente)
+    print(f"INFO: {args.quantidade} pedidos gerados em {time.perf_counter() - inicio:.1f}s: {', '.join(caminhos)}")
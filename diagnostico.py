@@ -0,0 +1,122 @@
+"""
+Registro estruturado das atualizações do painel (tempo de cada etapa e contagens de linhas de cada atualização, e o tempo
+até o primeiro quadro de cada inicialização), gravado em um log JSONL com rotação por tamanho e mantido em memória para o
+overlay de diagnóstico (F12).
+"""
+import os
+import json
+import math
+from collections import deque
+from datetime import datetime
+
+TAMANHO_MAXIMO_LOG = 1024 * 1024  # bytes por arquivo antes de rotacionar
+ARQUIVOS_ANTIGOS_LOG = 3          # atualizacoes.jsonl.1 ... .3
+HISTORICO_OVERLAY = 20            # atualizações mostradas no overlay
+
+# Etapas na ordem em que acontecem, com o rótulo curto usado no overlay; 'recebimento' só existe no modo cliente
+ETAPAS = {'leitura': 'leit', 'sincronizacao': 'sinc', 'analise': 'anál', 'calculo': 'calc', 'recebimento': 'rec', 'desenho': 'des'}
+
+def percentil(valores, fracao):
+    """Percentil por interpolação linear, como numpy.percentile; None para uma lista vazia."""
+    valores = sorted(valores)
+    if not valores: return None
+    posicao = (len(valores) - 1) * fracao
+    abaixo, acima = math.floor(posicao), math.ceil(posicao)
+    return valores[abaixo] + (valores[acima] - valores[abaixo]) * (posicao - abaixo)
+
+class RegistroAtualizacoes:
+    """
+    Grava uma linha JSON por atualização (concluída, ignorada ou com falha) e guarda as últimas em memória.
+    Com caminho None o registro fica só em memória.
+    """
+    def __init__(self, caminho, tamanho_maximo=TAMANHO_MAXIMO_LOG, arquivos_antigos=ARQUIVOS_ANTIGOS_LOG, capacidade=HISTORICO_OVERLAY):
+        self.caminho = caminho; self.tamanho_maximo = tamanho_maximo; self.arquivos_antigos = arquivos_antigos
+        self.recentes = deque(self.ler_recentes(capacidade), maxlen=capacidade)
+
+    def ler_recentes(self, quantidade):
+        """Últimos registros do log atual, para o overlay já abrir com o histórico da execução anterior."""
+        if self.caminho is None: return []
+        try:
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                linhas = deque(arquivo, maxlen=quantidade)
+        except OSError:
+            return []
+        registros = []
+        for linha in linhas:
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                continue  # linha cortada por um encerramento no meio da gravação
+        return registros
+
+    def registrar(self, resultado, tempos=None, contagens=None, erro=None):
+        """Registra uma atualização; resultado é 'concluida', 'ignorada' ou 'falhou'. Devolve o registro gravado."""
+        tempos = {etapa: round(valor, 4) for etapa, valor in (tempos or {}).items()}
+        registro = {'momento': datetime.now().isoformat(timespec='milliseconds'), 'resultado': resultado,
+                    'total': round(sum(tempos.values()), 4), 'tempos': tempos, 'contagens': contagens or {}}
+        if erro: registro['erro'] = erro
+        self.recentes.append(registro)
+        self.gravar(json.dumps(registro, ensure_ascii=False))
+        return registro
+
+    def registrar_inicializacao(self, primeiro_quadro, primeiro_modelo_atual=None, modelo_salvo=None):
+        """
+        Registra o tempo desde o início do processo até o primeiro quadro na tela e até o primeiro modelo atualizado
+        (None se a primeira atualização falhou); modelo_salvo é o horário do modelo desatualizado mostrado na abertura.
+        """
+        registro = {'momento': datetime.now().isoformat(timespec='milliseconds'), 'resultado': 'inicializacao',
+                    'primeiro_quadro': round(primeiro_quadro, 4),
+                    'primeiro_modelo_atual': None if primeiro_modelo_atual is None else round(primeiro_modelo_atual, 4),
+                    'modelo_salvo': None if modelo_salvo is None else modelo_salvo.isoformat(timespec='seconds')}
+        self.recentes.append(registro)
+        self.gravar(json.dumps(registro, ensure_ascii=False))
+        return registro
+
+    def gravar(self, linha):
+        if self.caminho is None: return
+        try:
+            if os.path.exists(self.caminho) and os.path.getsize(self.caminho) + len(linha) >= self.tamanho_maximo: self.rotacionar()
+            with open(self.caminho, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(linha + '\n')
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o log de atualizações: {e}")
+
+    def rotacionar(self):
+        """atualizacoes.jsonl vira .1, .1 vira .2 e assim por diante; o mais antigo é descartado."""
+        for numero in range(self.arquivos_antigos, 0, -1):
+            origem = self.caminho if numero == 1 else f"{self.caminho}.{numero - 1}"
+            if os.path.exists(origem): os.replace(origem, f"{self.caminho}.{numero}")
+
+    def percentis(self, fracao=0.95):
+        """Percentil do total e de cada etapa sobre as atualizações concluídas em memória."""
+        concluidas = [r for r in self.recentes if r['resultado'] == 'concluida']
+        resultado = {'total': percentil([r['total'] for r in concluidas], fracao)}
+        for etapa in ETAPAS: resultado[etapa] = percentil([r['tempos'][etapa] for r in concluidas if etapa in r['tempos']], fracao)
+        return resultado
+
+    def texto_overlay(self):
+        """Tabela em texto simples das últimas atualizações, da mais recente para a mais antiga, com p50 e p95 no fim."""
+        cabecalho = f"{'hora':<9}{'total':>7}" + ''.join(f"{rotulo:>7}" for rotulo in ETAPAS.values()) + "  linhas"
+        linhas = [f"Últimas {len(self.recentes)} atualizações (s)", cabecalho]
+        for registro in reversed(self.recentes):
+            hora = registro['momento'][11:19]
+            if registro['resultado'] == 'inicializacao':
+                atual = registro['primeiro_modelo_atual']
+                linhas.append(f"{hora:<9}{'-':>7}  início: 1º quadro {registro['primeiro_quadro']:.3f}s" +
+                              (" (modelo salvo)" if registro['modelo_salvo'] else "") + (f", dados atuais {atual:.3f}s" if atual is not None else ""))
+                continue
+            if registro['resultado'] != 'concluida':
+                linhas.append(f"{hora:<9}{'-':>7}  {registro['resultado']}" + (f": {registro['erro'][:40]}" if registro.get('erro') else ""))
+                continue
+            tempos = ''.join(f"{registro['tempos'][etapa]:>7.3f}" if etapa in registro['tempos'] else f"{'-':>7}" for etapa in ETAPAS)
+            contagens = registro['contagens']
+            linhas.append(f"{hora:<9}{registro['total']:>7.3f}{tempos}  {contagens.get('linhas_planilha', '-')}/{contagens.get('linhas_alteradas', '-')}")
+        for fracao in (0.5, 0.95):
+            valores = self.percentis(fracao)
+            if valores['total'] is None: break
+            linhas.append(f"{'p' + str(round(fracao * 100)):<9}{valores['total']:>7.3f}" +
+                          ''.join(f"{valores[etapa]:>7.3f}" if valores[etapa] is not None else f"{'-':>7}" for etapa in ETAPAS))
+        linhas.append("linhas = lidas da planilha / alteradas desde a última leitura")
+        memoria = next((r['contagens']['memoria_snapshot'] for r in reversed(self.recentes) if 'memoria_snapshot' in r.get('contagens', {})), None)
+        if memoria is not None: linhas.append(f"memória do último snapshot: {memoria / 2**20:.1f} MB")
+        return '\n'.join(linhas)
@@ -0,0 +1,834 @@
+"""
+Motor de dados da produção, sem dependência de Qt: leitura da planilha, sincronização do banco, métricas do dashboard,
+modelo de visão do painel e consultas dos relatórios. Usado pelo painel (prioridades.py), pelo gerador de relatórios
+(relatorios.py), pela linha de comando (cli.py) e pelo benchmark.
+
+pandas e numpy só são importados dentro das funções que os usam, para que importar este módulo seja instantâneo
+e o primeiro quadro das interfaces não espere por eles.
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from datetime import date, datetime, timedelta
+
+from planilha import (COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO,
+                      STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_CONCLUIDO, STATUS_CANCELADO, STATUS_URGENTE,
+                      COLUNA_DATA_HORA, COLUNA_DIA, COLUNA_IS_TERAVIX, impressao_arquivo, hash_arquivo, carregar_planilha, separar_pedidos_painel, memoria_quadro)
+from banco import (COLUNAS_CONCLUIDOS, conectar_banco, ultimo_evento_status, ler_status_atual, registrar_eventos_status, inicializar_banco, migrar_banco_de_dados, atualizar_producao_diaria, ler_producao_diaria,
+                   ler_producao_diaria_periodo, intervalo_dias, resumir_periodo, ler_corte_historico, anexar_historico, arquivar_historico,
+                   compactar_banco, caminho_historico, historico_anexado)
+
+import analise
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# --- CONFIGURAÇÃO GERAL ---
+META_SEMANAL = 500
+FRASES_MOTIVACIONAIS = [
+    "A qualidade do nosso trabalho hoje é a garantia do nosso sucesso amanhã.", "O único lugar onde o sucesso vem antes do trabalho é no dicionário.",
+    "Grandes coisas em negócios nunca são feitas por uma pessoa. São feitas por uma equipe.", "A persistência realiza o impossível.",
+    "Foco, força e fé: os três pilares para um dia produtivo.", "A perfeição não é alcançável, mas se buscarmos a perfeição, podemos alcançar a excelência.",
+    "O talento vence jogos, mas o trabalho em equipe ganha campeonatos.", "Não observe o relógio; faça o que ele faz. Continue em frente.",
+    "A disciplina é a ponte entre metas e realizações.", "Sua dedicação de hoje está construindo a reputação de amanhã."
+]
+
+FRASE_DO_DIA_ATUAL = ""; ULTIMO_DIA_FRASE = None
+
+# --- CONFIGURAÇÃO DE FONTE DE DADOS ---
+# Mude para True para usar o link online ou False para usar o arquivo local.
+USAR_LINK_ONLINE = False  # Mude para True para usar o link abaixo
+
+# Cole aqui o link de compartilhamento direto para o download do arquivo Excel.
+# Exemplo (Google Sheets): Use "Arquivo > Fazer download > Microsoft Excel (.xlsx)" e copie o link.
+# Exemplo (SharePoint/OneDrive): Use a opção "Compartilhar" e crie um link que permita o acesso.
+LINK_PLANILHA_ONLINE = "COLE_SEU_LINK_DIRETO_AQUI"
+
+# --- Lógica para definir o caminho dos arquivos ---
+if getattr(sys, 'frozen', False):
+    script_dir = os.path.dirname(sys.executable)
+else:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+CAMINHO_PASTA_DADOS = os.path.join(script_dir, "dados")
+
+# No modo online, a planilha do link é baixada para uma cópia local em dados/ e lida dali, como no modo local
+NOME_ARQUIVO_STATUS = "Status_dos_pedidos_online.xlsm" if USAR_LINK_ONLINE else "Status_dos_pedidos.xlsm"
+CAMINHO_PLANILHA_STATUS = os.path.join(CAMINHO_PASTA_DADOS, NOME_ARQUIVO_STATUS)
+
+NOME_ARQUIVO_BANCO_DE_DADOS = "producao.db"
+CAMINHO_BANCO_DE_DADOS = os.path.join(CAMINHO_PASTA_DADOS, NOME_ARQUIVO_BANCO_DE_DADOS)
+
+# Tempos e contagens de cada atualização do painel (diagnostico.py), com rotação por tamanho
+CAMINHO_LOG_ATUALIZACOES = os.path.join(CAMINHO_PASTA_DADOS, "atualizacoes.jsonl")
+
+# Meses completos, além do atual, mantidos no banco principal; os concluídos mais antigos vão para o arquivo do histórico
+# (producao_historico.db), lido só pelos relatórios. O painel usa o mês atual e o anterior.
+MESES_BANCO_PRINCIPAL = 3
+
+# Último modelo de visão calculado, para o painel abrir já desenhado (marcado como desatualizado) enquanto a primeira leitura roda
+CAMINHO_ULTIMO_MODELO = os.path.join(CAMINHO_PASTA_DADOS, "ultimo_modelo.json.z")
+
+def descrever_fonte_dados():
+    """Mensagem exibida pelos programas ao iniciar, indicando de onde a planilha é lida."""
+    return "INFO: Usando planilha online do link." if USAR_LINK_ONLINE else f"INFO: Usando planilha local: {CAMINHO_PLANILHA_STATUS}"
+
+def inicializar_banco_de_dados():
+    """Cria a pasta de dados e o banco, se necessário, e aplica as migrações pendentes."""
+    os.makedirs(CAMINHO_PASTA_DADOS, exist_ok=True)
+    print(f"Verificando/Criando banco de dados em: {CAMINHO_BANCO_DE_DADOS}")
+    inicializar_banco(CAMINHO_BANCO_DE_DADOS)
+    print(f"Banco de dados '{NOME_ARQUIVO_BANCO_DE_DADOS}' inicializado com sucesso.")
+
+_baixador_online = None
+
+def atualizar_copia_online():
+    """
+    No modo online, baixa a planilha do link para CAMINHO_PLANILHA_STATUS apenas se ela mudou (ETag/Last-Modified e hash).
+    Devolve o ResultadoDownload, ou None no modo local.
+    """
+    global _baixador_online
+    if not USAR_LINK_ONLINE: return None
+    from baixador import BaixadorPlanilha
+    if _baixador_online is None or _baixador_online.destino != CAMINHO_PLANILHA_STATUS:
+        _baixador_online = BaixadorPlanilha(LINK_PLANILHA_ONLINE, CAMINHO_PLANILHA_STATUS)
+    try:
+        resultado = _baixador_online.baixar()
+    except Exception as e:
+        raise Exception(f"Não foi possível baixar a planilha do link. Verifique o link e a conexão.\nErro: {e}")
+    print(f"INFO: {resultado.descrever()} ({_baixador_online.resumo()}).")
+    return resultado
+
+# --- LÓGICA DE DADOS ---
+@dataclass(frozen=True)
+class SnapshotPlanilha:
+    """Resultado imutável de uma única leitura da planilha, compartilhado por toda a atualização."""
+    df_bruto: 'pd.DataFrame'  # Planilha completa com datas, status e quantidades já tipados, usada na sincronização
+    df: 'pd.DataFrame'        # Pedidos 'CV-' com valores padrão preenchidos, usado no painel e nas métricas
+    lido_em: datetime
+    tempo_leitura: float
+    memoria: dict = None      # bytes ocupados por df_bruto ('planilha') e df ('painel')
+
+def ler_snapshot_planilha(hash_conteudo=None):
+    """Lê a planilha de status uma única vez e prepara o snapshot usado por sincronização, painel e métricas."""
+    print(f"Carregando dados de: {CAMINHO_PLANILHA_STATUS}")
+    inicio = time.perf_counter()
+    try:
+        # Usa o cache em dados/ quando a planilha não mudou desde a última leitura
+        df_bruto, _ = carregar_planilha(CAMINHO_PLANILHA_STATUS, hash_conteudo)
+    except Exception as e:
+        raise Exception(f"Não foi possível carregar a planilha. Verifique o caminho ou o link.\nErro: {e}")
+
+    df = separar_pedidos_painel(df_bruto)
+    # Acompanhado a cada leitura, para que o consumo do painel continue estável com o crescimento da planilha
+    memoria = {'planilha': memoria_quadro(df_bruto), 'painel': memoria_quadro(df)}
+    print(f"INFO: Snapshot em memória: {memoria['planilha'] / 2**20:.1f} MB da planilha ({len(df_bruto)} linhas) e "
+          f"{memoria['painel'] / 2**20:.1f} MB dos pedidos do painel ({len(df)} linhas).")
+
+    return SnapshotPlanilha(df_bruto=df_bruto, df=df, lido_em=datetime.now(), tempo_leitura=time.perf_counter() - inicio, memoria=memoria)
+
+# --- CONTADORES INCREMENTAIS ---
+class ContadoresProducao:
+    """
+    Totais de concluídos e cancelados por dia (pedidos e máquinas, TERAVIX e PV), mantidos por deltas: a cada snapshot,
+    só as linhas que mudaram (status, dia, tipo ou quantidade) ou foram acrescentadas no fim da planilha subtraem a
+    contribuição antiga e somam a nova. Se linhas foram apagadas ou reordenadas, os contadores são recontados do zero.
+    Os totais são guardados por dia, então a virada do dia e do mês à meia-noite é só uma consulta com a nova data.
+    """
+    STATUS_CONTADOS = [STATUS_CONCLUIDO, STATUS_CANCELADO]  # código 1 e 2; 0 = linha que não conta
+
+    def __init__(self):
+        self.linhas = None  # colunas do último snapshot: pedido, codigo, dia (ns), teravix, qtd
+        self.por_dia = {}   # (status, dia) -> [pedidos_teravix, qtd_teravix, pedidos_pv, qtd_pv]
+        self.ultimo_snapshot = None
+        self.linhas_alteradas = 0; self.recontagens = 0
+
+    @staticmethod
+    def colunas_snapshot(df):
+        import numpy as np
+        dia = df[COLUNA_DIA].to_numpy(dtype='datetime64[ns]')
+        codigo = np.zeros(len(df), dtype=np.int8)
+        for numero, status in enumerate(ContadoresProducao.STATUS_CONTADOS, start=1): codigo[(df[COLUNA_STATUS] == status).to_numpy()] = numero
+        codigo[np.isnat(dia)] = 0
+        return {'pedido': df[COLUNA_PEDIDO_ID].to_numpy(dtype=object), 'codigo': codigo, 'dia': dia.view('int64'),
+                'teravix': df[COLUNA_IS_TERAVIX].to_numpy(dtype=bool), 'qtd': df[COLUNA_QTD].to_numpy(dtype='int64')}
+
+    def aplicar_snapshot(self, snapshot):
+        """Incorpora o snapshot aplicando só os deltas das linhas alteradas; devolve quantas linhas mudaram."""
+        import numpy as np
+        if snapshot is self.ultimo_snapshot: return 0
+        novas = self.colunas_snapshot(snapshot.df)
+        antigas = self.linhas
+        tamanho = 0 if antigas is None else len(antigas['pedido'])
+        if antigas is not None and len(novas['pedido']) >= tamanho and np.array_equal(novas['pedido'][:tamanho], antigas['pedido']):
+            # Mesmos pedidos nas mesmas posições: compara as colunas e soma as linhas novas do fim
+            mudou = np.zeros(tamanho, dtype=bool)
+            for coluna in ('codigo', 'dia', 'teravix', 'qtd'): mudou |= novas[coluna][:tamanho] != antigas[coluna]
+            posicoes = np.flatnonzero(mudou)
+            self.aplicar_deltas(antigas, posicoes, -1)
+            self.aplicar_deltas(novas, np.concatenate([posicoes, np.arange(tamanho, len(novas['pedido']))]), 1)
+            self.linhas_alteradas = len(posicoes) + len(novas['pedido']) - tamanho
+        else:
+            self.por_dia = {}; self.recontagens += 1
+            self.aplicar_deltas(novas, np.arange(len(novas['pedido'])), 1)
+            self.linhas_alteradas = len(novas['pedido'])
+        self.linhas = novas; self.ultimo_snapshot = snapshot
+        return self.linhas_alteradas
+
+    def aplicar_deltas(self, linhas, posicoes, sinal):
+        import numpy as np
+        import pandas as pd
+        codigo = linhas['codigo'][posicoes]
+        posicoes = posicoes[codigo > 0]
+        if len(posicoes) == 0: return
+        teravix = linhas['teravix'][posicoes]; qtd = linhas['qtd'][posicoes]
+        deltas = pd.DataFrame({'pedidos_teravix': teravix.astype('int64'), 'qtd_teravix': np.where(teravix, qtd, 0),
+                               'pedidos_pv': (~teravix).astype('int64'), 'qtd_pv': np.where(teravix, 0, qtd)})
+        deltas = deltas.groupby([linhas['codigo'][posicoes], linhas['dia'][posicoes]]).sum()
+        for (codigo, dia), valores in zip(deltas.index, deltas.to_numpy() * sinal):
+            chave = (self.STATUS_CONTADOS[codigo - 1], pd.Timestamp(dia))
+            totais = self.por_dia.get(chave)
+            totais = valores if totais is None else totais + valores
+            if totais.any(): self.por_dia[chave] = totais
+            else: self.por_dia.pop(chave, None)
+
+    def totais_dia(self, status, dia):
+        """(teravix, pv, total, teravix_qtd, pv_qtd, total_qtd) do status no dia, como em carregar_dados."""
+        pedidos_teravix, qtd_teravix, pedidos_pv, qtd_pv = (int(v) for v in self.por_dia.get((status, dia), (0, 0, 0, 0)))
+        return pedidos_teravix, pedidos_pv, pedidos_teravix + pedidos_pv, qtd_teravix, qtd_pv, qtd_teravix + qtd_pv
+
+    def producao_diaria(self, dia_inicial):
+        """Resumo diário dos concluídos a partir de dia_inicial, no formato de carregar_producao_diaria."""
+        import pandas as pd
+        dia_inicial = pd.Timestamp(dia_inicial)
+        dias = sorted(dia for status, dia in self.por_dia if status == STATUS_CONCLUIDO and dia >= dia_inicial)
+        return pd.DataFrame([self.por_dia[(STATUS_CONCLUIDO, dia)] for dia in dias], columns=COLUNAS_PRODUCAO_DIARIA, dtype='int64',
+                            index=pd.DatetimeIndex(dias, name='dia'))
+
+# Contadores do processo: todas as atualizações passam por aqui, então cada uma só paga pelas linhas que mudaram
+contadores_producao = ContadoresProducao()
+
+def carregar_dados(snapshot):
+    import pandas as pd
+    df = snapshot.df
+    contadores_producao.aplicar_snapshot(snapshot)
+
+    df_principal = df[~df[COLUNA_STATUS].isin([STATUS_CONCLUIDO, STATUS_CANCELADO])].copy()
+    hoje = pd.Timestamp(datetime.now().date())
+    do_dia = df[COLUNA_DIA] == hoje
+    df_concluidos_hoje = df[(df[COLUNA_STATUS] == STATUS_CONCLUIDO) & do_dia].sort_values(by=COLUNA_DATA_HORA, ascending=False)
+    df_cancelados_hoje = df[(df[COLUNA_STATUS] == STATUS_CANCELADO) & do_dia].sort_values(by=COLUNA_DATA_HORA, ascending=False)
+
+    if not df_principal.empty:
+        df_principal['is_urgent'] = df_principal[COLUNA_STATUS].str.strip().str.lower() == STATUS_URGENTE.lower()
+        df_principal.reset_index(inplace=True)
+        df_principal.sort_values(by=['is_urgent', 'index'], ascending=[False, True], inplace=True)
+        df_principal.reset_index(drop=True, inplace=True)
+        df_principal['Prioridade'] = df_principal.index + 1
+
+    # Totais do dia vêm dos contadores incrementais, sem refiltrar a planilha inteira
+    return df, df_principal, df_concluidos_hoje, df_cancelados_hoje, \
+           contadores_producao.totais_dia(STATUS_CONCLUIDO, hoje), contadores_producao.totais_dia(STATUS_CANCELADO, hoje)
+
+def obter_frase_do_dia():
+    global FRASE_DO_DIA_ATUAL, ULTIMO_DIA_FRASE
+    hoje = datetime.now().date()
+    if ULTIMO_DIA_FRASE != hoje: FRASE_DO_DIA_ATUAL = random.choice(FRASES_MOTIVACIONAIS); ULTIMO_DIA_FRASE = hoje
+    return FRASE_DO_DIA_ATUAL
+
+COLUNAS_PRODUCAO_DIARIA = ['pedidos_teravix', 'qtd_teravix', 'pedidos_pv', 'qtd_pv']
+
+def inicio_janela_dashboard(hoje):
+    """Primeiro dia necessário ao dashboard: início do mês anterior (cobre também as 4 semanas do gráfico)."""
+    return (hoje.replace(day=1) - timedelta(days=1)).replace(day=1).date()
+
+def corte_historico(hoje, meses=MESES_BANCO_PRINCIPAL):
+    """Primeiro dia mantido no banco principal: início do mês de `meses` meses antes do atual (ao menos 1, para cobrir o dashboard)."""
+    ano, mes = divmod(hoje.year * 12 + hoje.month - 1 - max(meses, 1), 12)
+    return date(ano, mes + 1, 1)
+
+def calcular_producao_diaria(df):
+    """Resumo diário dos concluídos no mesmo formato da tabela producao_diaria, calculado a partir do snapshot."""
+    import pandas as pd
+    concluidos = df[(df[COLUNA_STATUS] == STATUS_CONCLUIDO) & df[COLUNA_DIA].notna()]
+    is_teravix = concluidos[COLUNA_IS_TERAVIX]
+    qtd = concluidos[COLUNA_QTD].astype('int64')
+    resumo = pd.DataFrame({'pedidos_teravix': is_teravix.astype('int64'), 'qtd_teravix': qtd.where(is_teravix, 0),
+                           'pedidos_pv': (~is_teravix).astype('int64'), 'qtd_pv': qtd.where(~is_teravix, 0)})
+    return resumo.groupby(concluidos[COLUNA_DIA].rename('dia')).sum()
+
+def carregar_producao_diaria(dia_inicial):
+    """Lê do banco o resumo diário dos pedidos do painel ('CV-') mantido pela sincronização, a partir de dia_inicial."""
+    import pandas as pd
+    conexao = conectar_banco(CAMINHO_BANCO_DE_DADOS)
+    linhas = ler_producao_diaria(conexao, dia_inicial, 'producao_diaria_painel')
+    conexao.close()
+    resumo = pd.DataFrame(linhas, columns=['dia'] + COLUNAS_PRODUCAO_DIARIA)
+    return resumo.set_index(pd.to_datetime(resumo.pop('dia')).rename('dia'))
+
+def calcular_metricas_dashboard(producao_diaria):
+    import numpy as np
+    import pandas as pd
+    hoje = datetime.now()
+    inicio_mes_atual = pd.Timestamp(hoje.date().replace(day=1))
+    pedidos_dia = producao_diaria['pedidos_teravix'] + producao_diaria['pedidos_pv']
+    qtd_dia = producao_diaria['qtd_teravix'] + producao_diaria['qtd_pv']
+
+    mes_atual = (producao_diaria.index >= inicio_mes_atual) & (producao_diaria.index <= hoje)
+    total_mes_atual_pedidos = pedidos_dia[mes_atual].sum()
+    total_mes_atual_qtd = qtd_dia[mes_atual].sum()
+    dias_uteis_mes_atual = np.busday_count(inicio_mes_atual.strftime('%Y-%m-%d'), (hoje + timedelta(days=1)).strftime('%Y-%m-%d'))
+    media_diaria_atual = total_mes_atual_pedidos / dias_uteis_mes_atual if dias_uteis_mes_atual > 0 else 0
+    media_diaria_qtd = total_mes_atual_qtd / dias_uteis_mes_atual if dias_uteis_mes_atual > 0 else 0
+
+    fim_mes_anterior = inicio_mes_atual - timedelta(days=1); inicio_mes_anterior = fim_mes_anterior.replace(day=1)
+    mes_anterior = (producao_diaria.index >= inicio_mes_anterior) & (producao_diaria.index <= fim_mes_anterior)
+    total_mes_anterior = pedidos_dia[mes_anterior].sum()
+    dias_uteis_mes_anterior = np.busday_count(inicio_mes_anterior.strftime('%Y-%m-%d'), (fim_mes_anterior + timedelta(days=1)).strftime('%Y-%m-%d'))
+    media_diaria_anterior = total_mes_anterior / dias_uteis_mes_anterior if dias_uteis_mes_anterior > 0 else 0
+
+    recorde_dia_valor = 0; recorde_dia_data = ""; recorde_dia_qtd = 0
+    pedidos_mes_atual = pedidos_dia[mes_atual]
+    if not pedidos_mes_atual.empty and pedidos_mes_atual.max() > 0:
+        recorde_dia_valor = pedidos_mes_atual.max()
+        recorde_dia_data_obj = pedidos_mes_atual.idxmax()
+        recorde_dia_data = recorde_dia_data_obj.strftime('%d/%m/%Y')
+        recorde_dia_qtd = qtd_dia[recorde_dia_data_obj]
+
+    # Tipos nativos do Python: o modelo de visão é serializado em JSON para os painéis em modo cliente
+    return {"total_mes_atual": int(total_mes_atual_pedidos), "total_mes_atual_qtd": int(total_mes_atual_qtd), "media_diaria_atual": float(media_diaria_atual),
+            "media_diaria_qtd": float(media_diaria_qtd), "total_mes_anterior": int(total_mes_anterior), "media_diaria_anterior": float(media_diaria_anterior),
+            "recorde_dia_valor": int(recorde_dia_valor), "recorde_dia_data": recorde_dia_data, "recorde_dia_qtd": int(recorde_dia_qtd)}
+
+def calcular_dados_grafico(producao_diaria):
+    import pandas as pd
+    qtd_dia = producao_diaria['qtd_teravix'] + producao_diaria['qtd_pv']
+    semanal = qtd_dia.groupby(producao_diaria.index.to_period('W-SUN').start_time).sum()
+    semanas_recentes = pd.date_range(end=datetime.now(), periods=4, freq='W-MON').normalize()
+    semanal = semanal.reindex(semanas_recentes, fill_value=0)
+    return list(semanal.items())
+
+# --- BANCO DE DADOS ---
+def preparar_linhas_concluidos(df_bruto):
+    """Monta, de forma vetorizada, as linhas da tabela 'concluidos' e a assinatura de cada uma."""
+    import numpy as np
+    import pandas as pd
+    datas = df_bruto[COLUNA_DATA_HORA]
+    mascara = (df_bruto[COLUNA_STATUS] == STATUS_CONCLUIDO) & datas.notna()
+    df = df_bruto[mascara]
+
+    def texto(col):
+        if col not in df.columns: return pd.Series(None, index=df.index, dtype=object)
+        return df[col].astype(object).where(df[col].notna(), None)
+
+    linhas = pd.DataFrame({
+        'data_conclusao': datas[mascara].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'pedido_id': df[COLUNA_PEDIDO_ID].astype(str),
+        'pv': texto(COLUNA_PV),
+        'qtd_maquinas': df[COLUNA_QTD].astype('int64'),
+        'equipamento': texto(COLUNA_EQUIPAMENTO),
+        'servico': texto(COLUNA_SERVICO),
+    }).drop_duplicates(subset='pedido_id', keep='first')
+
+    # Hash determinístico de cada linha; o SQLite guarda inteiros de 64 bits com sinal
+    linhas['assinatura'] = pd.util.hash_pandas_object(linhas[COLUNAS_CONCLUIDOS].astype(str), index=False).to_numpy().view(np.int64)
+    return linhas
+
+# Último status conhecido de cada pedido, por banco: (id do último evento, Series pedido_id -> status).
+# Evita reler status_atual a cada sincronização; se outro processo gravou eventos, o id não confere e a tabela é relida.
+_memo_status_atual = {}
+
+def status_atual_planilha(df_bruto):
+    """Series pedido_id -> status (texto) dos pedidos com status preenchido no snapshot; o último registro de cada pedido vale."""
+    df = df_bruto[df_bruto[COLUNA_PEDIDO_ID].notna() & df_bruto[COLUNA_STATUS].notna()]
+    status = df[COLUNA_STATUS].astype(str)
+    status.index = df[COLUNA_PEDIDO_ID].astype(str)
+    return status[~status.index.duplicated(keep='last')]
+
+def carregar_status_anterior(conexao):
+    import pandas as pd
+    ultimo = ultimo_evento_status(conexao)
+    memo = _memo_status_atual.get(CAMINHO_BANCO_DE_DADOS)
+    if memo is not None and memo[0] == ultimo: return memo[1]
+    linhas = ler_status_atual(conexao)
+    return pd.Series([s for _, s in linhas], index=[p for p, _ in linhas], dtype=object)
+
+def calcular_eventos_status(df_bruto, status_anterior, registrado_em):
+    """
+    Compara o status de cada pedido no snapshot com o anterior e devolve os eventos de mudança
+    (tuplas de COLUNAS_EVENTOS_STATUS) e a Series com o status atual.
+    """
+    import pandas as pd
+    atual = status_atual_planilha(df_bruto)
+    # reindex/isin por hash em vez de um join externo: o caso comum (nada mudou) custa poucos milissegundos
+    novo = atual.reindex(status_anterior.index)
+    mudou = novo.to_numpy() != status_anterior.to_numpy()  # NaN (pedido saiu da planilha) também conta como mudança
+    entrou = atual[~atual.index.isin(status_anterior.index)]
+    if not mudou.any() and entrou.empty: return [], atual
+    mudancas = pd.DataFrame({'anterior': pd.concat([status_anterior[mudou], pd.Series(None, index=entrou.index, dtype=object)]),
+                             'novo': pd.concat([novo[mudou], entrou])})
+
+    datas = df_bruto[df_bruto[COLUNA_PEDIDO_ID].notna()]
+    datas = datas[COLUNA_DATA_HORA].set_axis(datas[COLUNA_PEDIDO_ID].astype(str))
+    datas = datas[~datas.index.duplicated(keep='last')].reindex(mudancas.index)
+    datas = datas.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(datas.notna() & mudancas['novo'].notna(), None)
+    registrado = registrado_em.strftime('%Y-%m-%d %H:%M:%S')
+    eventos = [(pid, None if anterior != anterior else anterior, None if novo != novo else novo, data, registrado)
+               for pid, anterior, novo, data in zip(mudancas.index, mudancas['anterior'], mudancas['novo'], datas)]
+    return eventos, atual
+
+SQL_CRIAR_SINCRONIZACAO_HISTORICO = "CREATE TEMP TABLE IF NOT EXISTS sincronizacao_historico (pedido_id TEXT PRIMARY KEY)"
+
+# Concluídos anteriores ao corte já conferidos com o arquivo do histórico, por banco: (corte, Series pedido_id -> assinatura).
+# A planilha costuma manter anos de pedidos; com isso cada sincronização só confere no arquivo os que mudaram desde a anterior.
+_memo_historico_sincronizado = {}
+
+@dataclass(frozen=True)
+class MudancasHistorico:
+    """O que a sincronização grava no arquivo do histórico: linhas (COLUNAS_CONCLUIDOS + assinatura), ids a remover e dias a resumir."""
+    valores: list
+    ids_remover: list
+    dias: list
+
+    @property
+    def mudou(self):
+        return bool(self.valores or self.ids_remover)
+
+def comparar_historico(conexao, corte, antigas, ids_novos, eventos):
+    """
+    Compara com o arquivo do histórico, anexado à conexão (criado se preciso), os pedidos da planilha que ele pode ter:
+    os concluídos anteriores ao corte (antigas), gravados quando faltam ou mudaram; os novos no banco principal, que
+    saem do arquivo (a data passou para depois do corte); e os que deixaram de estar concluídos na planilha (eventos),
+    que saem do arquivo se vieram dela. Pedidos que só sumiram da planilha continuam arquivados.
+    Devolve um MudancasHistorico, ou None se não há arquivo e nada a gravar nele.
+    """
+    import pandas as pd
+    memo = _memo_historico_sincronizado.get(CAMINHO_BANCO_DE_DADOS)
+    if memo is not None and memo[0] == corte:
+        antigas = antigas[antigas['assinatura'].to_numpy() != memo[1].reindex(antigas['pedido_id']).to_numpy()]
+    revertidos = [pid for pid, anterior, novo, _, _ in eventos if anterior == STATUS_CONCLUIDO and novo is not None and novo != STATUS_CONCLUIDO]
+    ids = set(antigas['pedido_id']).union(ids_novos, revertidos)
+    if not ids: return MudancasHistorico([], [], [])
+    caminho = caminho_historico(CAMINHO_BANCO_DE_DADOS)
+    if not historico_anexado(conexao):
+        if antigas.empty and not os.path.exists(caminho): return None
+        if not os.path.exists(caminho): inicializar_banco(caminho)
+        anexar_historico(conexao, CAMINHO_BANCO_DE_DADOS)
+    conexao.execute(SQL_CRIAR_SINCRONIZACAO_HISTORICO)
+    with conexao:
+        conexao.execute("DELETE FROM sincronizacao_historico")
+        conexao.executemany("INSERT INTO sincronizacao_historico VALUES (?)", [(pid,) for pid in ids])
+    df_frio = pd.DataFrame(conexao.execute("SELECT a.pedido_id, a.assinatura, a.data_conclusao, a.origem FROM arquivo.concluidos a "
+                                           "JOIN sincronizacao_historico s ON s.pedido_id = a.pedido_id").fetchall(),
+                           columns=['pedido_id', 'assinatura_db', 'data_conclusao_db', 'origem_db'])
+
+    comparacao = antigas.merge(df_frio, on='pedido_id', how='left', indicator=True)
+    gravar = comparacao[(comparacao['_merge'] == 'left_only') | (comparacao['assinatura_db'] != comparacao['assinatura']) | comparacao['origem_db'].notna()]
+    remover = df_frio[df_frio['pedido_id'].isin(ids_novos) | (df_frio['pedido_id'].isin(revertidos) & df_frio['origem_db'].isna())]
+    colunas = COLUNAS_CONCLUIDOS + ['assinatura']
+    dias = {str(data)[:10] for coluna in (gravar['data_conclusao'], gravar['data_conclusao_db'], remover['data_conclusao_db']) for data in coluna.dropna()}
+    return MudancasHistorico(list(zip(*(gravar[col].tolist() for col in colunas))), remover['pedido_id'].tolist(), sorted(dias))
+
+@dataclass(frozen=True)
+class FalhaSincronizacao:
+    """Resultado de uma sincronização que não conseguiu gravar no banco (erro do SQLite ou do arquivo); o banco ficou como estava."""
+    erro: str
+
+def sincronizar_banco_de_dados(snapshot):
+    """
+    Sincroniza o banco de dados com o snapshot da planilha de status.
+    Insere novos concluídos, atualiza os que foram editados, remove os que não estão mais como concluídos
+    (só as linhas vindas da planilha; o histórico importado de arquivos fica) e registra em eventos_status os pedidos cujo status mudou desde o snapshot anterior, tudo em uma única transação.
+    Os concluídos anteriores ao corte do histórico são conferidos e gravados no arquivo do histórico (comparar_historico);
+    mover para lá o que envelheceu no banco principal é um passo à parte (arquivar_historico_se_preciso).
+    Devolve as contagens de linhas da sincronização ou, se o banco não pôde ser lido ou gravado, uma FalhaSincronizacao.
+    Outros erros (de programação) não são engolidos.
+    """
+    import pandas as pd
+    print("\n*** Iniciando sincronização do banco de dados com a planilha ***")
+    try:
+        inicio = time.perf_counter()
+        linhas = preparar_linhas_concluidos(snapshot.df_bruto)
+        print(f"INFO: Encontrados {len(linhas)} pedidos 'Concluído' com data válida na planilha.")
+
+        conexao = conectar_banco(CAMINHO_BANCO_DE_DADOS)
+        # Concluídos anteriores ao corte pertencem ao arquivo do histórico: vão para lá, não para o banco principal
+        corte = ler_corte_historico(conexao)
+        antigas = linhas[linhas['data_conclusao'] < corte] if corte is not None else linhas.iloc[:0]
+        if corte is not None: linhas = linhas[linhas['data_conclusao'] >= corte]
+        df_db = pd.DataFrame(conexao.execute("SELECT pedido_id, assinatura, data_conclusao, origem FROM concluidos").fetchall(),
+                             columns=['pedido_id', 'assinatura_db', 'data_conclusao_db', 'origem_db'])
+        print(f"INFO: Encontrados {len(df_db)} pedidos no banco de dados.")
+
+        comparacao = linhas.merge(df_db, on='pedido_id', how='left', indicator=True)
+        novos = comparacao['_merge'] == 'left_only'
+        # Um pedido importado de arquivo que aparece na planilha é regravado e passa a ser da planilha (origem NULL)
+        alterados = ~novos & ((comparacao['assinatura_db'] != comparacao['assinatura']) | comparacao['origem_db'].notna())
+        df_gravar = comparacao[novos | alterados]
+        # Um pedido cuja data passou para antes do corte sai do banco principal, qualquer que seja a origem, e vai para o arquivo
+        df_remover = df_db[(~df_db['pedido_id'].isin(linhas['pedido_id']) & df_db['origem_db'].isna()) | df_db['pedido_id'].isin(antigas['pedido_id'])]
+        ids_para_remover = df_remover['pedido_id'].tolist()
+
+        # Dias cujo resumo em producao_diaria muda: datas novas e antigas de cada linha gravada ou removida
+        dias_afetados = {str(data)[:10] for coluna in (df_gravar['data_conclusao'], df_gravar['data_conclusao_db'], df_remover['data_conclusao_db']) for data in coluna.dropna()}
+
+        eventos, status_atual = calcular_eventos_status(snapshot.df_bruto, carregar_status_anterior(conexao), snapshot.lido_em)
+
+        historico = comparar_historico(conexao, corte, antigas, comparacao.loc[novos, 'pedido_id'], eventos) if corte is not None else None
+        if ids_para_remover or not df_gravar.empty or eventos or (historico is not None and historico.mudou):
+            colunas = COLUNAS_CONCLUIDOS + ['assinatura']
+            valores = list(zip(*(df_gravar[col].tolist() for col in colunas)))
+            atualizacoes = ', '.join([f'{col} = excluded.{col}' for col in colunas if col != 'pedido_id'] + ['origem = NULL'])
+            with conexao:
+                conexao.executemany("DELETE FROM main.concluidos WHERE pedido_id = ?", [(pid,) for pid in ids_para_remover])
+                conexao.executemany(f"INSERT INTO main.concluidos ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))}) "
+                                    f"ON CONFLICT(pedido_id) DO UPDATE SET {atualizacoes}", valores)
+                atualizar_producao_diaria(conexao, sorted(dias_afetados))
+                if historico is not None and historico.mudou:
+                    conexao.executemany("DELETE FROM arquivo.concluidos WHERE pedido_id = ?", [(pid,) for pid in historico.ids_remover])
+                    conexao.executemany(f"INSERT INTO arquivo.concluidos ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))}) "
+                                        f"ON CONFLICT(pedido_id) DO UPDATE SET {atualizacoes}", historico.valores)
+                    atualizar_producao_diaria(conexao, historico.dias, esquema='arquivo')
+                registrar_eventos_status(conexao, eventos)
+        _memo_status_atual[CAMINHO_BANCO_DE_DADOS] = (ultimo_evento_status(conexao), status_atual)
+        if historico is not None: _memo_historico_sincronizado[CAMINHO_BANCO_DE_DADOS] = (corte, antigas.set_index('pedido_id')['assinatura'])
+        conexao.close()
+
+        no_historico = (len(historico.valores), len(historico.ids_remover)) if historico is not None else (0, 0)
+        print(f"*** Sincronização concluída em {time.perf_counter() - inicio:.3f}s: {int(novos.sum())} novo(s), "
+              f"{int(alterados.sum())} atualizado(s), {len(ids_para_remover)} removido(s), {len(eventos)} mudança(s) de status; "
+              f"no histórico arquivado, {no_historico[0]} gravado(s) e {no_historico[1]} removido(s). ***")
+        return {'concluidos_planilha': len(linhas) + len(antigas), 'novos': int(novos.sum()), 'atualizados': int(alterados.sum()),
+                'removidos': len(ids_para_remover), 'mudancas_status': len(eventos),
+                'historico_gravados': no_historico[0], 'historico_removidos': no_historico[1]}
+
+    except (sqlite3.Error, OSError) as e:
+        print(f"ERRO CRÍTICO DURANTE A SINCRONIZAÇÃO DO BANCO DE DADOS: {e}")
+        return FalhaSincronizacao(str(e))
+
+def arquivar_historico_se_preciso(meses=MESES_BANCO_PRINCIPAL):
+    """
+    Arquivamento automático, feito pelo painel e pelo publicador ao iniciar e na virada do dia, fora da sincronização:
+    só age quando há concluídos anteriores ao corte (virada do mês ou histórico importado). Uma falha vira AVISO e o
+    banco principal fica com as linhas até a próxima vez. Devolve quantos pedidos foram movidos.
+    """
+    try:
+        conexao = conectar_banco(CAMINHO_BANCO_DE_DADOS)
+        try:
+            pendente = conexao.execute("SELECT 1 FROM concluidos WHERE data_conclusao < ? LIMIT 1",
+                                       (corte_historico(datetime.now(), meses).isoformat(),)).fetchone() is not None
+        finally:
+            conexao.close()
+        return arquivar_historico_antigo(meses) if pendente else 0
+    except (sqlite3.Error, OSError) as e:
+        print(f"AVISO: Não foi possível arquivar o histórico antigo; o banco principal continua com ele: {e}")
+        return 0
+
+def arquivar_historico_antigo(meses=MESES_BANCO_PRINCIPAL, compactar=False):
+    """
+    Move os concluídos anteriores ao corte (corte_historico) para o arquivo do histórico, deixando o banco principal com
+    poucos meses. Com compactar, reescreve o banco principal (VACUUM) para devolver o espaço ao disco; sem isso, as
+    páginas liberadas são reaproveitadas pelos próximos concluídos. Devolve quantos pedidos foram movidos.
+    """
+    corte = corte_historico(datetime.now(), meses)
+    inicio = time.perf_counter()
+    movidos = arquivar_historico(CAMINHO_BANCO_DE_DADOS, corte)
+    if movidos:
+        print(f"INFO: {movidos} pedido(s) concluído(s) antes de {corte.strftime('%d/%m/%Y')} movido(s) para "
+              f"{os.path.basename(caminho_historico(CAMINHO_BANCO_DE_DADOS))} em {time.perf_counter() - inicio:.3f}s.")
+    if compactar:
+        antes, depois = compactar_banco(CAMINHO_BANCO_DE_DADOS)
+        print(f"INFO: Banco principal compactado: {antes / 2**20:.1f} MB -> {depois / 2**20:.1f} MB.")
+    return movidos
+
+COLUNAS_MODELO_VISAO = [COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO, 'Prioridade']
+
+@dataclass(frozen=True)
+class ModeloVisao:
+    """Tudo o que a interface precisa para desenhar uma atualização, já calculado fora da thread da UI."""
+    prioridades: list
+    em_montagem: list
+    pendentes: list
+    aguardando_montagem: list
+    aguardando_chegada: list
+    concluidos: list
+    cancelados: list
+    totais_concluidos: tuple
+    totais_cancelados: tuple
+    metricas: dict
+    dados_grafico: list
+    frase: str
+    tempos: dict  # duração de cada etapa da atualização, em segundos
+    fluxo: dict = None  # indicadores de fluxo (analise.resumo_fluxo); None sem histórico de status (modo online)
+    contagens: dict = None  # linhas lidas, alteradas e sincronizadas nesta atualização, para o log de diagnóstico
+
+def _linhas(df):
+    """Converte um DataFrame em lista de dicionários com tipos nativos do Python."""
+    colunas = [col for col in COLUNAS_MODELO_VISAO if col in df.columns]
+    return df[colunas].astype(object).to_dict('records')
+
+def montar_modelo_visao(snapshot, producao_diaria, tempos, fluxo=None, contagens=None):
+    """Separa os pedidos do snapshot por coluna do painel e calcula métricas e gráfico a partir do resumo diário."""
+    inicio = time.perf_counter()
+    _, df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados = carregar_dados(snapshot)
+    contagens = {**(contagens or {}), 'linhas_alteradas': contadores_producao.linhas_alteradas}
+
+    df_prioridades = df_principal[df_principal[COLUNA_STATUS].isin([STATUS_AGUARDANDO, STATUS_EM_MONTAGEM, STATUS_URGENTE])]
+    pedidos_em_prioridade_ids = df_prioridades.head(4)[COLUNA_PEDIDO_ID].tolist()
+
+    df_em_montagem_base = df_principal[df_principal[COLUNA_STATUS] == STATUS_EM_MONTAGEM]
+    df_em_montagem_filtrado = df_em_montagem_base[~df_em_montagem_base[COLUNA_PEDIDO_ID].isin(pedidos_em_prioridade_ids)]
+    df_pendentes = df_principal[df_principal[COLUNA_STATUS] == STATUS_PENDENTE]
+    df_aguardando_base = df_principal[df_principal[COLUNA_STATUS] == STATUS_AGUARDANDO]
+    df_aguardando_filtrado = df_aguardando_base[~df_aguardando_base[COLUNA_PEDIDO_ID].isin(pedidos_em_prioridade_ids)]
+    df_aguardando_chegada = df_principal[df_principal[COLUNA_STATUS] == STATUS_AGUARDANDO_CHEGADA]
+
+    dados_grafico = [(semana.to_pydatetime(), int(valor)) for semana, valor in calcular_dados_grafico(producao_diaria)]
+
+    return ModeloVisao(prioridades=_linhas(df_prioridades.head(4)), em_montagem=_linhas(df_em_montagem_filtrado), pendentes=_linhas(df_pendentes),
+                       aguardando_montagem=_linhas(df_aguardando_filtrado), aguardando_chegada=_linhas(df_aguardando_chegada),
+                       concluidos=_linhas(df_concluidos), cancelados=_linhas(df_cancelados),
+                       totais_concluidos=totais_concluidos, totais_cancelados=totais_cancelados,
+                       metricas=calcular_metricas_dashboard(producao_diaria), dados_grafico=dados_grafico, frase=obter_frase_do_dia(),
+                       tempos={**tempos, 'calculo': time.perf_counter() - inicio}, fluxo=fluxo, contagens=contagens)
+
+def executar_atualizacao(sincronizar=True, hash_conteudo=None, cancelado=lambda: False):
+    """
+    Uma atualização completa do painel: leitura da planilha, sincronização do banco e cálculos.
+    Devolve o ModeloVisao, ou None se cancelado() indicar que o resultado não é mais necessário.
+    """
+    snapshot = ler_snapshot_planilha(hash_conteudo)
+    if cancelado(): return None
+
+    inicio_sincronizacao = time.perf_counter()
+    contagens = {'linhas_planilha': len(snapshot.df_bruto), 'pedidos_painel': len(snapshot.df), 'memoria_snapshot': sum(snapshot.memoria.values())}
+    if sincronizar:
+        resultado = sincronizar_banco_de_dados(snapshot)
+        # Com a sincronização falha, o modelo sai com o que o banco já tinha; erro_sincronizacao avisa quem o desenha ou publica
+        if isinstance(resultado, FalhaSincronizacao): contagens['erro_sincronizacao'] = resultado.erro
+        else: contagens.update(resultado)
+    if cancelado(): return None
+
+    # Com o banco sincronizado, o dashboard lê o resumo diário; no modo online ele vem dos contadores incrementais
+    if sincronizar: producao_diaria = carregar_producao_diaria(inicio_janela_dashboard(datetime.now()))
+    else:
+        contadores_producao.aplicar_snapshot(snapshot)
+        producao_diaria = contadores_producao.producao_diaria(inicio_janela_dashboard(datetime.now()))
+
+    tempos = {'leitura': snapshot.tempo_leitura, 'sincronizacao': time.perf_counter() - inicio_sincronizacao}
+
+    # Indicadores de fluxo a partir do histórico de status; só os eventos novos desta sincronização são processados
+    inicio_analise = time.perf_counter(); fluxo = None
+    if sincronizar:
+        try:
+            fluxo = analise.resumo_fluxo(analise.carregar_agregados(CAMINHO_BANCO_DE_DADOS), datetime.now())
+        except Exception as e:
+            print(f"AVISO: Não foi possível calcular os indicadores de fluxo: {e}")
+    tempos['analise'] = time.perf_counter() - inicio_analise
+    modelo = montar_modelo_visao(snapshot, producao_diaria, tempos, fluxo, contagens)
+    return None if cancelado() else modelo
+
+ATUALIZACAO_IGNORADA = 'ignorada'
+
+def executar_atualizacao_se_mudou(sincronizar, filtro=None, cancelado=lambda: False):
+    """
+    Atualização disparada por mudança no arquivo ou por timer: no modo online baixa a planilha antes e, com um filtro,
+    compara o hash do conteúdo com o da última leitura. Devolve o ModeloVisao, ATUALIZACAO_IGNORADA se o conteúdo
+    não mudou (salvamento sem alterações ou resposta 304) ou None se cancelado() indicar que o resultado não é mais necessário.
+    """
+    download = atualizar_copia_online()  # None no modo local
+    if filtro is None: return executar_atualizacao(sincronizar, None, cancelado)
+    impressao = impressao_arquivo(filtro.caminho)
+    hash_conteudo = download.hash_conteudo if download is not None else hash_arquivo(filtro.caminho)
+    if filtro.conteudo_lido(hash_conteudo):
+        filtro.registrar_leitura(impressao, hash_conteudo)
+        return ATUALIZACAO_IGNORADA
+    modelo = executar_atualizacao(sincronizar, hash_conteudo, cancelado)
+    if modelo is not None: filtro.registrar_leitura(impressao, hash_conteudo)
+    return modelo
+
+# --- MONITORAMENTO DA PLANILHA ---
+class FiltroMudancasArquivo:
+    """
+    Guarda a impressão da última leitura da planilha e conta eventos recebidos, agrupados e ignorados.
+    É usado ao mesmo tempo pela thread do watchdog, pela da interface e pela da atualização, então tudo passa pela trava.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.impressao_lida = None; self.hash_lido = None
+        self.eventos_recebidos = 0; self.eventos_agrupados = 0; self.atualizacoes_ignoradas = 0
+        self.trava = threading.Lock()
+
+    def contar(self, *contadores):
+        """Incrementa os contadores pedidos ('eventos_recebidos', 'eventos_agrupados', 'atualizacoes_ignoradas')."""
+        with self.trava:
+            for contador in contadores: setattr(self, contador, getattr(self, contador) + 1)
+
+    def metadados_mudaram(self):
+        impressao = impressao_arquivo(self.caminho)
+        with self.trava:
+            return impressao != self.impressao_lida
+
+    def conteudo_lido(self, hash_conteudo):
+        with self.trava:
+            return hash_conteudo == self.hash_lido
+
+    def registrar_leitura(self, impressao, hash_conteudo):
+        with self.trava:
+            self.impressao_lida = impressao; self.hash_lido = hash_conteudo
+
+    def resumo(self):
+        with self.trava:
+            return (f"eventos recebidos: {self.eventos_recebidos}, agrupados: {self.eventos_agrupados}, "
+                    f"atualizações ignoradas: {self.atualizacoes_ignoradas}")
+
+# --- RELATÓRIOS ---
+DIAS_SEMANA = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
+STATUS_BACKLOG = [STATUS_AGUARDANDO, STATUS_EM_MONTAGEM]
+
+def buscar_resumo_periodo(data_inicial, data_final, caminho_banco=None):
+    """Totais (pedidos_teravix, qtd_teravix, pedidos_pv, qtd_pv) do período, lidos do resumo diário 'producao_diaria' e do histórico arquivado."""
+    conexao = conectar_banco(caminho_banco or CAMINHO_BANCO_DE_DADOS)
+    try:
+        migrar_banco_de_dados(conexao)
+        anexar_historico(conexao, caminho_banco or CAMINHO_BANCO_DE_DADOS)
+        return resumir_periodo(conexao, data_inicial, data_final, 'toda_producao_diaria')
+    finally:
+        conexao.close()
+
+# Backlog já filtrado, por planilha: (impressão do arquivo, DataFrame); cliques repetidos não releem a planilha
+_memo_backlog = {}
+
+def buscar_backlog():
+    """
+    Todos os pedidos com status 'Aguardando Montagem' ou 'Em Montagem', lidos da planilha (ou do seu cache).
+    O resultado é memorizado pela impressão (tamanho e data) da planilha e só é recalculado quando ela muda.
+    """
+    atualizar_copia_online()
+    impressao = impressao_arquivo(CAMINHO_PLANILHA_STATUS)
+    memo = _memo_backlog.get(CAMINHO_PLANILHA_STATUS)
+    if impressao is not None and memo is not None and memo[0] == impressao: return memo[1]
+
+    df, _ = carregar_planilha(CAMINHO_PLANILHA_STATUS)
+    backlog = df[df[COLUNA_STATUS].isin(STATUS_BACKLOG)].copy()
+    _memo_backlog[CAMINHO_PLANILHA_STATUS] = (impressao, backlog)
+    return backlog
+
+def buscar_fluxo_periodo(data_inicial, data_final, caminho_banco=None):
+    """Lead time dos pedidos concluídos no período, por TERAVIX e PV, e a idade atual do WIP, a partir do histórico de status."""
+    agregados = analise.carregar_agregados(caminho_banco or CAMINHO_BANCO_DE_DADOS)
+    inicio, fim = intervalo_dias(data_inicial, data_final)
+    return {'lead': analise.resumir_lead_times(agregados, inicio, fim), 'wip': analise.resumir_wip(agregados, datetime.now())}
+
+def _linhas_fluxo(fluxo):
+    linhas = []
+    for tipo, nome in (('PV', "PV's"), ('TERAVIX', "OP's de Teravix")):
+        pedidos, p50, p90 = fluxo['lead'][tipo]
+        if pedidos: linhas.append(f"• Lead time das {nome}: {p50:.1f} dias (p50), {p90:.1f} dias (p90) em {pedidos} pedidos")
+    pedidos, p50, p90, mais_antigo = fluxo['wip']
+    if pedidos: linhas.append(f"• {pedidos} pedidos em aberto: idade de {p50:.1f} dias (p50), {p90:.1f} dias (p90), o mais antigo com {mais_antigo:.1f} dias")
+    return linhas
+
+def _linhas_atividades(num_pvs, unidades_pvs, num_ops, unidades_ops):
+    linhas = []
+    if num_pvs > 0:
+        plural_pv = "'s" if num_pvs > 1 else ""
+        linhas.append(f"• {num_pvs} PV{plural_pv} com {unidades_pvs} unidades")
+    if num_ops > 0:
+        plural_op = "'s" if num_ops > 1 else ""
+        linhas.append(f"• {num_ops} OP{plural_op} com {unidades_ops} unidades de Teravix")
+    return linhas
+
+def montar_texto_relatorio(data_inicial, data_final, resumo_concluidos, df_backlog, fluxo=None):
+    """
+    Texto do relatório de atividades do período, a partir do resumo dos concluídos e do backlog atual.
+    Com fluxo (buscar_fluxo_periodo), acrescenta os tempos de fluxo quando há histórico de status para o período.
+    """
+    num_ops, unidades_ops, num_pvs, unidades_pvs = resumo_concluidos
+    atividades_realizadas = _linhas_atividades(num_pvs, unidades_pvs, num_ops, unidades_ops)
+
+    atividades_backlog = []
+    if not df_backlog.empty:
+        is_teravix = df_backlog[COLUNA_PV].astype(str).str.contains("TERAVIX", na=False)
+        teravix_backlog_df = df_backlog[is_teravix]
+        pv_backlog_df = df_backlog[~is_teravix]
+        atividades_backlog = _linhas_atividades(len(pv_backlog_df), pv_backlog_df[COLUNA_QTD].sum(),
+                                                len(teravix_backlog_df), teravix_backlog_df[COLUNA_QTD].sum())
+
+    if data_inicial == data_final:
+        data_titulo = f"{DIAS_SEMANA[data_inicial.weekday()]}, dia {data_inicial.strftime('%d/%m')}"
+    else:
+        data_titulo = f"período de {data_inicial.strftime('%d/%m')} a {data_final.strftime('%d/%m')}"
+
+    titulo = f"Relatório de Atividades - {data_titulo}."
+
+    corpo_realizadas = "Nenhuma atividade realizada no período."
+    if atividades_realizadas:
+        corpo_realizadas = "Atividades Realizadas:\n" + "\n".join(atividades_realizadas)
+
+    corpo_backlog = "Backlog:\nNenhuma atividade futura na fila."
+    if atividades_backlog:
+        corpo_backlog = "Backlog:\n" + "\n".join(atividades_backlog)
+
+    texto = f"{titulo}\n\n{corpo_realizadas}\n\n{corpo_backlog}"
+    linhas_fluxo = _linhas_fluxo(fluxo) if fluxo else []
+    if linhas_fluxo: texto += "\n\nTempos de Fluxo:\n" + "\n".join(linhas_fluxo)
+    return texto
+
+# --- RELATÓRIOS EM LOTE ---
+# Granularidade -> frequência de período do pandas (semanas de segunda a domingo)
+GRANULARIDADES = {'dia': 'D', 'semana': 'W-SUN', 'mes': 'M'}
+SEPARADOR_LOTE = "\n\n" + "-" * 40 + "\n\n"
+COLUNAS_RESUMO_PERIODOS = ['inicio', 'fim', 'pedidos_pv', 'qtd_pv', 'pedidos_teravix', 'qtd_teravix', 'total_pedidos', 'total_qtd']
+
+def resumir_periodos(data_inicial, data_final, granularidade, caminho_banco=None):
+    """
+    Totais de cada dia, semana ou mês entre data_inicial e data_final, com uma única consulta ao resumo diário.
+    Períodos sem produção aparecem zerados; o primeiro e o último são recortados às datas pedidas.
+    """
+    import pandas as pd
+    frequencia = GRANULARIDADES[granularidade]
+    conexao = conectar_banco(caminho_banco or CAMINHO_BANCO_DE_DADOS)
+    try:
+        migrar_banco_de_dados(conexao)
+        anexar_historico(conexao, caminho_banco or CAMINHO_BANCO_DE_DADOS)
+        linhas = ler_producao_diaria_periodo(conexao, data_inicial, data_final, 'toda_producao_diaria')
+    finally:
+        conexao.close()
+
+    diario = pd.DataFrame(linhas, columns=['dia'] + COLUNAS_PRODUCAO_DIARIA)
+    periodos = pd.period_range(data_inicial, data_final, freq=frequencia)
+    resumo = (diario[COLUNAS_PRODUCAO_DIARIA].groupby(pd.PeriodIndex(pd.to_datetime(diario['dia']), freq=frequencia)).sum()
+              .reindex(periodos, fill_value=0))
+    resumo.insert(0, 'inicio', [max(p.start_time.date(), data_inicial) for p in periodos])
+    resumo.insert(1, 'fim', [min(p.end_time.date(), data_final) for p in periodos])
+    resumo['total_pedidos'] = resumo['pedidos_teravix'] + resumo['pedidos_pv']
+    resumo['total_qtd'] = resumo['qtd_teravix'] + resumo['qtd_pv']
+    return resumo[COLUNAS_RESUMO_PERIODOS].reset_index(drop=True)
+
+def montar_textos_lote(resumo_periodos, df_backlog):
+    """Texto do relatório de cada período do resumo; o backlog é o mesmo (o atual) em todos."""
+    return [montar_texto_relatorio(linha.inicio, linha.fim, (linha.pedidos_teravix, linha.qtd_teravix, linha.pedidos_pv, linha.qtd_pv), df_backlog)
+            for linha in resumo_periodos.itertuples(index=False)]
+
+def exportar_resumo_periodos(resumo_periodos, caminho):
+    """Grava o resumo em .xlsx ou em .csv (separado por ';', datas dd/mm/aaaa, como o concluidos.csv)."""
+    saida = resumo_periodos.copy()
+    if caminho.lower().endswith('.xlsx'):
+        saida.to_excel(caminho, index=False, engine='openpyxl')
+    else:
+        for coluna in ('inicio', 'fim'): saida[coluna] = [d.strftime('%d/%m/%Y') for d in saida[coluna]]
+        saida.to_csv(caminho, sep=';', index=False, encoding='utf-8-sig')
+
+def gerar_relatorios_em_lote(data_inicial, data_final, granularidade, caminho_saida=None):
+    """Resumo por período, textos dos relatórios e, se caminho_saida for informado, o arquivo exportado; tudo numa passada."""
+    resumo = resumir_periodos(data_inicial, data_final, granularidade)
+    textos = montar_textos_lote(resumo, buscar_backlog())
+    if caminho_saida: exportar_resumo_periodos(resumo, caminho_saida)
+    return resumo, textos
+
@@ -0,0 +1,228 @@
+"""
+Leitura da planilha de status (Status_dos_pedidos.xlsm) com cache em disco do quadro de pedidos já tipado, compartilhada pelo painel e pelos relatórios.
+pandas, numpy e openpyxl são importados dentro das funções, para que importar as constantes deste módulo não custe nada.
+"""
+import os
+import time
+import hashlib
+
+COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO = 'Pedido', 'PV', 'Servico', 'Status', 'Data Status', 'Qtd Maquinas', 'Equipamento'
+STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_CONCLUIDO, STATUS_CANCELADO, STATUS_URGENTE = 'Pendente', 'Aguardando Montagem', 'Aguardando Chegada', 'Em Montagem', 'Concluído', 'Cancelado', 'Urgente'
+
+# Colunas derivadas criadas uma única vez pela normalização do snapshot
+COLUNA_DATA_HORA, COLUNA_DIA, COLUNA_IS_TERAVIX = 'data_hora_status', 'dia_status', 'is_teravix'
+
+# Somente estas colunas da planilha são lidas; as demais são ignoradas já no parse
+COLUNAS_PLANILHA = [COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO]
+
+# Textos que se repetem em muitas linhas ficam como categoria: cada valor distinto é guardado uma vez só
+COLUNAS_CATEGORIA = [COLUNA_STATUS, COLUNA_PV, COLUNA_EQUIPAMENTO]
+
+# Aumente ao mudar a normalização, para invalidar os caches já gravados
+VERSAO_CACHE = 4
+
+# --- IMPRESSÃO DO ARQUIVO ---
+def impressao_arquivo(caminho):
+    """Tamanho e data de modificação do arquivo, usados para descartar eventos sem mudança real."""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """Hash do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+# --- LEITURA E NORMALIZAÇÃO ---
+def ler_planilha_streaming(caminho, colunas=COLUNAS_PLANILHA):
+    """
+    Lê a primeira aba da planilha em modo somente leitura, linha a linha, guardando apenas as colunas pedidas.
+    Evita montar o modelo completo do workbook (estilos, fórmulas e colunas não usadas).
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+    try:
+        linhas = workbook.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [str(nome).strip() if nome is not None else '' for nome in next(linhas, ())]
+        indices = {nome: cabecalho.index(nome) for nome in colunas if nome in cabecalho}
+        valores = {nome: [] for nome in indices}
+        largura = len(cabecalho)
+        for linha in linhas:
+            if len(linha) < largura: linha = linha + (None,) * (largura - len(linha))
+            selecionados = [linha[i] for i in indices.values()]
+            if all(valor is None for valor in selecionados): continue
+            for nome, valor in zip(indices, selecionados): valores[nome].append(valor)
+    finally:
+        workbook.close()
+    return pd.DataFrame(valores)
+
+def tipar_planilha(df_bruto):
+    """
+    Converte datas, status e quantidades uma única vez e cria as colunas de data/hora e dia. Os tipos são compactos:
+    ids como texto (StringDtype), status, PV e equipamento como categoria e quantidades em int32.
+    """
+    import numpy as np
+    import pandas as pd
+    if COLUNA_DATA_STATUS not in df_bruto.columns: df_bruto[COLUNA_DATA_STATUS] = pd.NaT
+    df_bruto[COLUNA_DATA_HORA] = pd.to_datetime(df_bruto[COLUNA_DATA_STATUS], errors='coerce')
+    df_bruto[COLUNA_DIA] = df_bruto[COLUNA_DATA_HORA].dt.normalize()
+    df_bruto[COLUNA_PEDIDO_ID] = df_bruto[COLUNA_PEDIDO_ID].astype(tipo_texto())
+    for coluna in COLUNAS_CATEGORIA:
+        if coluna in df_bruto.columns: df_bruto[coluna] = df_bruto[coluna].astype('category')
+    if COLUNA_QTD in df_bruto.columns: df_bruto[COLUNA_QTD] = pd.to_numeric(df_bruto[COLUNA_QTD], errors='coerce').fillna(0).astype('int32')
+    else: df_bruto[COLUNA_QTD] = np.int32(0)
+    return df_bruto
+
+def tipo_texto():
+    """Tipo das colunas de id: texto do pyarrow quando instalado (um buffer contíguo); sem ele, o StringDtype em Python."""
+    import importlib.util
+    import pandas as pd
+    return pd.StringDtype('pyarrow' if importlib.util.find_spec('pyarrow') else 'python')
+
+def preencher_categoria(serie, valor):
+    """Preenche os vazios de uma coluna, acrescentando o valor às categorias se ela for categoria."""
+    import pandas as pd
+    if not isinstance(serie.dtype, pd.CategoricalDtype): return serie.fillna(valor)
+    if valor not in serie.cat.categories: serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
+
+def separar_pedidos_painel(df_bruto):
+    """Quadro de pedidos 'CV-' do painel, com valores padrão preenchidos e a coluna is_teravix."""
+    import numpy as np
+    import pandas as pd
+    df = df_bruto[df_bruto[COLUNA_PEDIDO_ID].str.startswith('CV-', na=False)].copy()
+    for col, default_val in [(COLUNA_PV, "TERAVIX"), (COLUNA_SERVICO, "Detalhe não disponível"), (COLUNA_EQUIPAMENTO, "Não especificado")]:
+        if col not in df.columns: df[col] = pd.Series(default_val, index=df.index, dtype='category' if col in COLUNAS_CATEGORIA else object)
+        else: df[col] = preencher_categoria(df[col], default_val)
+    # 'TERAVIX' é procurado uma vez por PV distinto, não uma vez por linha
+    pv = df[COLUNA_PV].cat
+    df[COLUNA_IS_TERAVIX] = np.asarray(pv.categories.astype(str).str.contains('TERAVIX'), dtype=bool)[pv.codes.to_numpy()]
+    return df
+
+def memoria_quadro(df):
+    """Bytes ocupados pelo quadro, contando o texto de cada valor (para as categorias, só os valores distintos)."""
+    return int(df.memory_usage(deep=True).sum())
+
+# --- CACHE EM DISCO ---
+# O cache fica em dados/, uma pasta compartilhada: o formato não pode executar código ao ser lido (nada de pickle).
+# É um .npz lido com allow_pickle=False: cada coluna é um array numpy (números e datas direto; textos e categorias como
+# códigos) e um cabeçalho JSON guarda versão, impressão, hash, tipos e os valores distintos das colunas de texto.
+def caminho_cache(caminho_planilha):
+    """Arquivo de cache ao lado da planilha, na pasta dados/."""
+    pasta, nome = os.path.split(caminho_planilha)
+    return os.path.join(pasta, f".{os.path.splitext(nome)[0]}.cache.npz")
+
+def _valor_json(valor):
+    """Valores de texto da planilha que o JSON não representa: datas viram {'data': iso}, o resto vira texto."""
+    if hasattr(valor, 'isoformat'): return {'data': valor.isoformat()}
+    return str(valor)
+
+def _valor_lido(objeto):
+    """Inverso de _valor_json, usado como object_hook na leitura do cabeçalho."""
+    import pandas as pd
+    return pd.Timestamp(objeto['data']) if set(objeto) == {'data'} else objeto
+
+def _colunas_cache(df):
+    """Arrays numpy (sem objetos Python) e a descrição de cada coluna do quadro, para o cabeçalho."""
+    import numpy as np
+    import pandas as pd
+    arrays, colunas = {}, []
+    for i, nome in enumerate(df.columns):
+        serie = df[nome]; chave = f"c{i}"
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            arrays[chave] = serie.cat.codes.to_numpy()
+            colunas.append({'nome': nome, 'tipo': 'categoria', 'valores': serie.cat.categories.tolist(), 'tipo_valores': str(serie.cat.categories.dtype)})
+        elif isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biufmM':
+            arrays[chave] = serie.to_numpy(); colunas.append({'nome': nome, 'tipo': 'numpy'})
+        else:
+            arrays[chave], valores = pd.factorize(serie, use_na_sentinel=True)
+            coluna = {'nome': nome, 'tipo': 'objeto', 'valores': valores.tolist()}
+            if isinstance(serie.dtype, pd.StringDtype):
+                coluna.update(tipo='texto', armazenamento=serie.dtype.storage, na_nan=serie.dtype.na_value is not pd.NA)
+            colunas.append(coluna)
+    return arrays, colunas
+
+def _quadro_cache(npz, colunas):
+    """Remonta o quadro gravado por gravar_cache a partir dos arrays e da descrição das colunas."""
+    import numpy as np
+    import pandas as pd
+    dados = {}
+    for i, coluna in enumerate(colunas):
+        array = npz[f"c{i}"]
+        if coluna['tipo'] == 'numpy': dados[coluna['nome']] = array; continue
+        if coluna['tipo'] == 'categoria':
+            dados[coluna['nome']] = pd.Categorical.from_codes(array, categories=pd.Index(coluna['valores'], dtype=coluna['tipo_valores'])); continue
+        valores = np.empty(len(coluna['valores']) + 1, dtype=object); valores[:-1] = coluna['valores']; valores[-1] = None
+        objetos = valores[array]  # o código -1 (vazio) cai no None do fim
+        if coluna['tipo'] == 'objeto': dados[coluna['nome']] = objetos
+        else: dados[coluna['nome']] = pd.array(objetos, dtype=pd.StringDtype(coluna['armazenamento'], na_value=np.nan if coluna['na_nan'] else pd.NA))
+    return pd.DataFrame(dados)
+
+def ler_cache(caminho, impressao, calcular_hash):
+    """
+    Devolve o quadro do cache quando ele corresponde à planilha (ou None) e o hash, se ele precisou ser conferido.
+    Tamanho e data iguais bastam; se só a data mudou, o hash do conteúdo decide. Só o cabeçalho é lido antes disso.
+    """
+    import json
+    import zipfile
+    import numpy as np
+    try:
+        with np.load(caminho, allow_pickle=False) as npz:
+            cabecalho = json.loads(npz['cabecalho'].tobytes().decode('utf-8'), object_hook=_valor_lido)
+            if not isinstance(cabecalho, dict) or cabecalho.get('versao') != VERSAO_CACHE: return None, None
+            impressao_cache = tuple(cabecalho['impressao'])
+            if impressao_cache == impressao: hash_conferido = None
+            elif impressao_cache[0] == impressao[0] and cabecalho['hash'] == calcular_hash(): hash_conferido = cabecalho['hash']
+            else: return None, None
+            return _quadro_cache(npz, cabecalho['colunas']), hash_conferido
+    except (OSError, ValueError, KeyError, TypeError, EOFError, zipfile.BadZipFile):
+        return None, None
+
+def gravar_cache(caminho, impressao, hash_conteudo, df):
+    """Grava o cache em um arquivo temporário e o renomeia, para que um leitor nunca veja um arquivo pela metade."""
+    import json
+    import numpy as np
+    arrays, colunas = _colunas_cache(df)
+    cabecalho = json.dumps({'versao': VERSAO_CACHE, 'impressao': list(impressao), 'hash': hash_conteudo, 'colunas': colunas},
+                           ensure_ascii=False, default=_valor_json).encode('utf-8')
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'wb') as arquivo:
+            np.savez(arquivo, allow_pickle=False, cabecalho=np.frombuffer(cabecalho, dtype=np.uint8), **arrays)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"AVISO: Não foi possível gravar o cache da planilha: {e}")
+        if os.path.exists(temporario): os.remove(temporario)
+
+def carregar_planilha(caminho, hash_conteudo=None, usar_cache=True):
+    """
+    Planilha completa já tipada (tipar_planilha), lida do cache em dados/ quando ele é válido
+    ou da leitura em streaming da planilha quando não é. Sempre um arquivo local: no modo online, a cópia
+    baixada por baixador.BaixadorPlanilha. Devolve o quadro e a origem ('cache' ou 'planilha').
+    """
+    if not os.path.exists(caminho): raise FileNotFoundError(f"Planilha não encontrada: {caminho}")
+
+    impressao = impressao_arquivo(caminho)
+    calcular_hash = lambda: hash_conteudo or hash_arquivo(caminho)
+    arquivo_cache = caminho_cache(caminho)
+    if usar_cache:
+        inicio = time.perf_counter()
+        df_bruto, hash_cache = ler_cache(arquivo_cache, impressao, calcular_hash)
+        if df_bruto is not None:
+            # Arquivo salvo sem alterações: atualiza a data no cache para não recalcular o hash na próxima leitura
+            if hash_cache is not None: gravar_cache(arquivo_cache, impressao, hash_cache, df_bruto)
+            print(f"INFO: Planilha carregada do cache em {time.perf_counter() - inicio:.3f}s.")
+            return df_bruto, 'cache'
+
+    hash_lido = calcular_hash()
+    df_bruto = tipar_planilha(ler_planilha_streaming(caminho))
+    # Só grava se a planilha não mudou durante a leitura (o Excel ainda pode estar salvando)
+    if usar_cache and impressao_arquivo(caminho) == impressao: gravar_cache(arquivo_cache, impressao, hash_lido, df_bruto)
+    return df_bruto, 'planilha'
@@ -1,164 +1,43 @@
 import sys
 import os
 import locale
-import random
-import pandas as pd
 from datetime import datetime, timedelta
-import numpy as np
 import time
-import sqlite3
+INICIO_PROCESSO = time.perf_counter()  # referência do tempo até o primeiro quadro, antes de importar Qt e o motor
+import threading
+import argparse
+from dataclasses import replace
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                               QHBoxLayout, QLabel, QFrame, QProgressBar, QSizePolicy, QPushButton)
-from PySide6.QtGui import QFont
-from PySide6.QtCore import QTimer, Qt, Signal, QObject, QPropertyAnimation, QEasingCurve, QPoint
+                               QHBoxLayout, QLabel, QFrame, QProgressBar, QSizePolicy, QPushButton, QListView, QStyledItemDelegate)
+from PySide6.QtGui import QFont, QFontMetrics, QColor
+from PySide6.QtCore import (QTimer, Qt, Signal, QObject, QPropertyAnimation, QEasingCurve, QPoint, QRunnable, QThreadPool,
+                            QAbstractListModel, QModelIndex, QSize)
 
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+from motor import (COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO,
+                   STATUS_AGUARDANDO, STATUS_EM_MONTAGEM, STATUS_URGENTE,
+                   META_SEMANAL, USAR_LINK_ONLINE, CAMINHO_PASTA_DADOS, CAMINHO_PLANILHA_STATUS, NOME_ARQUIVO_STATUS,
+                   FiltroMudancasArquivo, ATUALIZACAO_IGNORADA, executar_atualizacao_se_mudou,
+                   CAMINHO_LOG_ATUALIZACOES, CAMINHO_ULTIMO_MODELO, inicializar_banco_de_dados, descrever_fonte_dados,
+                   arquivar_historico_se_preciso)
+from analise import SEMANAS_PAINEL
+from diagnostico import RegistroAtualizacoes
+from transmissao import Assinante, HOST_PADRAO, PORTA_PADRAO, endereco, dados_modelo, quadro_modelo, salvar_quadro, carregar_ultimo_modelo
+from servidor_http import EstadoPainel, ServidorPainel, HOST_HTTP_PADRAO, PORTA_HTTP_PADRAO, endereco_http
+
 # --- CONFIGURAÇÃO GERAL E DE DADOS ---
 
 # Fator de escala ajustado para um layout mais compacto.
 SCALE_FACTOR = 1.0
 
-META_SEMANAL = 500
-FRASES_MOTIVACIONAIS = [
-    "A qualidade do nosso trabalho hoje é a garantia do nosso sucesso amanhã.", "O único lugar onde o sucesso vem antes do trabalho é no dicionário.",
-    "Grandes coisas em negócios nunca são feitas por uma pessoa. São feitas por uma equipe.", "A persistência realiza o impossível.",
-    "Foco, força e fé: os três pilares para um dia produtivo.", "A perfeição não é alcançável, mas se buscarmos a perfeição, podemos alcançar a excelência.",
-    "O talento vence jogos, mas o trabalho em equipe ganha campeonatos.", "Não observe o relógio; faça o que ele faz. Continue em frente.",
-    "A disciplina é a ponte entre metas e realizações.", "Sua dedicação de hoje está construindo a reputação de amanhã."
-]
-
-FRASE_DO_DIA_ATUAL = ""; ULTIMO_DIA_FRASE = None
-# --- ALTERAÇÃO: Configuração de Fonte de Dados ---
-# Mude para True para usar o link online ou False para usar o arquivo local.
-USAR_LINK_ONLINE = False  # Mude para True para usar o link abaixo
-
-# Cole aqui o link de compartilhamento direto para o download do arquivo Excel.
-# Exemplo (Google Sheets): Use "Arquivo > Fazer download > Microsoft Excel (.xlsx)" e copie o link.
-# Exemplo (SharePoint/OneDrive): Use a opção "Compartilhar" e crie um link que permita o acesso.
-LINK_PLANILHA_ONLINE = "COLE_SEU_LINK_DIRETO_AQUI"
-
-# --- Lógica para definir o caminho dos arquivos ---
-if getattr(sys, 'frozen', False):
-    script_dir = os.path.dirname(sys.executable)
-else:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-CAMINHO_PASTA_DADOS = os.path.join(script_dir, "dados")
-
-if USAR_LINK_ONLINE:
-    CAMINHO_PLANILHA_STATUS = LINK_PLANILHA_ONLINE
-    print(f"INFO: Usando planilha online do link.")
-else:
-    NOME_ARQUIVO_STATUS = "Status_dos_pedidos.xlsm"
-    CAMINHO_PLANILHA_STATUS = os.path.join(CAMINHO_PASTA_DADOS, NOME_ARQUIVO_STATUS)
-    print(f"INFO: Usando planilha local: {CAMINHO_PLANILHA_STATUS}")
-
-NOME_ARQUIVO_BANCO_DE_DADOS = "producao.db"
-CAMINHO_BANCO_DE_DADOS = os.path.join(CAMINHO_PASTA_DADOS, NOME_ARQUIVO_BANCO_DE_DADOS)
-
-COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD, COLUNA_EQUIPAMENTO = 'Pedido', 'PV', 'Servico', 'Status', 'Data Status', 'Qtd Maquinas', 'Equipamento'
-STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_CONCLUIDO, STATUS_CANCELADO, STATUS_URGENTE = 'Pendente', 'Aguardando Montagem', 'Aguardando Chegada', 'Em Montagem', 'Concluído', 'Cancelado', 'Urgente'
-
-# --- LÓGICA DE DADOS ---
-def carregar_dados():
-    print(f"Carregando dados de: {CAMINHO_PLANILHA_STATUS}")
-    try:
-        # O pandas lê diretamente de um caminho local ou de uma URL
-        df = pd.read_excel(CAMINHO_PLANILHA_STATUS, engine='openpyxl', parse_dates=[COLUNA_DATA_STATUS])
-    except Exception as e:
-        raise Exception(f"Não foi possível carregar a planilha. Verifique o caminho ou o link.\nErro: {e}")
+# Janela de silêncio: o Excel grava o arquivo em várias etapas, então só atualizamos
+# depois que os eventos do arquivo param de chegar por este intervalo.
+JANELA_SILENCIO_MS = 1500
 
-    df.columns = df.columns.str.strip()
-
-    for col, default_val in [(COLUNA_PV, "TERAVIX"), (COLUNA_SERVICO, "Detalhe não disponível"), (COLUNA_QTD, 0), (COLUNA_EQUIPAMENTO, "Não especificado")]:
-        if col not in df.columns: df[col] = default_val
-        else:
-            if col == COLUNA_QTD: df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            else: df[col] = df[col].astype(object).fillna(default_val)
-    df[COLUNA_QTD] = df[COLUNA_QTD].astype(int)
-
-    df[COLUNA_PEDIDO_ID] = df[COLUNA_PEDIDO_ID].astype(str)
-    df = df[df[COLUNA_PEDIDO_ID].str.startswith('CV-')].copy()
-
-    df_principal = df[~df[COLUNA_STATUS].isin([STATUS_CONCLUIDO, STATUS_CANCELADO])].copy()
-    hoje = datetime.now().date()
-    df_concluidos_hoje = df[(df[COLUNA_STATUS] == STATUS_CONCLUIDO) & (pd.to_datetime(df[COLUNA_DATA_STATUS], errors='coerce').dt.date == hoje)].sort_values(by=COLUNA_DATA_STATUS, ascending=False)
-    df_cancelados_hoje = df[(df[COLUNA_STATUS] == STATUS_CANCELADO) & (pd.to_datetime(df[COLUNA_DATA_STATUS], errors='coerce').dt.date == hoje)].sort_values(by=COLUNA_DATA_STATUS, ascending=False)
-
-    if not df_principal.empty:
-        df_principal['is_urgent'] = df_principal[COLUNA_STATUS].str.strip().str.lower() == STATUS_URGENTE.lower()
-        df_principal.reset_index(inplace=True)
-        df_principal.sort_values(by=['is_urgent', 'index'], ascending=[False, True], inplace=True)
-        df_principal.reset_index(drop=True, inplace=True)
-        df_principal['Prioridade'] = df_principal.index + 1
-
-    is_teravix_concluido = df_concluidos_hoje[COLUNA_PV].astype(str).str.contains('TERAVIX', na=False)
-    is_teravix_cancelado = df_cancelados_hoje[COLUNA_PV].astype(str).str.contains('TERAVIX', na=False)
-
-    teravix_concluidos = len(df_concluidos_hoje[is_teravix_concluido])
-    pv_concluidos = len(df_concluidos_hoje[~is_teravix_concluido])
-    total_concluidos = len(df_concluidos_hoje)
-    teravix_concluidos_qtd = df_concluidos_hoje[is_teravix_concluido][COLUNA_QTD].sum()
-    pv_concluidos_qtd = df_concluidos_hoje[~is_teravix_concluido][COLUNA_QTD].sum()
-    total_concluidos_qtd = df_concluidos_hoje[COLUNA_QTD].sum()
-
-    teravix_cancelados = len(df_cancelados_hoje[is_teravix_cancelado])
-    pv_cancelados = len(df_cancelados_hoje[~is_teravix_cancelado])
-    total_cancelados = len(df_cancelados_hoje)
-    teravix_cancelados_qtd = df_cancelados_hoje[is_teravix_cancelado][COLUNA_QTD].sum()
-    pv_cancelados_qtd = df_cancelados_hoje[~is_teravix_cancelado][COLUNA_QTD].sum()
-    total_cancelados_qtd = df_cancelados_hoje[COLUNA_QTD].sum()
-
-    return df, df_principal, df_concluidos_hoje, df_cancelados_hoje, \
-           (teravix_concluidos, pv_concluidos, total_concluidos, teravix_concluidos_qtd, pv_concluidos_qtd, total_concluidos_qtd), \
-           (teravix_cancelados, pv_cancelados, total_cancelados, teravix_cancelados_qtd, pv_cancelados_qtd, total_cancelados_qtd)
-
-def obter_frase_do_dia():
-    global FRASE_DO_DIA_ATUAL, ULTIMO_DIA_FRASE
-    hoje = datetime.now().date()
-    if ULTIMO_DIA_FRASE != hoje: FRASE_DO_DIA_ATUAL = random.choice(FRASES_MOTIVACIONAIS); ULTIMO_DIA_FRASE = hoje
-    return FRASE_DO_DIA_ATUAL
-
-def calcular_metricas_dashboard(df_full):
-    hoje = datetime.now()
-    inicio_mes_atual = hoje.replace(day=1, hour=0, minute=0, second=0)
-    df_concluidos_mes_atual = df_full[(df_full[COLUNA_STATUS] == STATUS_CONCLUIDO) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) >= inicio_mes_atual) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) <= hoje)]
-    total_mes_atual_pedidos = len(df_concluidos_mes_atual)
-    total_mes_atual_qtd = df_concluidos_mes_atual[COLUNA_QTD].sum()
-    dias_uteis_mes_atual = np.busday_count(inicio_mes_atual.strftime('%Y-%m-%d'), (hoje + timedelta(days=1)).strftime('%Y-%m-%d'))
-    media_diaria_atual = total_mes_atual_pedidos / dias_uteis_mes_atual if dias_uteis_mes_atual > 0 else 0
-    media_diaria_qtd = total_mes_atual_qtd / dias_uteis_mes_atual if dias_uteis_mes_atual > 0 else 0
-
-    fim_mes_anterior = inicio_mes_atual - timedelta(days=1); inicio_mes_anterior = fim_mes_anterior.replace(day=1)
-    df_concluidos_mes_anterior = df_full[(df_full[COLUNA_STATUS] == STATUS_CONCLUIDO) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) >= inicio_mes_anterior) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) <= fim_mes_anterior)]
-    total_mes_anterior = len(df_concluidos_mes_anterior)
-    dias_uteis_mes_anterior = np.busday_count(inicio_mes_anterior.strftime('%Y-%m-%d'), (fim_mes_anterior + timedelta(days=1)).strftime('%Y-%m-%d'))
-    media_diaria_anterior = len(df_concluidos_mes_anterior) / dias_uteis_mes_anterior if dias_uteis_mes_anterior > 0 else 0
-
-    recorde_dia_valor = 0; recorde_dia_data = ""; recorde_dia_qtd = 0
-    if not df_concluidos_mes_atual.empty:
-        producao_diaria = df_concluidos_mes_atual.groupby(pd.to_datetime(df_concluidos_mes_atual[COLUNA_DATA_STATUS]).dt.date).size()
-        if not producao_diaria.empty:
-            recorde_dia_valor = producao_diaria.max()
-            recorde_dia_data_obj = producao_diaria.idxmax()
-            recorde_dia_data = recorde_dia_data_obj.strftime('%d/%m/%Y')
-            recorde_dia_qtd = df_concluidos_mes_atual[pd.to_datetime(df_concluidos_mes_atual[COLUNA_DATA_STATUS]).dt.date == recorde_dia_data_obj][COLUNA_QTD].sum()
-
-    return {"total_mes_atual": total_mes_atual_pedidos, "total_mes_atual_qtd": total_mes_atual_qtd, "media_diaria_atual": media_diaria_atual, "media_diaria_qtd": media_diaria_qtd,
-            "total_mes_anterior": total_mes_anterior, "media_diaria_anterior": media_diaria_anterior,
-            "recorde_dia_valor": recorde_dia_valor, "recorde_dia_data": recorde_dia_data, "recorde_dia_qtd": recorde_dia_qtd}
-
-def calcular_dados_grafico(df_full):
-    df_concluidos = df_full.dropna(subset=[COLUNA_DATA_STATUS]).copy()
-    df_concluidos = df_concluidos[df_concluidos[COLUNA_STATUS] == STATUS_CONCLUIDO].copy()
-    if df_concluidos.empty: return []
-    df_concluidos['Semana'] = pd.to_datetime(df_concluidos[COLUNA_DATA_STATUS]).dt.to_period('W-SUN').dt.start_time
-    semanal = df_concluidos.groupby('Semana')[COLUNA_QTD].sum()
-    semanas_recentes = pd.date_range(end=datetime.now(), periods=4, freq='W-MON').normalize()
-    semanal = semanal.reindex(semanas_recentes, fill_value=0)
-    return list(semanal.items())
+# Listas com mais pedidos do que cabem na coluna avançam uma página sozinhas a cada intervalo (0 desliga)
+INTERVALO_PAGINA_MS = 8000
 
 class SignalEmitter(QObject):
     file_changed = Signal()
@@ -176,6 +55,61 @@ class FileChangeHandler(FileSystemEventHandler):
             print(f"Arquivo {NOME_ARQUIVO_STATUS} modificado. Enviando sinal para atualização.")
             self.signal_emitter.file_changed.emit()
 
+    def on_created(self, event):
+        self.on_modified(event)
+
+    def on_moved(self, event):
+        # O Excel pode salvar em um arquivo temporário e depois renomeá-lo para o nome final
+        if not event.is_directory and os.path.normpath(event.dest_path) == os.path.normpath(CAMINHO_PLANILHA_STATUS):
+            print(f"Arquivo {NOME_ARQUIVO_STATUS} substituído. Enviando sinal para atualização.")
+            self.signal_emitter.file_changed.emit()
+
+class SinaisCliente(QObject):
+    mensagem = Signal(object)     # quadro recebido do publicador (transmissao.ler_quadro)
+    conexao = Signal(bool, str)   # conectado, descrição
+
+class SinaisAtualizacao(QObject):
+    concluida = Signal(int, object)  # geração, ModeloVisao
+    falhou = Signal(int, str)        # geração, mensagem de erro
+    ignorada = Signal(int)           # geração; o conteúdo da planilha não mudou
+
+class TrabalhadorAtualizacao(QRunnable):
+    """
+    Executa leitura, sincronização e cálculos em segundo plano e entrega o ModeloVisao por sinal.
+    Com inicializar_banco, cria/migra o banco antes, para que a abertura do painel não espere por isso; com arquivar
+    (abertura e virada do dia), arquiva antes o histórico antigo, num passo à parte que não afeta a sincronização.
+    """
+    def __init__(self, geracao, sincronizar, filtro=None, inicializar_banco=False, arquivar=False):
+        super().__init__()
+        self.geracao = geracao
+        self.sincronizar = sincronizar
+        self.filtro = filtro
+        self.inicializar_banco = inicializar_banco
+        self.arquivar = arquivar
+        self.sinais = SinaisAtualizacao()
+        self.cancelamento = threading.Event()
+
+    def cancelar(self):
+        self.cancelamento.set()
+
+    def run(self):
+        try:
+            if self.inicializar_banco:
+                try:
+                    inicializar_banco_de_dados()
+                except Exception as e:
+                    raise RuntimeError(f"Não foi possível criar o banco de dados: {e}") from e
+            # Só quem sincroniza grava no banco; no modo online o arquivamento fica com o publicador ou o 'cli.py arquivar'
+            if (self.arquivar or self.inicializar_banco) and self.sincronizar: arquivar_historico_se_preciso()
+            modelo = executar_atualizacao_se_mudou(self.sincronizar, self.filtro, self.cancelamento.is_set)
+            # Salvamento sem alterações (ou resposta 304 no modo online): a leitura da planilha foi evitada
+            if modelo is ATUALIZACAO_IGNORADA: self.sinais.ignorada.emit(self.geracao)
+            elif modelo is not None:
+                salvar_quadro(CAMINHO_ULTIMO_MODELO, quadro_modelo(modelo))  # a próxima abertura do painel começa deste modelo
+                self.sinais.concluida.emit(self.geracao, modelo)
+        except Exception as e:
+            if not self.cancelamento.is_set(): self.sinais.falhou.emit(self.geracao, str(e))
+
 # --- STYLESHEET (Folha de Estilos) ---
 STYLESHEET = f"""
     QMainWindow {{ background-color: #1C1C1C; }} QLabel {{ color: #E0E0E0; }}
@@ -204,24 +138,329 @@ STYLESHEET = f"""
     #NotificationLabel[error="true"] {{
         background-color: #E74C3C;
     }}
+    #AvisoDesatualizado {{ color: #F39C12; font-style: italic; }}
+    #DiagnosticoLabel {{ background-color: rgba(0, 0, 0, 210); color: #9EE09E; border: 1px solid #555; border-radius: 5px; padding: 10px; }}
 """
 
+# --- WIDGETS REAPROVEITÁVEIS ---
+class CardPrioridade(QFrame):
+    """Card de prioridade criado uma vez; atualizar() apenas troca textos e o estilo do status."""
+    def __init__(self, scale):
+        super().__init__()
+        self.scale = scale
+        self.setObjectName("Card"); self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        layout = QVBoxLayout(self)
+        layout.setSpacing(scale(6))
+
+        self.titulo = QLabel(); self.titulo.setObjectName("CardTitle"); self.titulo.setFont(QFont("Inter", scale(12))); self.titulo.setWordWrap(True)
+        self.status = QLabel(); self.status.setFont(QFont("Inter", scale(10), QFont.Bold))
+
+        self.equipamento = QLabel(); self.equipamento.setWordWrap(True)
+        self.equipamento.setFont(QFont("Inter", scale(10)))
+        self.equipamento.setStyleSheet("color: #E0E0E0;")
+
+        self.servico = QLabel(); self.servico.setWordWrap(True)
+        self.servico.setFont(QFont("Inter", scale(9), italic=True))
+        self.servico.setStyleSheet("color: #AAAAAA;")
+
+        self.qtd = QLabel()
+        self.qtd.setFont(QFont("Inter", scale(10), QFont.Bold))
+        self.qtd.setStyleSheet("color: #2ECC71;")
+
+        layout.addWidget(self.titulo)
+        layout.addWidget(self.status)
+        layout.addSpacing(scale(8))
+        layout.addWidget(self.equipamento)
+        layout.addWidget(self.servico)
+        layout.addStretch()
+        layout.addWidget(self.qtd)
+
+    def atualizar(self, dados):
+        pos_lista, data = dados
+
+        pos_priority_html = f"<b>{pos_lista}º (P{data['Prioridade']}):</b>"
+        cv_html = f"<span style='font-size:{self.scale(10)}pt; font-weight:bold;'> {data[COLUNA_PEDIDO_ID]}</span>"
+        pv_html = f"<span style='font-weight:bold;'> ({data[COLUNA_PV]})</span>"
+        self.titulo.setText(f"{pos_priority_html}{cv_html}{pv_html}")
+
+        self.status.setText(str(data.get(COLUNA_STATUS, 'N/A')).upper())
+        current_status = str(data[COLUNA_STATUS]).strip().lower()
+        if current_status == STATUS_URGENTE.lower(): nome_status = "CardStatus_Urgente"
+        elif current_status == STATUS_AGUARDANDO.lower(): nome_status = "CardStatus_Aguardando"
+        elif current_status == STATUS_EM_MONTAGEM.lower(): nome_status = "CardStatus_EmMontagem"
+        else: nome_status = ""
+        if self.status.objectName() != nome_status:
+            # O seletor #id da folha de estilos só é reavaliado após um novo polish
+            self.status.setObjectName(nome_status); self.status.style().unpolish(self.status); self.status.style().polish(self.status)
+
+        equipamento_texto = str(data.get(COLUNA_EQUIPAMENTO, ''))
+        self.equipamento.setText(equipamento_texto)
+        self.equipamento.setVisible(bool(equipamento_texto) and equipamento_texto != "Não especificado")
+        self.servico.setText(str(data.get(COLUNA_SERVICO, 'N/A')))
+        self.qtd.setText(f"<b>QTD. MÁQUINAS:</b> {data[COLUNA_QTD]}")
+
+class SecaoLista:
+    """
+    Seção de uma coluna (título, itens e contador "+N") cujos widgets são reaproveitados entre atualizações.
+    Os itens são indexados pelo Pedido: só os que mudaram são atualizados e os que saem vão para uma reserva.
+    """
+    def __init__(self, layout, titulo, criar_item, limite, texto_vazio, fonte_vazio=None, texto_contador=None, fonte_contador=None):
+        self.criar_item = criar_item; self.limite = limite; self.texto_contador = texto_contador
+        self.widgets = {}; self.dados = {}; self.ordem = []; self.reserva = []
+        self.widgets_criados = 0; self.widgets_atualizados = 0
+
+        layout.addWidget(titulo)
+        self.vazio = QLabel(texto_vazio)
+        if fonte_vazio is not None: self.vazio.setFont(fonte_vazio)
+        layout.addWidget(self.vazio)
+        self.itens_layout = QVBoxLayout(); self.itens_layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(self.itens_layout)
+        self.contador = QLabel(); self.contador.setObjectName("CounterLabel"); self.contador.hide()
+        if fonte_contador is not None: self.contador.setFont(fonte_contador)
+        layout.addWidget(self.contador)
+
+    def atualizar(self, itens, total):
+        """Recebe pares (pedido, dados) já ordenados e o total de pedidos da seção."""
+        itens = itens[:self.limite]
+        chaves = [chave for chave, _ in itens]
+
+        for chave in set(self.widgets) - set(chaves):
+            widget = self.widgets.pop(chave); del self.dados[chave]
+            self.itens_layout.removeWidget(widget); widget.hide(); self.reserva.append(widget)
+
+        for chave, dados in itens:
+            widget = self.widgets.get(chave)
+            if widget is None:
+                if self.reserva: widget = self.reserva.pop()
+                else: widget = self.criar_item(); self.widgets_criados += 1
+                self.widgets[chave] = widget
+            if self.dados.get(chave) != dados:
+                widget.atualizar(dados); self.dados[chave] = dados; self.widgets_atualizados += 1
+
+        if chaves != self.ordem:
+            for chave in self.ordem:
+                if chave in self.widgets: self.itens_layout.removeWidget(self.widgets[chave])
+            for chave in chaves:
+                self.itens_layout.addWidget(self.widgets[chave]); self.widgets[chave].show()
+            self.ordem = chaves
+
+        self.vazio.setVisible(total == 0)
+        restantes = total - len(itens)
+        if self.texto_contador is not None and restantes > 0:
+            self.contador.setText(self.texto_contador.format(restantes)); self.contador.show()
+        else:
+            self.contador.hide()
+
+class ModeloPedidos(QAbstractListModel):
+    """
+    Pedidos de uma coluna do painel, cada linha um dicionário (titulo, pv, qtd, detalhe) no papel Qt.UserRole.
+    atualizar() reconcilia pela chave (Pedido) e emite só as remoções, inserções e dataChanged das linhas que mudaram.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chaves = []; self.linhas = []
+        self.linhas_sinalizadas = 0  # inserções, remoções e alterações emitidas desde a criação
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.linhas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        if role == Qt.UserRole: return self.linhas[index.row()]
+        if role == Qt.DisplayRole: return self.linhas[index.row()]['titulo']
+        return None
+
+    def atualizar(self, itens):
+        """Recebe pares (pedido, linha) já ordenados."""
+        novas = dict(itens); chaves = [chave for chave, _ in itens]; atuais = set(self.chaves)
+        if len(novas) != len(itens) or [chave for chave in self.chaves if chave in novas] != [chave for chave in chaves if chave in atuais]:
+            # Pedidos que continuam mudaram de ordem entre si (ou há chave repetida): um único reset sai mais barato que mover linha a linha
+            self.beginResetModel()
+            self.chaves = chaves; self.linhas = [linha for _, linha in itens]
+            self.endResetModel()
+            self.linhas_sinalizadas += len(self.linhas); return
+        # Remove do fim para o começo, em trechos contíguos, para que os índices anteriores continuem valendo
+        fim = None
+        for linha in range(len(self.chaves) - 1, -2, -1):
+            if linha >= 0 and self.chaves[linha] not in novas:
+                fim = linha if fim is None else fim
+            elif fim is not None:
+                self.remover_linhas(linha + 1, fim); fim = None
+        # Com os que sobraram já na ordem nova, insere os pedidos novos em ordem crescente de posição
+        inicio = None
+        for linha, chave in enumerate(chaves + [None]):
+            if chave is not None and chave not in atuais:
+                inicio = linha if inicio is None else inicio
+            elif inicio is not None:
+                self.inserir_linhas(inicio, chaves[inicio:linha], [novas[c] for c in chaves[inicio:linha]]); inicio = None
+        self.sinalizar_alteradas(0, [novas[chave] for chave in chaves])
+
+    def remover_linhas(self, primeira, ultima):
+        self.beginRemoveRows(QModelIndex(), primeira, ultima)
+        del self.chaves[primeira:ultima + 1]; del self.linhas[primeira:ultima + 1]
+        self.endRemoveRows()
+        self.linhas_sinalizadas += ultima - primeira + 1
+
+    def inserir_linhas(self, inicio, chaves, linhas):
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(chaves) - 1)
+        self.chaves[inicio:inicio] = chaves; self.linhas[inicio:inicio] = linhas
+        self.endInsertRows()
+        self.linhas_sinalizadas += len(chaves)
+
+    def sinalizar_alteradas(self, inicio, linhas):
+        """Troca as linhas a partir de inicio e emite um dataChanged por trecho contíguo de linhas alteradas."""
+        trecho = None
+        for linha, dados in enumerate(linhas, start=inicio):
+            if self.linhas[linha] != dados:
+                self.linhas[linha] = dados
+                trecho = (trecho[0] if trecho else linha, linha)
+            elif trecho:
+                self.emitir_alteradas(*trecho); trecho = None
+        if trecho: self.emitir_alteradas(*trecho)
+
+    def emitir_alteradas(self, primeira, ultima):
+        self.linhas_sinalizadas += ultima - primeira + 1
+        self.dataChanged.emit(self.index(primeira), self.index(ultima))
+
+class DelegatePedido(QStyledItemDelegate):
+    """Desenha a linha do pedido direto no QPainter: título em negrito, PV, quantidade em verde e, se houver, o equipamento abaixo."""
+    COR_TEXTO, COR_QTD, COR_DETALHE = QColor("#E0E0E0"), QColor("#2ECC71"), QColor("#AAAAAA")
+
+    def __init__(self, font_item, scale, parent=None):
+        super().__init__(parent)
+        self.font_item = font_item
+        self.font_negrito = QFont(font_item); self.font_negrito.setBold(True)
+        self.font_detalhe = QFont("Inter", scale(9), italic=True)
+        self.espaco = scale(6)
+        self.altura_linha = QFontMetrics(self.font_negrito).height(); self.altura_detalhe = QFontMetrics(self.font_detalhe).height()
+
+    def sizeHint(self, option, index):
+        detalhe = index.data(Qt.UserRole).get('detalhe')
+        return QSize(option.rect.width(), self.altura_linha + (self.altura_detalhe if detalhe else 0) + self.espaco)
+
+    def paint(self, painter, option, index):
+        linha = index.data(Qt.UserRole)
+        area = option.rect.adjusted(0, self.espaco // 2, 0, 0)
+        painter.save()
+        x = area.left(); base = area.top() + QFontMetrics(self.font_negrito).ascent()
+        for fonte, cor, texto in ((self.font_negrito, self.COR_TEXTO, linha['titulo']), (self.font_item, self.COR_TEXTO, f" ({linha['pv']}) "),
+                                  (self.font_item, self.COR_QTD, f"\"{linha['qtd']}\"")):
+            if x >= area.right(): break
+            metricas = QFontMetrics(fonte); texto = metricas.elidedText(texto, Qt.ElideRight, area.right() - x)
+            painter.setFont(fonte); painter.setPen(cor); painter.drawText(x, base, texto)
+            x += metricas.horizontalAdvance(texto)
+        if linha.get('detalhe'):
+            metricas = QFontMetrics(self.font_detalhe)
+            painter.setFont(self.font_detalhe); painter.setPen(self.COR_DETALHE)
+            painter.drawText(area.left() + self.espaco, area.top() + self.altura_linha + metricas.ascent(),
+                             metricas.elidedText(f"└─ {linha['detalhe']}", Qt.ElideRight, area.width() - self.espaco))
+        painter.restore()
+
+class ListaPedidos(QListView):
+    """Lista virtualizada (só as linhas visíveis são desenhadas), sem barra de rolagem e com avanço automático de página."""
+    pagina_mudou = Signal()
+
+    def __init__(self, modelo, delegate):
+        super().__init__()
+        self.setModel(modelo); self.setItemDelegate(delegate)
+        self.setUniformItemSizes(True)  # todas as linhas de uma coluna têm a mesma altura
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff); self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QListView.NoSelection); self.setFocusPolicy(Qt.NoFocus); self.setFrameShape(QFrame.NoFrame)
+        self.setStyleSheet("QListView { background: transparent; }")
+        self.verticalScrollBar().rangeChanged.connect(lambda *_: self.pagina_mudou.emit())
+        modelo.rowsInserted.connect(lambda *_: self.ajustar_area()); modelo.modelReset.connect(self.ajustar_area)
+        self.timer_pagina = QTimer(self); self.timer_pagina.timeout.connect(self.avancar_pagina)
+        if INTERVALO_PAGINA_MS: self.timer_pagina.start(INTERVALO_PAGINA_MS)
+
+    def resizeEvent(self, event):
+        self.ajustar_area(); super().resizeEvent(event)
+
+    def ajustar_area(self):
+        """Deixa a área visível com um número inteiro de linhas, para a página não terminar em uma linha cortada."""
+        altura_linha = self.sizeHintForRow(0) if self.model().rowCount() else 0
+        sobra = self.height() % altura_linha if altura_linha > 0 else 0
+        if self.viewportMargins().bottom() != sobra: self.setViewportMargins(0, 0, 0, sobra)
+
+    def avancar_pagina(self):
+        barra = self.verticalScrollBar()
+        if barra.maximum() == 0: return
+        barra.setValue(0 if barra.value() >= barra.maximum() else min(barra.value() + barra.pageStep(), barra.maximum()))
+        self.pagina_mudou.emit()
+
+    def paginas(self):
+        """(página atual, total de páginas) da rolagem, que é por linha: pageStep é o número de linhas visíveis."""
+        barra = self.verticalScrollBar(); passo = max(barra.pageStep(), 1)
+        total = -(-(barra.maximum() + passo) // passo)
+        return (total if barra.value() >= barra.maximum() else barra.value() // passo + 1), total
+
+class SecaoPedidos:
+    """Seção de uma coluna (título, lista virtualizada e contador de páginas) que mostra todos os pedidos, não só os primeiros."""
+    def __init__(self, layout, titulo, delegate, texto_vazio, fonte_vazio=None, fonte_contador=None, estica=1):
+        self.total = 0
+        layout.addWidget(titulo)
+        self.vazio = QLabel(texto_vazio)
+        if fonte_vazio is not None: self.vazio.setFont(fonte_vazio)
+        layout.addWidget(self.vazio)
+        self.modelo = ModeloPedidos(); self.lista = ListaPedidos(self.modelo, delegate)
+        layout.addWidget(self.lista, estica)
+        self.contador = QLabel(); self.contador.setObjectName("CounterLabel"); self.contador.hide()
+        if fonte_contador is not None: self.contador.setFont(fonte_contador)
+        layout.addWidget(self.contador)
+        self.lista.pagina_mudou.connect(self.atualizar_contador)
+
+    def atualizar(self, itens, total):
+        """Recebe pares (pedido, linha) já ordenados e o total de pedidos da seção."""
+        self.total = total
+        self.modelo.atualizar(itens)
+        self.vazio.setVisible(total == 0)
+        self.atualizar_contador()
+
+    def atualizar_contador(self):
+        pagina, paginas = self.lista.paginas()
+        if paginas > 1:
+            self.contador.setText(f"{self.total} pedidos · página {pagina}/{paginas}"); self.contador.show()
+        else:
+            self.contador.hide()
+
 class PainelMtec(QMainWindow):
-    def __init__(self):
+    def __init__(self, publicador=None, endereco_http=None):
+        """
+        publicador: (host, porta) para o modo cliente, que só desenha os modelos recebidos do processo publicador.
+        endereco_http: (host, porta) para servir também o estado do painel em JSON (servidor_http.py).
+        """
         super().__init__()
         self.setWindowTitle("Painel de Produção MTEC"); self.setGeometry(100, 100, 1920, 1080);
         self.setStyleSheet(STYLESHEET)
         
         self.main_container = QWidget(); self.error_container = QWidget(); self.is_showing_error = False
 
+        # Uma única thread de atualização: uma nova mudança cancela a anterior em vez de enfileirar
+        self.pool_atualizacao = QThreadPool(self); self.pool_atualizacao.setMaxThreadCount(1)
+        self.trabalhador_atual = None; self.geracao_atualizacao = 0
+        self.filtro_mudancas = FiltroMudancasArquivo(CAMINHO_PLANILHA_STATUS)
+        self.publicador = publicador; self.modelo_recebido = False
+        self.banco_inicializado = publicador is not None  # o banco é criado/migrado pela primeira atualização, fora da thread da UI
+        # Horário do último modelo salvo, desenhado como desatualizado na abertura; tempos da inicialização para o log
+        self.modelo_salvo = None; self.primeiro_quadro = None; self.inicializacao_registrada = False
+        # No modo cliente o log fica só em memória: o publicador já grava o seu, e os painéis podem dividir a mesma pasta
+        if publicador is None: os.makedirs(CAMINHO_PASTA_DADOS, exist_ok=True)
+        self.registro_atualizacoes = RegistroAtualizacoes(None if publicador else CAMINHO_LOG_ATUALIZACOES)
+        self.estado_http = self.servidor_http = None
+        if endereco_http is not None:
+            self.estado_http = EstadoPainel(); self.servidor_http = ServidorPainel(self.estado_http, *endereco_http); self.servidor_http.iniciar()
+
         # --- CORREÇÃO: A UI é criada ANTES de qualquer função que possa mostrar um erro ---
         self.setup_ui()
-        self.inicializar_banco_de_dados()
-        
+        self.mostrar_ultimo_modelo()
+        if publicador is not None:
+            self.setup_cliente()
+            return
+
         if USAR_LINK_ONLINE:
             self.setup_online_timer()
         else:
             self.setup_file_watcher()
+        self.setup_timer_meia_noite()
             
         self.atualizar_dados_e_ui()
 
@@ -229,29 +468,36 @@ class PainelMtec(QMainWindow):
         """Aplica o fator de escala a um tamanho base."""
         return int(size * SCALE_FACTOR)
 
-    def inicializar_banco_de_dados(self):
+    def mostrar_ultimo_modelo(self):
+        """Desenha o último modelo salvo, marcado como desatualizado, para a tela não ficar vazia durante a primeira atualização."""
+        salvo = carregar_ultimo_modelo(CAMINHO_ULTIMO_MODELO)
+        if salvo is None: return
+        modelo, calculado_em = salvo
         try:
-            # --- CORREÇÃO: Usa a variável correta para o caminho ---
-            os.makedirs(CAMINHO_PASTA_DADOS, exist_ok=True)
-            print(f"Verificando/Criando banco de dados em: {CAMINHO_BANCO_DE_DADOS}")
-            conexao = sqlite3.connect(CAMINHO_BANCO_DE_DADOS)
-            cursor = conexao.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS concluidos (
-                    data_conclusao TEXT,
-                    pedido_id TEXT PRIMARY KEY,
-                    pv TEXT,
-                    qtd_maquinas INTEGER,
-                    equipamento TEXT,
-                    servico TEXT
-                )
-            ''')
-            conexao.commit()
-            conexao.close()
-            print(f"Banco de dados '{NOME_ARQUIVO_BANCO_DE_DADOS}' inicializado com sucesso.")
+            self.desenhar_modelo(modelo)
         except Exception as e:
-            print(f"ERRO CRÍTICO ao inicializar o banco de dados: {e}")
-            self.mostrar_erro(f"Não foi possível criar o banco de dados: {e}")
+            print(f"AVISO: O último modelo salvo não pôde ser desenhado: {e}"); return
+        self.modelo_salvo = calculado_em
+        self.aviso_desatualizado.setText(f"Dados de {calculado_em:%d/%m %H:%M} · {'aguardando o publicador' if self.publicador else 'atualizando'}...")
+        self.aviso_desatualizado.show()
+        print(f"INFO: Mostrando o último modelo salvo ({calculado_em:%d/%m/%Y %H:%M}) até a primeira atualização.")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.primeiro_quadro is None:
+            self.primeiro_quadro = time.perf_counter() - INICIO_PROCESSO
+            print(f"INFO: Primeiro quadro na tela em {self.primeiro_quadro:.3f}s ({'último modelo salvo' if self.modelo_salvo else 'ainda sem dados'}).")
+
+    def registrar_inicializacao(self, atualizou):
+        """Na primeira atualização (concluída ou com falha), tira o aviso de desatualizado e grava os tempos da abertura no log."""
+        if self.inicializacao_registrada: return
+        self.inicializacao_registrada = True
+        agora = time.perf_counter() - INICIO_PROCESSO
+        if self.primeiro_quadro is None: self.primeiro_quadro = agora  # os dados chegaram antes da primeira pintura
+        if atualizou:
+            self.aviso_desatualizado.hide()
+            print(f"INFO: Dados atuais na tela em {agora:.3f}s desde o início.")
+        self.registro_atualizacoes.registrar_inicializacao(self.primeiro_quadro, agora if atualizou else None, self.modelo_salvo)
 
 
     def setup_ui(self):
@@ -261,7 +507,10 @@ class PainelMtec(QMainWindow):
         
         header = QWidget(); header.setObjectName("Header"); header.setFixedHeight(self.scale(60)); header_layout = QHBoxLayout(header); header_layout.setContentsMargins(20, 0, 20, 0)
         
-        logo_label = QLabel("mtec."); logo_label.setObjectName("LogoLabel"); logo_label.setFont(QFont("Inter", self.scale(22), QFont.Bold)); header_layout.addWidget(logo_label); header_layout.addStretch(); main_layout.addWidget(header)
+        logo_label = QLabel("mtec."); logo_label.setObjectName("LogoLabel"); logo_label.setFont(QFont("Inter", self.scale(22), QFont.Bold)); header_layout.addWidget(logo_label); header_layout.addStretch()
+        # Aviso enquanto a tela mostra o último modelo salvo, antes da primeira atualização
+        self.aviso_desatualizado = QLabel(); self.aviso_desatualizado.setObjectName("AvisoDesatualizado"); self.aviso_desatualizado.setFont(QFont("Inter", self.scale(12))); self.aviso_desatualizado.hide()
+        header_layout.addWidget(self.aviso_desatualizado); main_layout.addWidget(header)
 
         self.body_widget = QWidget()
         self.body_layout = QHBoxLayout(self.body_widget)
@@ -277,9 +526,19 @@ class PainelMtec(QMainWindow):
 
         self.notification_label = QLabel(self); self.notification_label.setObjectName("NotificationLabel"); self.notification_label.setWordWrap(True); self.notification_label.hide()
 
+        # Overlay de diagnóstico (F12): tempos das últimas atualizações, escondido por padrão
+        self.diagnostico_label = QLabel(self); self.diagnostico_label.setObjectName("DiagnosticoLabel"); self.diagnostico_label.hide()
+        fonte_diagnostico = QFont("Consolas", self.scale(10)); fonte_diagnostico.setStyleHint(QFont.Monospace); self.diagnostico_label.setFont(fonte_diagnostico)
+
     def setup_ui_columns(self):
         self.limpar_layout(self.body_layout); self.limpar_layout(self.dashboard_layout)
 
+        self.font_titulo = QFont("Inter", self.scale(16), QFont.Bold)
+        self.font_item = QFont("Inter", self.scale(10))
+        self.font_contador = QFont("Inter", self.scale(9))
+        self.font_total = QFont("Inter", self.scale(9))
+        font_vazio = QFont("Inter", self.scale(12))
+
         self.prioridades_layout = QVBoxLayout()
         self.prioridades_layout.setSpacing(self.scale(15))
 
@@ -291,9 +550,8 @@ class PainelMtec(QMainWindow):
         self.em_montagem_layout.setContentsMargins(0, self.scale(20), 0, 0); self.em_montagem_layout.setSpacing(0)
 
         coluna_combinada_montagem = QVBoxLayout()
-        coluna_combinada_montagem.addLayout(self.aguardando_montagem_layout)
-        coluna_combinada_montagem.addWidget(self.em_montagem_container)
-        coluna_combinada_montagem.addStretch()
+        coluna_combinada_montagem.addLayout(self.aguardando_montagem_layout, 1)
+        coluna_combinada_montagem.addWidget(self.em_montagem_container, 1)
 
         self.body_layout.addLayout(self.prioridades_layout, 2)
         self.body_layout.addLayout(coluna_combinada_montagem, 1)
@@ -303,24 +561,113 @@ class PainelMtec(QMainWindow):
         side_column_frame = QFrame(); side_column_frame.setObjectName("SideColumnFrame"); side_column_frame.setFixedWidth(self.scale(300))
         self.side_layout = QVBoxLayout(side_column_frame)
         self.concluidos_layout = QVBoxLayout(); self.cancelados_layout = QVBoxLayout()
-        self.side_layout.addLayout(self.concluidos_layout); self.side_layout.addStretch(1)
+        self.side_layout.addLayout(self.concluidos_layout, 2)
         linea_separadora = QFrame(); linea_separadora.setFrameShape(QFrame.HLine); linea_separadora.setFrameShadow(QFrame.Sunken); linea_separadora.setStyleSheet("background-color: #444; min-height: 1px; border: none;"); self.side_layout.addWidget(linea_separadora); self.side_layout.addSpacing(20)
-        self.side_layout.addLayout(self.cancelados_layout); self.side_layout.addStretch(2)
+        self.side_layout.addLayout(self.cancelados_layout, 1)
         self.body_layout.addWidget(side_column_frame)
 
-        self.metricas_layout = QVBoxLayout(); self.grafico_layout = QVBoxLayout(); self.kpi_layout = QVBoxLayout()
-        self.dashboard_layout.addLayout(self.metricas_layout, 1); self.dashboard_layout.addLayout(self.grafico_layout, 2); self.dashboard_layout.addStretch(1); self.dashboard_layout.addLayout(self.kpi_layout, 1)
+        # As seções são criadas uma única vez; cada atualização só reconcilia os itens
+        self.secao_prioridades = SecaoLista(self.prioridades_layout, self.criar_titulo("PRIORIDADES", "PrioridadesTitle", self.font_titulo),
+                                            lambda: CardPrioridade(self.scale), 4, "Nenhuma prioridade para exibir.", font_vazio)
+        self.prioridades_layout.addStretch()
+
+        # As listas de pedidos são virtualizadas: um único delegate desenha as linhas visíveis de todas elas
+        self.delegate_pedido = DelegatePedido(self.font_item, self.scale, self)
+        self.secoes_verticais = {}
+        for layout, titulo_texto in [(self.em_montagem_layout, "EM MONTAGEM FORA DA PRIORIDADE"), (self.pendentes_layout, "PENDENTES"),
+                                     (self.aguardando_montagem_layout, "AGUARDANDO MONTAGEM"), (self.aguardando_chegada_layout, "AGUARDANDO CHEGADA")]:
+            object_name = f"{titulo_texto.replace(' ', '')}Title"
+            self.secoes_verticais[titulo_texto] = SecaoPedidos(layout, self.criar_titulo(titulo_texto, object_name, self.font_titulo),
+                                                               self.delegate_pedido, "Nenhum pedido para exibir.", font_vazio, self.font_contador)
+
+        self.secoes_laterais = {}; self.totais_laterais = {}
+        for layout, titulo_texto in [(self.concluidos_layout, "CONCLUÍDOS DO DIA"), (self.cancelados_layout, "CANCELADOS DO DIA")]:
+            object_name = f"{titulo_texto.replace(' ', '')}Title"
+            self.secoes_laterais[titulo_texto] = SecaoPedidos(layout, self.criar_titulo(titulo_texto, object_name, self.font_titulo),
+                                                              self.delegate_pedido, "Nenhum.", None, self.font_contador)
+            total_label = QLabel(); total_label.setObjectName("TotalLabel"); total_label.setFont(self.font_total)
+            layout.addWidget(total_label)
+            self.totais_laterais[titulo_texto] = total_label
+
+        self.metricas_layout = QVBoxLayout(); self.grafico_layout = QVBoxLayout(); self.fluxo_layout = QVBoxLayout(); self.kpi_layout = QVBoxLayout()
+        self.dashboard_layout.addLayout(self.metricas_layout, 1); self.dashboard_layout.addLayout(self.grafico_layout, 2); self.dashboard_layout.addSpacing(self.scale(20))
+        self.dashboard_layout.addLayout(self.fluxo_layout, 1); self.dashboard_layout.addSpacing(self.scale(20)); self.dashboard_layout.addLayout(self.kpi_layout, 1)
+        self.setup_dashboard()
+
+    def setup_dashboard(self):
+        """Cria os rótulos e barras do dashboard; desenhar_dashboard apenas atualiza seus valores."""
+        titulo_metrica_font = QFont("Inter", self.scale(12), QFont.Bold)
+        valor_metrica_font = QFont("Inter", self.scale(32), QFont.Bold)
+
+        total_mes_titulo = QLabel("Total Concluído no Mês"); total_mes_titulo.setObjectName("MetricaTitle"); total_mes_titulo.setFont(titulo_metrica_font)
+        self.total_mes_valor = QLabel(); self.total_mes_valor.setObjectName("MetricaValue"); self.total_mes_valor.setFont(valor_metrica_font)
+
+        media_diaria_titulo = QLabel("Média Diária no Mês"); media_diaria_titulo.setObjectName("MetricaTitle"); media_diaria_titulo.setFont(titulo_metrica_font)
+        self.media_diaria_valor = QLabel(); self.media_diaria_valor.setObjectName("MetricaValue"); self.media_diaria_valor.setFont(valor_metrica_font)
+
+        self.metricas_layout.addWidget(total_mes_titulo); self.metricas_layout.addWidget(self.total_mes_valor); self.metricas_layout.addStretch(1); self.metricas_layout.addWidget(media_diaria_titulo); self.metricas_layout.addWidget(self.media_diaria_valor); self.metricas_layout.addStretch(1)
+
+        titulo_grafico = QLabel(f"Desempenho Semanal (Meta: {META_SEMANAL} máq.)"); titulo_grafico.setFont(titulo_metrica_font)
+        self.grafico_layout.addWidget(titulo_grafico)
+
+        self.barras_semana = []
+        for _ in range(4):
+            label_semana = QLabel(); label_semana.setFont(QFont("Inter", self.scale(10)))
+            progress_bar = QProgressBar(); progress_bar.setRange(0, META_SEMANAL); progress_bar.setTextVisible(False);
+            progress_bar.setFixedHeight(self.scale(18)); progress_bar.setMaximumWidth(self.scale(550))
+            self.grafico_layout.addWidget(label_semana); self.grafico_layout.addWidget(progress_bar)
+            self.barras_semana.append((label_semana, progress_bar))
+        self.grafico_layout.addStretch()
+
+        kpi_titulo_font = QFont("Inter", self.scale(11), QFont.Bold)
+        kpi_valor_font = QFont("Inter", self.scale(12), QFont.Bold)
+
+        # Indicadores de fluxo (histórico de status): lead time, WIP e tempo em cada status
+        self.fluxo_textos = []
+        for titulo_texto in (f"Lead Time p50 / p90 (últimas {SEMANAS_PAINEL} semanas)", "Pedidos em Aberto (WIP)", "Tempo Mediano em Cada Status"):
+            titulo = QLabel(titulo_texto); titulo.setObjectName("KpiTitle"); titulo.setFont(kpi_titulo_font)
+            texto = QLabel(); texto.setFont(QFont("Inter", self.scale(10))); texto.setWordWrap(True)
+            self.fluxo_layout.addWidget(titulo); self.fluxo_layout.addWidget(texto); self.fluxo_layout.addStretch(1)
+            self.fluxo_textos.append(texto)
+
+        frase_titulo = QLabel("Frase do Dia"); frase_titulo.setObjectName("KpiTitle"); frase_titulo.setFont(kpi_titulo_font)
+        self.frase_texto = QLabel(); self.frase_texto.setObjectName("FraseMotivacional"); self.frase_texto.setWordWrap(True);
+        self.frase_texto.setFont(QFont("Inter", self.scale(10), italic=True))
+        self.kpi_layout.addWidget(frase_titulo); self.kpi_layout.addWidget(self.frase_texto); self.kpi_layout.addStretch(1)
+
+        comp_titulo = QLabel("Comparativo Mensal (Mês Anterior)"); comp_titulo.setObjectName("KpiTitle"); comp_titulo.setFont(kpi_titulo_font)
+        self.comp_texto = QLabel(); self.comp_texto.setFont(QFont("Inter", self.scale(10)))
+        self.kpi_layout.addWidget(comp_titulo); self.kpi_layout.addWidget(self.comp_texto); self.kpi_layout.addStretch(2)
+
+        recorde_titulo = QLabel("Recorde de Produção do Mês"); recorde_titulo.setObjectName("KpiTitle"); recorde_titulo.setFont(kpi_titulo_font)
+        self.recorde_texto = QLabel(); self.recorde_texto.setFont(kpi_valor_font)
+        self.kpi_layout.addWidget(recorde_titulo); self.kpi_layout.addWidget(self.recorde_texto); self.kpi_layout.addStretch(1)
 
     def setup_file_watcher(self):
         os.makedirs(CAMINHO_PASTA_DADOS, exist_ok=True)
         self.signal_emitter = SignalEmitter()
-        self.signal_emitter.file_changed.connect(self.atualizar_dados_e_ui)
+        self.signal_emitter.file_changed.connect(self.registrar_mudanca_arquivo)
+        self.timer_silencio = QTimer(self); self.timer_silencio.setSingleShot(True); self.timer_silencio.setInterval(JANELA_SILENCIO_MS)
+        self.timer_silencio.timeout.connect(self.processar_mudanca_arquivo)
         event_handler = FileChangeHandler(self.signal_emitter)
         self.observer = Observer()
         self.observer.schedule(event_handler, path=CAMINHO_PASTA_DADOS, recursive=False)
         self.observer.start()
         print(f"Monitorando a pasta '{CAMINHO_PASTA_DADOS}' por mudanças...")
     
+    def registrar_mudanca_arquivo(self):
+        """Reinicia a janela de silêncio a cada evento, agrupando uma rajada de eventos em uma única atualização."""
+        if self.timer_silencio.isActive(): self.filtro_mudancas.contar('eventos_recebidos', 'eventos_agrupados')
+        else: self.filtro_mudancas.contar('eventos_recebidos')
+        self.timer_silencio.start()
+
+    def processar_mudanca_arquivo(self):
+        if not self.filtro_mudancas.metadados_mudaram():
+            self.filtro_mudancas.contar('atualizacoes_ignoradas')
+            print(f"INFO: Tamanho e data da planilha não mudaram; atualização ignorada ({self.filtro_mudancas.resumo()}).")
+            return
+        self.atualizar_dados_e_ui()
+
     def setup_online_timer(self):
         """Configura um timer para atualizações periódicas no modo online."""
         self.update_timer = QTimer(self)
@@ -328,83 +675,125 @@ class PainelMtec(QMainWindow):
         self.update_timer.start(300000) # 300000 ms = 5 minutos
         print("Modo online: O painel será atualizado a cada 5 minutos.")
 
-
-    def atualizar_dados_e_ui(self):
+    def setup_cliente(self):
+        """Modo cliente: sem leitura da planilha nem banco, recebe do publicador o modelo pronto para desenhar."""
+        host, porta = self.publicador
+        self.sinais_cliente = SinaisCliente()
+        self.sinais_cliente.mensagem.connect(self.receber_do_publicador)
+        self.sinais_cliente.conexao.connect(self.conexao_publicador_mudou)
+        self.assinante = Assinante(host, porta, self.sinais_cliente.mensagem.emit, self.sinais_cliente.conexao.emit)
+        self.assinante.iniciar()
+        print(f"Modo cliente: aguardando o publicador em {host}:{porta}.")
+
+    def receber_do_publicador(self, mensagem):
+        if mensagem['tipo'] == 'erro':
+            self.registrar_inicializacao(atualizou=False)
+            self.registrar_atualizacao('falhou', erro=mensagem['mensagem'])
+            self.mostrar_erro(mensagem['mensagem']); return
+        self.modelo_recebido = True
+        modelo = mensagem['modelo']
+        self.aplicar_modelo_visao(self.geracao_atualizacao, replace(modelo, tempos={**modelo.tempos, 'recebimento': mensagem['tempo_recebimento']}))
+
+    def conexao_publicador_mudou(self, conectado, descricao):
+        print(f"{'INFO' if conectado else 'AVISO'}: {descricao}")
+        if conectado: return
+        # Com dados na tela, mantém o último modelo e só avisa; sem nenhum, mostra a mensagem no lugar do painel
+        if self.modelo_recebido or self.modelo_salvo is not None: self.show_notification(descricao, is_error=True)
+        else: self.mostrar_erro(descricao)
+
+    def setup_timer_meia_noite(self):
+        """Atualiza o painel logo após a meia-noite, para que os totais de hoje e do mês virem de data mesmo sem mudança na planilha."""
+        self.timer_meia_noite = QTimer(self); self.timer_meia_noite.setSingleShot(True)
+        self.timer_meia_noite.timeout.connect(self.virar_dia)
+        self.agendar_meia_noite()
+
+    def agendar_meia_noite(self):
+        agora = datetime.now()
+        proxima = datetime.combine(agora.date() + timedelta(days=1), datetime.min.time()) + timedelta(seconds=1)
+        self.timer_meia_noite.start(int((proxima - agora).total_seconds() * 1000))
+
+    def virar_dia(self):
+        print("INFO: Virada do dia; atualizando os totais do painel.")
+        self.atualizar_dados_e_ui(forcar=True, arquivar=True)
+        self.agendar_meia_noite()
+
+
+    def atualizar_dados_e_ui(self, forcar=False, arquivar=False):
+        """
+        Agenda uma atualização em segundo plano, cancelando a que ainda estiver em andamento; forcar ignora o filtro de
+        planilha sem mudança e arquivar arquiva antes o histórico antigo (virada do dia).
+        """
         print("Atualizando dados e UI...")
+        if self.trabalhador_atual is not None: self.trabalhador_atual.cancelar()
+        self.pool_atualizacao.clear()  # descarta atualizações que ainda não começaram
+
+        self.geracao_atualizacao += 1
+        trabalhador = TrabalhadorAtualizacao(self.geracao_atualizacao, sincronizar=not USAR_LINK_ONLINE, filtro=None if forcar else self.filtro_mudancas,
+                                             inicializar_banco=not self.banco_inicializado, arquivar=arquivar)
+        trabalhador.sinais.concluida.connect(self.aplicar_modelo_visao)
+        trabalhador.sinais.falhou.connect(self.falha_na_atualizacao)
+        trabalhador.sinais.ignorada.connect(self.atualizacao_ignorada)
+        self.trabalhador_atual = trabalhador
+        self.pool_atualizacao.start(trabalhador)
+
+    def aplicar_modelo_visao(self, geracao, modelo):
+        """Desenha o resultado de uma atualização, ignorando resultados de atualizações já substituídas."""
+        if geracao != self.geracao_atualizacao: return
         try:
-            time.sleep(0.5)
-            
-            if not USAR_LINK_ONLINE:
-                self.sincronizar_banco_de_dados()
-
-            df_full, df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados = carregar_dados()
-            
+            inicio = time.perf_counter()
             if self.is_showing_error: self.clear_error_message()
-            
-            self.desenhar_colunas(df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados)
-            
-            metricas = calcular_metricas_dashboard(df_full)
-            dados_grafico = calcular_dados_grafico(df_full)
-            frase = obter_frase_do_dia()
-            self.desenhar_dashboard(metricas, dados_grafico, frase)
+            self.banco_inicializado = True
+            self.desenhar_modelo(modelo)
+            self.registrar_inicializacao(atualizou=True)
+
+            tempos = {**modelo.tempos, 'desenho': time.perf_counter() - inicio}
+            objetos_qt = len(self.findChildren(QObject))
+            print(f"INFO: Atualização concluída em {sum(tempos.values()):.3f}s (leitura: {tempos['leitura']:.3f}s, "
+                  f"sincronização: {tempos['sincronizacao']:.3f}s, análise: {tempos['analise']:.3f}s, cálculo: {tempos['calculo']:.3f}s, desenho: {tempos['desenho']:.3f}s; "
+                  f"objetos Qt: {objetos_qt}).")
+            self.registrar_atualizacao('concluida', tempos, {**(modelo.contagens or {}), 'objetos_qt': objetos_qt})
+            if self.estado_http is not None: self.estado_http.atualizar(dados_modelo(modelo))
+            erro = (modelo.contagens or {}).get('erro_sincronizacao')
+            if erro:
+                self.show_notification(f"Falha ao gravar no banco de dados; as métricas podem estar desatualizadas.\n{erro}", is_error=True)
+                if self.estado_http is not None: self.estado_http.registrar_erro(f"sincronização do banco: {erro}")
         except Exception as e:
+            self.registrar_atualizacao('falhou', erro=str(e))
             self.mostrar_erro(str(e))
 
-    def sincronizar_banco_de_dados(self):
-        """
-        Sincroniza o banco de dados com a planilha de status.
-        Adiciona novos concluídos e remove os que não estão mais como concluídos.
-        """
-        print("\n*** Iniciando sincronização do banco de dados com a planilha ***")
-        try:
-            df_full = pd.read_excel(CAMINHO_PLANILHA_STATUS, engine='openpyxl')
-            df_full.columns = df_full.columns.str.strip()
-
-            df_full['temp_date'] = pd.to_datetime(df_full[COLUNA_DATA_STATUS], errors='coerce')
-            df_validos = df_full.dropna(subset=['temp_date']).copy()
-            df_concluidos_planilha = df_validos[df_validos[COLUNA_STATUS] == STATUS_CONCLUIDO].copy()
-            
-            ids_concluidos_planilha = set(df_concluidos_planilha[COLUNA_PEDIDO_ID].astype(str))
-            print(f"INFO: Encontrados {len(ids_concluidos_planilha)} pedidos 'Concluído' com data válida na planilha.")
-
-            conexao = sqlite3.connect(CAMINHO_BANCO_DE_DADOS)
-            cursor = conexao.cursor()
-            cursor.execute("SELECT pedido_id FROM concluidos")
-            ids_no_db = set(row[0] for row in cursor.fetchall())
-            print(f"INFO: Encontrados {len(ids_no_db)} pedidos no banco de dados.")
-
-            ids_para_adicionar = ids_concluidos_planilha - ids_no_db
-            ids_para_remover = ids_no_db - ids_concluidos_planilha
-
-            if ids_para_remover:
-                print(f"INFO: Removendo {len(ids_para_remover)} pedido(s) do banco de dados...")
-                cursor.executemany("DELETE FROM concluidos WHERE pedido_id = ?", [(pid,) for pid in ids_para_remover])
-                conexao.commit()
-
-            if ids_para_adicionar:
-                print(f"INFO: Adicionando {len(ids_para_adicionar)} novo(s) pedido(s) ao banco de dados...")
-                df_para_adicionar = df_concluidos_planilha[df_concluidos_planilha[COLUNA_PEDIDO_ID].isin(ids_para_adicionar)]
-                
-                for _, row in df_para_adicionar.iterrows():
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO concluidos (data_conclusao, pedido_id, pv, qtd_maquinas, equipamento, servico)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row['temp_date'].strftime('%Y-%m-%d %H:%M:%S'),
-                        row[COLUNA_PEDIDO_ID],
-                        row[COLUNA_PV],
-                        row[COLUNA_QTD],
-                        row[COLUNA_EQUIPAMENTO],
-                        row[COLUNA_SERVICO]
-                    ))
-                conexao.commit()
-            
-            conexao.close()
-            print("*** Sincronização concluída. ***")
-
-        except Exception as e:
-            print(f"ERRO CRÍTICO DURANTE A SINCRONIZAÇÃO DO BANCO DE DADOS: {e}")
-
+    def desenhar_modelo(self, modelo):
+        self.desenhar_colunas(modelo)
+        self.desenhar_dashboard(modelo.metricas, modelo.dados_grafico, modelo.frase)
+        self.desenhar_fluxo(modelo.fluxo)
+
+    def registrar_atualizacao(self, resultado, tempos=None, contagens=None, erro=None):
+        """Grava a atualização no log JSONL e, se o overlay de diagnóstico estiver aberto, redesenha-o."""
+        self.registro_atualizacoes.registrar(resultado, tempos, contagens, erro)
+        if resultado == 'falhou' and self.estado_http is not None: self.estado_http.registrar_erro(erro)
+        if self.diagnostico_label.isVisible(): self.mostrar_diagnostico()
+
+    def mostrar_diagnostico(self):
+        self.diagnostico_label.setText(self.registro_atualizacoes.texto_overlay())
+        self.diagnostico_label.adjustSize()
+        self.diagnostico_label.move(self.width() - self.diagnostico_label.width() - 20, self.scale(70))
+        self.diagnostico_label.show(); self.diagnostico_label.raise_()
+
+    def alternar_diagnostico(self):
+        if self.diagnostico_label.isVisible(): self.diagnostico_label.hide()
+        else: self.mostrar_diagnostico()
+
+    def atualizacao_ignorada(self, geracao):
+        if geracao != self.geracao_atualizacao: return
+        self.banco_inicializado = True
+        self.filtro_mudancas.contar('atualizacoes_ignoradas')
+        print(f"INFO: Conteúdo da planilha não mudou; leitura ignorada ({self.filtro_mudancas.resumo()}).")
+        self.registrar_atualizacao('ignorada')
+
+    def falha_na_atualizacao(self, geracao, mensagem):
+        if geracao != self.geracao_atualizacao: return
+        self.registrar_inicializacao(atualizou=False)
+        self.registrar_atualizacao('falhou', erro=mensagem)
+        self.mostrar_erro(mensagem)
 
     def show_notification(self, message, is_error=False):
         self.notification_label.setText(message)
@@ -426,49 +815,21 @@ class PainelMtec(QMainWindow):
 
         QTimer.singleShot(5000, self.notification_label.hide)
 
-    def desenhar_colunas(self, df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados):
-        font_titulo = QFont("Inter", self.scale(16), QFont.Bold)
-        font_item = QFont("Inter", self.scale(10)) 
-        font_contador = QFont("Inter", self.scale(9))
-        font_total = QFont("Inter", self.scale(9))
+    def desenhar_colunas(self, modelo):
+        self.desenhar_cards_prioridade(modelo.prioridades)
 
-        df_prioridades = df_principal[df_principal[COLUNA_STATUS].isin([STATUS_AGUARDANDO, STATUS_EM_MONTAGEM, STATUS_URGENTE])]
-        pedidos_em_prioridade_ids = df_prioridades.head(4)[COLUNA_PEDIDO_ID].tolist()
-
-        self.desenhar_cards_prioridade(self.prioridades_layout, df_prioridades, font_titulo)
-
-        df_em_montagem_base = df_principal[df_principal[COLUNA_STATUS] == STATUS_EM_MONTAGEM]
-        df_em_montagem_filtrado = df_em_montagem_base[~df_em_montagem_base[COLUNA_PEDIDO_ID].isin(pedidos_em_prioridade_ids)]
-
-        if df_em_montagem_filtrado.empty:
-            self.em_montagem_container.hide()
-        else:
-            self.em_montagem_container.show()
-            self.desenhar_lista_vertical(self.em_montagem_layout, df_em_montagem_filtrado, "EM MONTAGEM FORA DA PRIORIDADE", font_titulo, font_item, font_contador)
+        self.em_montagem_container.setVisible(bool(modelo.em_montagem))
+        self.desenhar_lista_vertical(modelo.em_montagem, "EM MONTAGEM FORA DA PRIORIDADE")
+        self.desenhar_lista_vertical(modelo.pendentes, "PENDENTES")
+        self.desenhar_lista_vertical(modelo.aguardando_montagem, "AGUARDANDO MONTAGEM")
+        self.desenhar_lista_vertical(modelo.aguardando_chegada, "AGUARDANDO CHEGADA")
 
-        df_pendentes = df_principal[df_principal[COLUNA_STATUS] == STATUS_PENDENTE]
-        self.desenhar_lista_vertical(self.pendentes_layout, df_pendentes, "PENDENTES", font_titulo, font_item, font_contador)
+        self.desenhar_lista_lateral(modelo.concluidos, "CONCLUÍDOS DO DIA", modelo.totais_concluidos)
+        self.desenhar_lista_lateral(modelo.cancelados, "CANCELADOS DO DIA", modelo.totais_cancelados)
 
-        df_aguardando_base = df_principal[df_principal[COLUNA_STATUS] == STATUS_AGUARDANDO]
-        df_aguardando_filtrado = df_aguardando_base[~df_aguardando_base[COLUNA_PEDIDO_ID].isin(pedidos_em_prioridade_ids)]
-        self.desenhar_lista_vertical(self.aguardando_montagem_layout, df_aguardando_filtrado, "AGUARDANDO MONTAGEM", font_titulo, font_item, font_contador)
-
-        df_aguardando_chegada = df_principal[df_principal[COLUNA_STATUS] == STATUS_AGUARDANDO_CHEGADA]
-        self.desenhar_lista_vertical(self.aguardando_chegada_layout, df_aguardando_chegada, "AGUARDANDO CHEGADA", font_titulo, font_item, font_contador)
-
-        self.desenhar_lista_lateral(self.concluidos_layout, df_concluidos, "CONCLUÍDOS DO DIA", font_titulo, font_item, font_contador, font_total, totais_concluidos, limit=5)
-        self.desenhar_lista_lateral(self.cancelados_layout, df_cancelados, "CANCELADOS DO DIA", font_titulo, font_item, font_contador, font_total, totais_cancelados, limit=5)
-
-    def desenhar_lista_lateral(self, layout, df, titulo_texto, font_titulo, font_item, font_contador, font_total, totais, limit=None):
-        self.limpar_layout(layout); object_name = f"{titulo_texto.replace(' ', '')}Title"; layout.addWidget(self.criar_titulo(titulo_texto, object_name, font_titulo))
-        if df.empty: layout.addWidget(QLabel("Nenhum."))
-        else:
-            df_display = df.head(limit) if limit is not None else df
-            for _, row in df_display.iterrows():
-                texto = f"<b>{row[COLUNA_PEDIDO_ID]}</b> ({row[COLUNA_PV]}) <font color='#2ECC71'>\"{row[COLUNA_QTD]}\"</font>"
-                label = QLabel(texto); label.setFont(font_item); layout.addWidget(label)
-            if limit is not None and len(df) > limit:
-                restantes = len(df) - limit; contador_label = QLabel(f"+{restantes}..."); contador_label.setObjectName("CounterLabel"); contador_label.setFont(font_contador); layout.addWidget(contador_label)
+    def desenhar_lista_lateral(self, linhas, titulo_texto, totais):
+        itens = [(row[COLUNA_PEDIDO_ID], {'titulo': row[COLUNA_PEDIDO_ID], 'pv': row[COLUNA_PV], 'qtd': row[COLUNA_QTD], 'detalhe': None}) for row in linhas]
+        self.secoes_laterais[titulo_texto].atualizar(itens, len(linhas))
 
         teravix, pv, total, teravix_qtd, pv_qtd, total_qtd = totais
         
@@ -476,59 +837,56 @@ class PainelMtec(QMainWindow):
                        f"<font color='#FF6600'>PV:</font> {pv} ({pv_qtd})<br>"
                        f"<b><font color='#3498DB'>TOTAL DIA:</font></b> <b>{total} ({total_qtd})</b>")
 
-        total_label = QLabel(texto_total); total_label.setObjectName("TotalLabel"); total_label.setFont(font_total)
-        layout.addWidget(total_label)
-        layout.addStretch(1)
+        total_label = self.totais_laterais[titulo_texto]
+        if total_label.text() != texto_total: total_label.setText(texto_total)
 
     def desenhar_dashboard(self, metricas, dados_grafico, frase_do_dia):
-        self.limpar_layout(self.metricas_layout); self.limpar_layout(self.grafico_layout); self.limpar_layout(self.kpi_layout)
-        
-        titulo_metrica_font = QFont("Inter", self.scale(12), QFont.Bold)
-        valor_metrica_font = QFont("Inter", self.scale(32), QFont.Bold)
-        
-        total_mes_titulo = QLabel("Total Concluído no Mês"); total_mes_titulo.setObjectName("MetricaTitle"); total_mes_titulo.setFont(titulo_metrica_font)
-        total_mes_valor_html = f"{metricas['total_mes_atual']:.0f} <font color='#999' style='font-size:{self.scale(15)}px;'>({metricas['total_mes_atual_qtd']:.0f} máq.)</font>"
-        total_mes_valor = QLabel(total_mes_valor_html); total_mes_valor.setObjectName("MetricaValue"); total_mes_valor.setFont(valor_metrica_font)
-
-        media_diaria_titulo = QLabel("Média Diária no Mês"); media_diaria_titulo.setObjectName("MetricaTitle"); media_diaria_titulo.setFont(titulo_metrica_font)
-        media_diaria_valor_html = f"{metricas['media_diaria_atual']:.1f} <font color='#999' style='font-size:{self.scale(15)}px;'>({metricas['media_diaria_qtd']:.1f} máq.)</font>"
-        media_diaria_valor = QLabel(media_diaria_valor_html); media_diaria_valor.setObjectName("MetricaValue"); media_diaria_valor.setFont(valor_metrica_font)
-        
-        self.metricas_layout.addWidget(total_mes_titulo); self.metricas_layout.addWidget(total_mes_valor); self.metricas_layout.addStretch(1); self.metricas_layout.addWidget(media_diaria_titulo); self.metricas_layout.addWidget(media_diaria_valor); self.metricas_layout.addStretch(1)
-
-        titulo_grafico = QLabel(f"Desempenho Semanal (Meta: {META_SEMANAL} máq.)"); titulo_grafico.setFont(titulo_metrica_font)
-        self.grafico_layout.addWidget(titulo_grafico)
+        self.atualizar_texto(self.total_mes_valor, f"{metricas['total_mes_atual']:.0f} <font color='#999' style='font-size:{self.scale(15)}px;'>({metricas['total_mes_atual_qtd']:.0f} máq.)</font>")
+        self.atualizar_texto(self.media_diaria_valor, f"{metricas['media_diaria_atual']:.1f} <font color='#999' style='font-size:{self.scale(15)}px;'>({metricas['media_diaria_qtd']:.1f} máq.)</font>")
 
         start_of_current_week = datetime.now().date() - timedelta(days=datetime.now().weekday())
-        for data, valor in dados_grafico:
+        for indice, (label_semana, progress_bar) in enumerate(self.barras_semana):
+            if indice >= len(dados_grafico):
+                label_semana.hide(); progress_bar.hide(); continue
+            data, valor = dados_grafico[indice]
             fim_semana = data + timedelta(days=6); texto_semana = f"Semana {data.strftime('%d/%m')} a {fim_semana.strftime('%d/%m')}"
             is_current_week = data.date() == start_of_current_week
             if is_current_week: texto_semana = f"<b>▶ {texto_semana}</b>"
-            
-            label_semana = QLabel(f"{texto_semana}: <b>{int(valor)}</b>"); label_semana.setFont(QFont("Inter", self.scale(10)))
-            progress_bar = QProgressBar(); progress_bar.setRange(0, META_SEMANAL); progress_bar.setValue(min(int(valor), META_SEMANAL)); progress_bar.setTextVisible(False);
-            progress_bar.setFixedHeight(self.scale(18)); progress_bar.setMaximumWidth(self.scale(550))
-            if is_current_week: progress_bar.setObjectName("currentWeek")
-            self.grafico_layout.addWidget(label_semana); self.grafico_layout.addWidget(progress_bar)
-        self.grafico_layout.addStretch()
-        
-        kpi_titulo_font = QFont("Inter", self.scale(11), QFont.Bold)
-        kpi_valor_font = QFont("Inter", self.scale(12), QFont.Bold)
-        
-        frase_titulo = QLabel("Frase do Dia"); frase_titulo.setObjectName("KpiTitle"); frase_titulo.setFont(kpi_titulo_font)
-        frase_texto = QLabel(f'"{frase_do_dia}"'); frase_texto.setObjectName("FraseMotivacional"); frase_texto.setWordWrap(True);
-        frase_texto.setFont(QFont("Inter", self.scale(10), italic=True))
-        self.kpi_layout.addWidget(frase_titulo); self.kpi_layout.addWidget(frase_texto); self.kpi_layout.addStretch(1)
 
-        comp_titulo = QLabel("Comparativo Mensal (Mês Anterior)"); comp_titulo.setObjectName("KpiTitle"); comp_titulo.setFont(kpi_titulo_font)
-        comp_texto_str = (f"📈 <b>Produção Mês:</b> <font size='{self.scale(4)}' color='#FF6600'>{metricas['total_mes_atual']:.0f}</font> (vs. {metricas['total_mes_anterior']:.0f})<br>"
-                          f"📊 <b>Média Diária:</b> <font size='{self.scale(4)}' color='#FF6600'>{metricas['media_diaria_atual']:.1f}</font> (vs. {metricas['media_diaria_anterior']:.1f})")
-        comp_texto = QLabel(comp_texto_str); comp_texto.setFont(QFont("Inter", self.scale(10)))
-        self.kpi_layout.addWidget(comp_titulo); self.kpi_layout.addWidget(comp_texto); self.kpi_layout.addStretch(2)
-
-        recorde_titulo = QLabel("Recorde de Produção do Mês"); recorde_titulo.setObjectName("KpiTitle"); recorde_titulo.setFont(kpi_titulo_font)
-        recorde_texto = QLabel(f"🏆 <font color='#3498DB'>{metricas['recorde_dia_valor']} pds ({metricas['recorde_dia_qtd']} máq.)</font> em {metricas['recorde_dia_data']}"); recorde_texto.setFont(kpi_valor_font)
-        self.kpi_layout.addWidget(recorde_titulo); self.kpi_layout.addWidget(recorde_texto); self.kpi_layout.addStretch(1)
+            self.atualizar_texto(label_semana, f"{texto_semana}: <b>{int(valor)}</b>")
+            progress_bar.setValue(min(int(valor), META_SEMANAL))
+            nome_barra = "currentWeek" if is_current_week else ""
+            if progress_bar.objectName() != nome_barra:
+                progress_bar.setObjectName(nome_barra); progress_bar.style().unpolish(progress_bar); progress_bar.style().polish(progress_bar)
+            label_semana.show(); progress_bar.show()
+
+        self.atualizar_texto(self.frase_texto, f'"{frase_do_dia}"')
+        self.atualizar_texto(self.comp_texto, f"📈 <b>Produção Mês:</b> <font size='{self.scale(4)}' color='#FF6600'>{metricas['total_mes_atual']:.0f}</font> (vs. {metricas['total_mes_anterior']:.0f})<br>"
+                                              f"📊 <b>Média Diária:</b> <font size='{self.scale(4)}' color='#FF6600'>{metricas['media_diaria_atual']:.1f}</font> (vs. {metricas['media_diaria_anterior']:.1f})")
+        self.atualizar_texto(self.recorde_texto, f"🏆 <font color='#3498DB'>{metricas['recorde_dia_valor']} pds ({metricas['recorde_dia_qtd']} máq.)</font> em {metricas['recorde_dia_data']}")
+
+    def desenhar_fluxo(self, fluxo):
+        """Lead time p50/p90 por tipo, idade do WIP e tempo em cada status; sem histórico de status, mostra só o aviso."""
+        lead_texto, wip_texto, ciclo_texto = self.fluxo_textos
+        # p50 / p90 em dias
+        if not fluxo:
+            for texto in self.fluxo_textos: self.atualizar_texto(texto, "<font color='#999'>Sem histórico de status.</font>")
+            return
+        dias = lambda valor: f"<font color='#FF6600'><b>{valor:.1f}</b></font> d"
+        linhas = [f"<b>{tipo}:</b> {dias(p50)} / {dias(p90)} <font color='#999'>({pedidos} pds)</font>" if pedidos else f"<b>{tipo}:</b> <font color='#999'>sem conclusões</font>"
+                  for tipo, (pedidos, p50, p90) in fluxo['lead'].items()]
+        self.atualizar_texto(lead_texto, "<br>".join(linhas))
+        pedidos, p50, p90, mais_antigo = fluxo['wip']
+        self.atualizar_texto(wip_texto, f"<b>{pedidos}</b> pedidos · idade {dias(p50)} / {dias(p90)}<br>mais antigo: {dias(mais_antigo)}" if pedidos
+                             else "<font color='#999'>Nenhum pedido em aberto.</font>")
+        # Só o p50 cabe no dashboard; o p90 fica na dica do rótulo
+        self.atualizar_texto(ciclo_texto, " · ".join(f"{status}: {dias(p50)}" for status, (_, p50, _) in fluxo['ciclo'].items())
+                             or "<font color='#999'>Sem mudanças de status registradas.</font>")
+        ciclo_texto.setToolTip("\n".join(f"{status}: p50 {p50:.1f} d, p90 {p90:.1f} d ({pedidos} passagens)" for status, (pedidos, p50, p90) in fluxo['ciclo'].items()))
+
+    def atualizar_texto(self, label, texto):
+        """Só chama setText quando o texto muda, evitando relayout desnecessário."""
+        if label.text() != texto: label.setText(texto)
 
     def limpar_layout(self, layout):
         if layout is None: return
@@ -543,88 +901,14 @@ class PainelMtec(QMainWindow):
         titulo_label = QLabel(texto); titulo_label.setObjectName(object_name); titulo_label.setProperty("class", "SectionTitle"); titulo_label.setFont(font)
         return titulo_label
 
-    def desenhar_cards_prioridade(self, layout, df, font_titulo):
-        self.limpar_layout(layout); layout.addWidget(self.criar_titulo("PRIORIDADES", "PrioridadesTitle", font_titulo))
-        if df.empty:
-            label_vazio = QLabel("Nenhuma prioridade para exibir.")
-            label_vazio.setFont(QFont("Inter", self.scale(12)))
-            layout.addWidget(label_vazio)
-        else:
-            for index, (_, row) in enumerate(df.head(4).iterrows()):
-                card = self.criar_card_widget(row, index + 1); layout.addWidget(card)
-        layout.addStretch()
-
-    def criar_card_widget(self, data, pos_lista):
-        card = QFrame(); card.setObjectName("Card"); card.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
-        layout = QVBoxLayout(card)
-        layout.setSpacing(self.scale(6))
+    def desenhar_cards_prioridade(self, linhas):
+        self.secao_prioridades.atualizar([(row[COLUNA_PEDIDO_ID], (index + 1, row)) for index, row in enumerate(linhas[:4])], len(linhas))
 
-        pos_priority_html = f"<b>{pos_lista}º (P{data['Prioridade']}):</b>"
-        cv_html = f"<span style='font-size:{self.scale(10)}pt; font-weight:bold;'> {data[COLUNA_PEDIDO_ID]}</span>"
-        pv_html = f"<span style='font-weight:bold;'> ({data[COLUNA_PV]})</span>"
-
-        titulo_texto = f"{pos_priority_html}{cv_html}{pv_html}"
-
-        titulo = QLabel(titulo_texto)
-        titulo.setObjectName("CardTitle")
-        titulo.setFont(QFont("Inter", self.scale(12)))
-        titulo.setWordWrap(True)
-
-        status_text = str(data.get(COLUNA_STATUS, 'N/A')).upper()
-        status = QLabel(status_text)
-        status.setFont(QFont("Inter", self.scale(10), QFont.Bold))
-
-        current_status = str(data[COLUNA_STATUS]).strip().lower()
-        if current_status == STATUS_URGENTE.lower(): status.setObjectName("CardStatus_Urgente")
-        elif current_status == STATUS_AGUARDANDO.lower(): status.setObjectName("CardStatus_Aguardando")
-        elif current_status == STATUS_EM_MONTAGEM.lower(): status.setObjectName("CardStatus_EmMontagem")
-
-        equipamento_texto = str(data.get(COLUNA_EQUIPAMENTO, ''))
-        equipamento = QLabel(equipamento_texto); equipamento.setWordWrap(True)
-        equipamento.setFont(QFont("Inter", self.scale(10)))
-        equipamento.setStyleSheet("color: #E0E0E0;")
-
-        servico = QLabel(str(data.get(COLUNA_SERVICO, 'N/A'))); servico.setWordWrap(True)
-        servico.setFont(QFont("Inter", self.scale(9), italic=True))
-        servico.setStyleSheet("color: #AAAAAA;")
-
-        qtd = QLabel(f"<b>QTD. MÁQUINAS:</b> {data[COLUNA_QTD]}")
-        qtd.setFont(QFont("Inter", self.scale(10), QFont.Bold))
-        qtd.setStyleSheet("color: #2ECC71;")
-
-        layout.addWidget(titulo)
-        layout.addWidget(status)
-        layout.addSpacing(self.scale(8))
-
-        if equipamento_texto and equipamento_texto != "Não especificado":
-            layout.addWidget(equipamento)
-        layout.addWidget(servico)
-
-        layout.addStretch()
-        layout.addWidget(qtd)
-        return card
-
-    def desenhar_lista_vertical(self, layout, df, titulo_texto, font_titulo, font_item, font_contador):
-        self.limpar_layout(layout); object_name = f"{titulo_texto.replace(' ', '')}Title"; layout.addWidget(self.criar_titulo(titulo_texto, object_name, font_titulo))
-        if df.empty:
-            label_vazio = QLabel("Nenhum pedido para exibir.")
-            label_vazio.setFont(QFont("Inter", self.scale(12)))
-            layout.addWidget(label_vazio)
-        else:
-            for _, row in df.head(5).iterrows():
-                texto = f"<b>P{row['Prioridade']}: {row[COLUNA_PEDIDO_ID]}</b> ({row[COLUNA_PV]}) <font color='#2ECC71'>\"{row[COLUNA_QTD]}\"</font>"
-                label = QLabel(texto); label.setFont(font_item); layout.addWidget(label)
-
-                if "EM MONTAGEM" in titulo_texto:
-                    equip_texto = str(row.get(COLUNA_EQUIPAMENTO, ''))
-                    if equip_texto:
-                        equip_label = QLabel(f"  └─ {equip_texto}")
-                        equip_label.setWordWrap(True)
-                        equip_label.setFont(QFont("Inter", self.scale(9), italic=True)); equip_label.setStyleSheet("color: #AAAAAA; padding-left: 10px;"); layout.addWidget(equip_label)
-
-            if len(df) > 5:
-                restantes = len(df) - 5; contador_label = QLabel(f"+{restantes} pedidos..."); contador_label.setObjectName("CounterLabel"); contador_label.setFont(font_contador); layout.addWidget(contador_label)
-        layout.addStretch()
+    def desenhar_lista_vertical(self, linhas, titulo_texto):
+        com_detalhe = "EM MONTAGEM" in titulo_texto
+        itens = [(row[COLUNA_PEDIDO_ID], {'titulo': f"P{row['Prioridade']}: {row[COLUNA_PEDIDO_ID]}", 'pv': row[COLUNA_PV], 'qtd': row[COLUNA_QTD],
+                                          'detalhe': str(row.get(COLUNA_EQUIPAMENTO, '')) if com_detalhe else None}) for row in linhas]
+        self.secoes_verticais[titulo_texto].atualizar(itens, len(linhas))
 
     def mostrar_erro(self, mensagem):
         print(f"ERRO CRÍTICO: {mensagem}")
@@ -634,11 +918,16 @@ class PainelMtec(QMainWindow):
             self.main_container.hide(); self.error_container.show()
     
     def clear_error_message(self):
-        self.is_showing_error = False; self.error_container.hide(); self.main_container.show(); self.setup_ui_columns()
+        self.is_showing_error = False; self.error_container.hide(); self.main_container.show()
 
     def closeEvent(self, event):
         print("Fechando a aplicação e parando o monitoramento de arquivos.")
-        if not USAR_LINK_ONLINE:
+        if self.trabalhador_atual is not None: self.trabalhador_atual.cancelar()
+        self.pool_atualizacao.clear(); self.pool_atualizacao.waitForDone()
+        if self.servidor_http is not None: self.servidor_http.encerrar()
+        if self.publicador is not None:
+            self.assinante.encerrar()
+        elif not USAR_LINK_ONLINE:
             self.observer.stop()
             self.observer.join()
         super().closeEvent(event)
@@ -649,15 +938,24 @@ class PainelMtec(QMainWindow):
                 self.showMaximized()
             else:
                 self.showFullScreen()
+        elif event.key() == Qt.Key_F12:
+            self.alternar_diagnostico()
         
         super().keyPressEvent(event)
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Painel de produção MTEC.")
+    parser.add_argument("--cliente", nargs="?", const=f"{HOST_PADRAO}:{PORTA_PADRAO}", type=endereco, metavar="HOST:PORTA",
+                        help="modo cliente: desenha os modelos enviados pelo publicador (python cli.py publicar) em vez de ler a planilha")
+    parser.add_argument("--http", nargs="?", const=f"{HOST_HTTP_PADRAO}:{PORTA_HTTP_PADRAO}", type=endereco_http, metavar="HOST:PORTA",
+                        help="serve também o estado do painel em JSON por HTTP, com ETag e feed de mudanças em /eventos")
+    args, argumentos_qt = parser.parse_known_args()
+    if args.cliente is None: print(descrever_fonte_dados())
+    app = QApplication(sys.argv[:1] + argumentos_qt)
     try:
         locale.setlocale(locale.LC_TIME, 'pt_BR.UTF-8')
     except locale.Error:
         print("Aviso: Local 'pt_BR.UTF-8' não pôde ser definido. Nomes dos meses podem aparecer em inglês.")
-    window = PainelMtec()
+    window = PainelMtec(args.cliente, args.http)
     window.showFullScreen()
     sys.exit(app.exec())
@@ -1,38 +1,14 @@
 import sys
 import os
-import sqlite3
-import pandas as pd
-from datetime import datetime
+import time
 import locale
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QLabel, QFrame, QPushButton,
-                               QDateEdit, QTextEdit, QCalendarWidget)
+                               QDateEdit, QTextEdit, QCalendarWidget, QComboBox, QFileDialog)
 from PySide6.QtGui import QFont
-from PySide6.QtCore import Qt, QDate, QTimer
+from PySide6.QtCore import Qt, QDate, QTimer, Signal, QObject, QRunnable, QThreadPool
 
-# --- CONFIGURAÇÃO DE CAMINHOS ---
-# --- ALTERAÇÃO: Lógica para usar fonte de dados local ou online ---
-USAR_LINK_ONLINE = False  # Mude para True para usar o link abaixo
-
-LINK_PLANILHA_ONLINE = "COLE_SEU_LINK_DIRETO_AQUI"
-
-if getattr(sys, 'frozen', False):
-    script_dir = os.path.dirname(sys.executable)
-else:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-CAMINHO_PASTA_DADOS = os.path.join(script_dir, "dados")
-
-if USAR_LINK_ONLINE:
-    CAMINHO_PLANILHA_STATUS = LINK_PLANILHA_ONLINE
-    print(f"INFO: Usando planilha online do link.")
-else:
-    NOME_ARQUIVO_STATUS = "Status_dos_pedidos.xlsm"
-    CAMINHO_PLANILHA_STATUS = os.path.join(CAMINHO_PASTA_DADOS, NOME_ARQUIVO_STATUS)
-    print(f"INFO: Usando planilha local: {CAMINHO_PLANILHA_STATUS}")
-
-NOME_ARQUIVO_BANCO_DE_DADOS = "producao.db"
-CAMINHO_BANCO_DE_DADOS = os.path.join(CAMINHO_PASTA_DADOS, NOME_ARQUIVO_BANCO_DE_DADOS)
+import motor
 
 
 # --- ESTILO VISUAL (Reutilizado do painel principal) ---
@@ -47,7 +23,7 @@ STYLESHEET = """
         font-weight: bold; 
         margin-bottom: 5px;
     }
-    QDateEdit {
+    QDateEdit, QComboBox {
         background-color: #2E2E2E;
         color: #E0E0E0;
         border: 1px solid #555;
@@ -83,14 +59,82 @@ STYLESHEET = """
     QPushButton:hover { background-color: #2980B9; }
     #CopyButton { background-color: #27AE60; }
     #CopyButton:hover { background-color: #229954; }
+    QPushButton:disabled { background-color: #555; color: #AAA; }
+    #StatusLabel { color: #888888; font-style: italic; font-size: 13px; }
 """
 
+# Opções de agrupamento do relatório em lote: texto exibido -> granularidade do motor
+OPCOES_GRANULARIDADE = {"Dia": "dia", "Semana": "semana", "Mês": "mes"}
+
+# --- GERAÇÃO EM SEGUNDO PLANO ---
+class SinaisRelatorio(QObject):
+    progresso = Signal(int, int, str)  # etapa atual, total de etapas, descrição
+    concluido = Signal(str, float)     # texto do relatório, duração em segundos
+    falhou = Signal(str)               # mensagem de erro, exibida no lugar do relatório
+
+class TrabalhadorRelatorio(QRunnable):
+    """Busca o resumo do banco, o backlog da planilha e os tempos de fluxo fora da thread da interface e monta o texto do relatório."""
+    def __init__(self, gerador, start_date, end_date):
+        super().__init__()
+        self.gerador = gerador
+        self.start_date = start_date; self.end_date = end_date
+        self.sinais = SinaisRelatorio()
+
+    def run(self):
+        inicio = time.perf_counter()
+        try:
+            self.sinais.progresso.emit(1, 4, "lendo o resumo do banco de dados")
+            resumo_concluidos, error_db = self.gerador.buscar_resumo_db(self.start_date, self.end_date)
+            if error_db: self.sinais.falhou.emit(error_db); return
+
+            self.sinais.progresso.emit(2, 4, "lendo o backlog da planilha")
+            df_backlog, error_backlog = self.gerador.buscar_dados_backlog()
+            if error_backlog: self.sinais.falhou.emit(error_backlog); return
+
+            self.sinais.progresso.emit(3, 4, "calculando os tempos de fluxo")
+            fluxo = self.gerador.buscar_fluxo(self.start_date, self.end_date)
+
+            self.sinais.progresso.emit(4, 4, "montando o texto")
+            texto_final = motor.montar_texto_relatorio(self.start_date.toPython(), self.end_date.toPython(), resumo_concluidos, df_backlog, fluxo)
+            self.sinais.concluido.emit(texto_final, time.perf_counter() - inicio)
+        except Exception as e:
+            self.sinais.falhou.emit(f"Erro ao gerar o relatório: {e}")
+
+class TrabalhadorLote(QRunnable):
+    """Gera de uma vez os relatórios de cada dia, semana ou mês do período e, opcionalmente, exporta o resumo."""
+    def __init__(self, start_date, end_date, granularidade, caminho_saida=None):
+        super().__init__()
+        self.start_date = start_date; self.end_date = end_date
+        self.granularidade = granularidade; self.caminho_saida = caminho_saida
+        self.sinais = SinaisRelatorio()
+
+    def run(self):
+        inicio = time.perf_counter()
+        if not os.path.exists(motor.CAMINHO_BANCO_DE_DADOS):
+            self.sinais.falhou.emit("Erro: Arquivo de banco de dados 'producao.db' não encontrado."); return
+        try:
+            total = 4 if self.caminho_saida else 3
+            self.sinais.progresso.emit(1, total, "lendo e agrupando o resumo diário")
+            resumo = motor.resumir_periodos(self.start_date.toPython(), self.end_date.toPython(), self.granularidade)
+            self.sinais.progresso.emit(2, total, "lendo o backlog da planilha")
+            df_backlog = motor.buscar_backlog()
+            self.sinais.progresso.emit(3, total, f"montando {len(resumo)} relatório(s)")
+            textos = motor.montar_textos_lote(resumo, df_backlog)
+            if self.caminho_saida:
+                self.sinais.progresso.emit(4, total, "exportando o resumo")
+                motor.exportar_resumo_periodos(resumo, self.caminho_saida)
+            self.sinais.concluido.emit(motor.SEPARADOR_LOTE.join(textos), time.perf_counter() - inicio)
+        except Exception as e:
+            self.sinais.falhou.emit(f"Erro ao gerar os relatórios em lote: {e}")
+
 class GeradorRelatorios(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Gerador de Relatórios MTEC")
-        self.setGeometry(200, 200, 700, 550)
+        self.setGeometry(200, 200, 760, 600)
         self.setStyleSheet(STYLESHEET)
+        # Uma geração por vez; os botões ficam desativados enquanto o trabalhador está rodando
+        self.pool_relatorio = QThreadPool(self); self.pool_relatorio.setMaxThreadCount(1)
         self.setup_ui()
 
     def setup_ui(self):
@@ -142,7 +186,23 @@ class GeradorRelatorios(QMainWindow):
         # --- Botão de Gerar Relatório ---
         self.generate_button = QPushButton("Gerar Relatório")
         self.generate_button.clicked.connect(self.gerar_relatorio)
-        body_layout.addWidget(self.generate_button, 0, Qt.AlignmentFlag.AlignLeft)
+        botao_layout = QHBoxLayout()
+        botao_layout.addWidget(self.generate_button)
+        self.status_label = QLabel(""); self.status_label.setObjectName("StatusLabel")
+        botao_layout.addWidget(self.status_label, 1)
+        body_layout.addLayout(botao_layout)
+
+        # --- Relatórios em Lote ---
+        lote_layout = QHBoxLayout()
+        lote_layout.addWidget(QLabel("Em lote, um relatório por:"))
+        self.granularidade_combo = QComboBox(); self.granularidade_combo.addItems(list(OPCOES_GRANULARIDADE))
+        lote_layout.addWidget(self.granularidade_combo)
+        self.batch_button = QPushButton("Gerar em Lote"); self.batch_button.clicked.connect(lambda: self.gerar_lote())
+        lote_layout.addWidget(self.batch_button)
+        self.export_button = QPushButton("Exportar Resumo"); self.export_button.clicked.connect(self.exportar_lote)
+        lote_layout.addWidget(self.export_button)
+        lote_layout.addStretch()
+        body_layout.addLayout(lote_layout)
 
         # --- Seção do Relatório Gerado ---
         report_section_label = QLabel("Relatório Gerado")
@@ -159,114 +219,70 @@ class GeradorRelatorios(QMainWindow):
         self.copy_button.clicked.connect(self.copiar_texto)
         body_layout.addWidget(self.copy_button, 0, Qt.AlignmentFlag.AlignRight)
 
-    def buscar_dados_db(self, start_date, end_date):
-        """Busca os dados no banco de dados SQLite dentro do intervalo de datas."""
-        if not os.path.exists(CAMINHO_BANCO_DE_DADOS):
+    def buscar_resumo_db(self, start_date, end_date):
+        """Totais de pedidos e unidades (TERAVIX e PV) do período, lidos do resumo diário 'producao_diaria'."""
+        if not os.path.exists(motor.CAMINHO_BANCO_DE_DADOS):
             return None, "Erro: Arquivo de banco de dados 'producao.db' não encontrado."
 
         try:
-            conexao = sqlite3.connect(CAMINHO_BANCO_DE_DADOS)
-            query = "SELECT * FROM concluidos WHERE date(data_conclusao) BETWEEN ? AND ?"
-            
-            start_date_str = start_date.toString("yyyy-MM-dd")
-            end_date_str = end_date.toString("yyyy-MM-dd")
-
-            df = pd.read_sql_query(query, conexao, params=(start_date_str, end_date_str))
-            conexao.close()
-            return df, None
+            return motor.buscar_resumo_periodo(start_date.toPython(), end_date.toPython()), None
         except Exception as e:
             return None, f"Erro ao conectar ou ler o banco de dados: {e}"
 
+    def buscar_fluxo(self, start_date, end_date):
+        """Tempos de fluxo do período a partir do histórico de status; opcionais, o relatório sai sem eles em caso de erro."""
+        try:
+            return motor.buscar_fluxo_periodo(start_date.toPython(), end_date.toPython())
+        except Exception as e:
+            print(f"AVISO: Não foi possível calcular os tempos de fluxo: {e}")
+            return None
+
     def buscar_dados_backlog(self):
         """Busca todos os pedidos com status 'Aguardando Montagem' ou 'Em Montagem'."""
         try:
-            # Lê diretamente do caminho, seja local ou online
-            df = pd.read_excel(CAMINHO_PLANILHA_STATUS, engine='openpyxl')
-
-            df.columns = df.columns.str.strip()
-            
-            status_backlog = ['Aguardando Montagem', 'Em Montagem']
-            df_backlog = df[df['Status'].isin(status_backlog)].copy()
-            
-            return df_backlog, None
+            return motor.buscar_backlog(), None
         except Exception as e:
             return None, f"Erro ao ler a planilha de status: {e}"
 
     def gerar_relatorio(self):
-        """Função principal que é chamada ao clicar no botão."""
-        start_date = self.start_date_edit.date()
-        end_date = self.end_date_edit.date()
-
-        df_concluidos, error_db = self.buscar_dados_db(start_date, end_date)
-        df_backlog, error_backlog = self.buscar_dados_backlog()
-
-        if error_db:
-            self.report_text_edit.setText(error_db)
-            return
-        if error_backlog:
-            self.report_text_edit.setText(error_backlog)
-            return
-        
-        atividades_realizadas = []
-        if not df_concluidos.empty:
-            df_concluidos['pv'] = df_concluidos['pv'].astype(str)
-            teravix_df = df_concluidos[df_concluidos['pv'].str.contains("TERAVIX", na=False)]
-            pv_df = df_concluidos[~df_concluidos['pv'].str.contains("TERAVIX", na=False)]
-
-            num_ops = len(teravix_df)
-            unidades_ops = teravix_df['qtd_maquinas'].sum()
-            num_pvs = len(pv_df)
-            unidades_pvs = pv_df['qtd_maquinas'].sum()
-
-            if num_pvs > 0:
-                plural_pv = "'s" if num_pvs > 1 else ""
-                atividades_realizadas.append(f"• {num_pvs} PV{plural_pv} com {unidades_pvs} unidades")
-            if num_ops > 0:
-                plural_op = "'s" if num_ops > 1 else ""
-                atividades_realizadas.append(f"• {num_ops} OP{plural_op} com {unidades_ops} unidades de Teravix")
-        
-        atividades_backlog = []
-        if not df_backlog.empty:
-            df_backlog['PV'] = df_backlog['PV'].astype(str)
-            teravix_backlog_df = df_backlog[df_backlog['PV'].str.contains("TERAVIX", na=False)]
-            pv_backlog_df = df_backlog[~df_backlog['PV'].str.contains("TERAVIX", na=False)]
-
-            num_ops_backlog = len(teravix_backlog_df)
-            unidades_ops_backlog = teravix_backlog_df['Qtd Maquinas'].sum()
-            num_pvs_backlog = len(pv_backlog_df)
-            unidades_pvs_backlog = pv_backlog_df['Qtd Maquinas'].sum()
-
-            if num_pvs_backlog > 0:
-                plural_pv = "'s" if num_pvs_backlog > 1 else ""
-                atividades_backlog.append(f"• {num_pvs_backlog} PV{plural_pv} com {unidades_pvs_backlog} unidades")
-            if num_ops_backlog > 0:
-                plural_op = "'s" if num_ops_backlog > 1 else ""
-                atividades_backlog.append(f"• {num_ops_backlog} OP{plural_op} com {unidades_ops_backlog} unidades de Teravix")
-
-        dias_semana = {
-            'Monday': 'Segunda-feira', 'Tuesday': 'Terça-feira', 'Wednesday': 'Quarta-feira',
-            'Thursday': 'Quinta-feira', 'Friday': 'Sexta-feira', 'Saturday': 'Sábado', 'Sunday': 'Domingo'
-        }
-        dia_en = start_date.toString("dddd")
-        dia_pt = dias_semana.get(dia_en, dia_en)
-
-        if start_date == end_date:
-            data_titulo = f"{dia_pt}, dia {start_date.toString('dd/MM')}"
-        else:
-            data_titulo = f"período de {start_date.toString('dd/MM')} a {end_date.toString('dd/MM')}"
-        
-        titulo = f"Relatório de Atividades - {data_titulo}."
-
-        corpo_realizadas = "Nenhuma atividade realizada no período."
-        if atividades_realizadas:
-            corpo_realizadas = "Atividades Realizadas:\n" + "\n".join(atividades_realizadas)
-        
-        corpo_backlog = "Backlog:\nNenhuma atividade futura na fila."
-        if atividades_backlog:
-            corpo_backlog = "Backlog:\n" + "\n".join(atividades_backlog)
-        
-        texto_final = f"{titulo}\n\n{corpo_realizadas}\n\n{corpo_backlog}"
+        """Função principal que é chamada ao clicar no botão: agenda a geração em segundo plano."""
+        trabalhador = TrabalhadorRelatorio(self, self.start_date_edit.date(), self.end_date_edit.date())
+        self.iniciar_geracao(trabalhador)
+
+    def gerar_lote(self, caminho_saida=None):
+        """Gera os relatórios de cada período do intervalo selecionado, agrupados pela granularidade escolhida."""
+        granularidade = OPCOES_GRANULARIDADE[self.granularidade_combo.currentText()]
+        self.iniciar_geracao(TrabalhadorLote(self.start_date_edit.date(), self.end_date_edit.date(), granularidade, caminho_saida))
+
+    def exportar_lote(self):
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar resumo por período", "resumo_periodos.xlsx",
+                                                 "Planilha Excel (*.xlsx);;CSV separado por ponto e vírgula (*.csv)")
+        if caminho: self.gerar_lote(caminho)
+
+    def iniciar_geracao(self, trabalhador):
+        trabalhador.sinais.progresso.connect(self.mostrar_progresso)
+        trabalhador.sinais.concluido.connect(self.relatorio_concluido)
+        trabalhador.sinais.falhou.connect(self.relatorio_falhou)
+        self.definir_botoes_ativos(False); self.generate_button.setText("Gerando...")
+        self.pool_relatorio.start(trabalhador)
+
+    def definir_botoes_ativos(self, ativos):
+        for botao in (self.generate_button, self.batch_button, self.export_button): botao.setEnabled(ativos)
+
+    def mostrar_progresso(self, etapa, total, descricao):
+        self.status_label.setText(f"Etapa {etapa}/{total}: {descricao}...")
+
+    def finalizar_geracao(self, status):
+        self.definir_botoes_ativos(True); self.generate_button.setText("Gerar Relatório")
+        self.status_label.setText(status)
+
+    def relatorio_concluido(self, texto_final, duracao):
         self.report_text_edit.setText(texto_final)
+        self.finalizar_geracao(f"Relatório(s) gerado(s) em {duracao:.2f}s.")
+
+    def relatorio_falhou(self, mensagem):
+        self.report_text_edit.setText(mensagem)
+        self.finalizar_geracao("")
 
     def copiar_texto(self):
         """Copia o texto gerado para a área de transferência."""
@@ -275,8 +291,13 @@ class GeradorRelatorios(QMainWindow):
         self.copy_button.setText("Copiado!")
         QTimer.singleShot(2000, lambda: self.copy_button.setText("Copiar Texto"))
 
+    def closeEvent(self, event):
+        self.pool_relatorio.waitForDone()
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
+    print(motor.descrever_fonte_dados())
     app = QApplication(sys.argv)
     try: 
         locale.setlocale(locale.LC_TIME, 'pt_BR.UTF-8')
@@ -0,0 +1,170 @@
+"""
+Servidor HTTP opcional com o estado atual do painel em JSON, para outras ferramentas (celulares no chão de fábrica, relatórios,
+uma futura página web) sem reler a planilha. As respostas saem do último modelo em memória, serializadas uma vez por
+atualização, com ETag/304, long-poll (If-None-Match + ?espera=segundos) e um feed de mudanças SSE em /eventos.
+Só a biblioteca padrão é usada, como em transmissao.py.
+
+    GET /painel        modelo completo
+    GET /prioridades   prioridades, em montagem, pendentes, aguardando montagem e aguardando chegada
+    GET /hoje          concluídos e cancelados do dia com os totais
+    GET /metricas      métricas do mês, gráfico semanal e indicadores de fluxo
+    GET /estado        versão, horário da última atualização e o último erro
+    GET /eventos       text/event-stream; um evento 'painel' a cada atualização, com os recursos que mudaram
+"""
+import json
+import math
+import hashlib
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from transmissao import endereco
+
+HOST_HTTP_PADRAO, PORTA_HTTP_PADRAO = '127.0.0.1', 8080
+ESPERA_MAXIMA = 60              # segundos de long-poll por requisição
+INTERVALO_KEEPALIVE_SSE = 15    # comentário enviado no feed SSE para manter a conexão aberta
+
+# Campos do ModeloVisao servidos por cada recurso; None = modelo completo
+RECURSOS = {
+    '/painel': None,
+    '/prioridades': ['prioridades', 'em_montagem', 'pendentes', 'aguardando_montagem', 'aguardando_chegada'],
+    '/hoje': ['concluidos', 'cancelados', 'totais_concluidos', 'totais_cancelados'],
+    '/metricas': ['metricas', 'dados_grafico', 'fluxo'],
+}
+
+def endereco_http(texto):
+    """Endereço do argumento --http: 'host:porta', 'porta' ou 'host' (porta PORTA_HTTP_PADRAO)."""
+    return endereco(texto, PORTA_HTTP_PADRAO)
+
+class EstadoPainel:
+    """
+    Corpo JSON e ETag de cada recurso para o último modelo recebido. O ETag é o hash do corpo, então um recurso
+    que não mudou entre duas atualizações (por exemplo, as métricas quando só uma prioridade mudou) continua com 304.
+    """
+    def __init__(self):
+        self.versao = 0; self.publicado_em = None; self.erro = None
+        self.respostas = {}  # caminho -> (corpo em bytes, etag)
+        self.mudaram = []    # recursos que mudaram na última atualização
+        self.condicao = threading.Condition(); self.encerrado = False
+
+    def atualizar(self, dados):
+        """dados: transmissao.dados_modelo(modelo). Devolve os recursos cujo conteúdo mudou."""
+        respostas = {}
+        for caminho, campos in RECURSOS.items():
+            conteudo = dados if campos is None else {campo: dados[campo] for campo in campos}
+            corpo = json.dumps(conteudo, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            respostas[caminho] = (corpo, f'"{hashlib.blake2b(corpo, digest_size=12).hexdigest()}"')
+        with self.condicao:
+            mudaram = [caminho for caminho, (_, etag) in respostas.items() if self.respostas.get(caminho, (None, None))[1] != etag]
+            self.respostas = respostas; self.versao += 1; self.erro = None
+            self.publicado_em = datetime.now().isoformat(timespec='seconds'); self.mudaram = mudaram
+            self.condicao.notify_all()
+        return mudaram
+
+    def registrar_erro(self, mensagem):
+        """A última atualização falhou: os recursos continuam com o último modelo e /estado mostra o erro."""
+        with self.condicao:
+            self.erro = mensagem; self.versao += 1; self.mudaram = []
+            self.condicao.notify_all()
+
+    def resumo(self):
+        return {'versao': self.versao, 'publicado_em': self.publicado_em, 'erro': self.erro}
+
+    def resposta(self, caminho, etag=None, espera=0):
+        """(corpo, etag) do recurso; com o etag atual e espera > 0, aguarda até o recurso mudar (long-poll)."""
+        with self.condicao:
+            self.condicao.wait_for(lambda: self.encerrado or self.respostas.get(caminho, (None, None))[1] != etag, timeout=espera)
+            return self.respostas.get(caminho)
+
+    def esperar_versao(self, versao, espera):
+        """Aguarda uma versão mais nova que versao; devolve (versao, resumo, recursos que mudaram) ou None no tempo esgotado."""
+        with self.condicao:
+            if not self.condicao.wait_for(lambda: self.encerrado or self.versao > versao, timeout=espera) or self.encerrado: return None
+            return self.versao, self.resumo(), self.mudaram
+
+    def encerrar(self):
+        with self.condicao:
+            self.encerrado = True; self.condicao.notify_all()
+
+def criar_manipulador(estado):
+    class ManipuladorPainel(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, formato, *args):
+            pass  # uma linha por requisição polui o console do painel
+
+        def enviar(self, status, corpo=b'', tipo='application/json; charset=utf-8', etag=None):
+            self.send_response(status)
+            self.send_header('Content-Type', tipo); self.send_header('Content-Length', str(len(corpo)))
+            self.send_header('Cache-Control', 'no-cache'); self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('X-Painel-Versao', str(estado.versao))
+            if etag: self.send_header('ETag', etag)
+            self.end_headers()
+            if corpo and self.command != 'HEAD': self.wfile.write(corpo)
+
+        def enviar_json(self, status, conteudo):
+            self.enviar(status, json.dumps(conteudo, ensure_ascii=False).encode('utf-8'))
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def do_GET(self):
+            url = urlsplit(self.path); caminho = url.path.rstrip('/') or '/painel'
+            if caminho == '/eventos': return self.feed_eventos()
+            if caminho == '/estado': return self.enviar_json(200, estado.resumo())
+            if caminho not in RECURSOS: return self.enviar_json(404, {'erro': f"recurso desconhecido: {caminho}", 'recursos': list(RECURSOS) + ['/estado', '/eventos']})
+            try:
+                espera = float(parse_qs(url.query).get('espera', ['0'])[0])
+            except ValueError:
+                espera = None
+            # nan passaria pelo min() e faria wait_for nunca voltar, prendendo a thread da requisição
+            if espera is None or not math.isfinite(espera) or espera < 0:
+                return self.enviar_json(400, {'erro': f"espera deve ser um número de segundos maior ou igual a 0 (até {ESPERA_MAXIMA})"})
+            espera = min(espera, ESPERA_MAXIMA)
+            etag_cliente = self.headers.get('If-None-Match')
+            resposta = estado.resposta(caminho, etag_cliente, espera if etag_cliente else 0)
+            if resposta is None: return self.enviar_json(503, {'erro': "o painel ainda não tem dados", **estado.resumo()})
+            corpo, etag = resposta
+            if etag == etag_cliente: self.enviar(304, etag=etag)
+            else: self.enviar(200, corpo, etag=etag)
+
+        def feed_eventos(self):
+            """Server-Sent Events: um evento por atualização, a partir da versão em Last-Event-ID (ou da atual)."""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8'); self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*'); self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            ultimo = self.headers.get('Last-Event-ID')
+            versao = int(ultimo) if ultimo and ultimo.isdigit() else estado.versao
+            try:
+                while not estado.encerrado:
+                    novidade = estado.esperar_versao(versao, INTERVALO_KEEPALIVE_SSE)
+                    if novidade is None:
+                        self.wfile.write(b': keepalive\n\n')
+                    else:
+                        versao, resumo, mudaram = novidade
+                        dados = json.dumps({**resumo, 'recursos': mudaram}, ensure_ascii=False)
+                        self.wfile.write(f"id: {versao}\nevent: painel\ndata: {dados}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # cliente desconectou
+
+    return ManipuladorPainel
+
+class ServidorPainel:
+    """Servidor HTTP em uma thread própria; as requisições só leem o EstadoPainel, nunca a planilha ou o banco."""
+    def __init__(self, estado, host=HOST_HTTP_PADRAO, porta=PORTA_HTTP_PADRAO):
+        self.estado = estado; self.host = host; self.porta = porta; self.servidor = None
+
+    def iniciar(self):
+        self.servidor = ThreadingHTTPServer((self.host, self.porta), criar_manipulador(self.estado))
+        self.servidor.daemon_threads = True
+        self.porta = self.servidor.server_address[1]
+        threading.Thread(target=self.servidor.serve_forever, name="servidor-http", daemon=True).start()
+        print(f"INFO: Estado do painel disponível em http://{self.host}:{self.porta}/painel (feed de mudanças em /eventos).")
+
+    def encerrar(self):
+        self.estado.encerrar()
+        if self.servidor is not None: self.servidor.shutdown(); self.servidor.server_close()
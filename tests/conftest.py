@@ -0,0 +1,22 @@
+"""Fixtures dos testes: o motor apontado para planilha e banco sintéticos (dados_sinteticos.py) numa pasta temporária."""
+import pytest
+
+import analise
+import banco
+import dados_sinteticos
+import motor
+
+@pytest.fixture
+def motor_sintetico(tmp_path, monkeypatch):
+    """motor lendo uma planilha sintética de 3 mil pedidos e sincronizando com um banco novo, com contadores zerados."""
+    caminho_planilha = str(tmp_path / "Status_dos_pedidos.xlsm"); caminho_banco = str(tmp_path / "producao.db")
+    dados_sinteticos.gravar_planilha(dados_sinteticos.gerar_pedidos(3000, semente=1), caminho_planilha)
+    monkeypatch.setattr(motor, 'CAMINHO_PASTA_DADOS', str(tmp_path))
+    monkeypatch.setattr(motor, 'CAMINHO_PLANILHA_STATUS', caminho_planilha)
+    monkeypatch.setattr(motor, 'CAMINHO_BANCO_DE_DADOS', caminho_banco)
+    monkeypatch.setattr(motor, 'contadores_producao', motor.ContadoresProducao())
+    monkeypatch.setattr(motor, '_memo_status_atual', {})
+    monkeypatch.setattr(motor, '_memo_historico_sincronizado', {})
+    monkeypatch.setattr(analise, '_memo_historico', {})
+    banco.inicializar_banco(caminho_banco)
+    return motor
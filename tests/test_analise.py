@@ -0,0 +1,81 @@
+"""Indicadores de fluxo: incorporação incremental dos eventos contra o recálculo completo, e lead time/WIP de um histórico montado à mão."""
+from dataclasses import replace
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import analise
+import banco
+from planilha import COLUNA_STATUS, COLUNA_DATA_HORA, STATUS_PENDENTE, STATUS_EM_MONTAGEM, STATUS_URGENTE, STATUS_CONCLUIDO
+
+# Linhas de ler_historico_status: (id, pedido_id, status_novo, momento, is_teravix)
+EVENTOS = [
+    (1, 'CV-A', STATUS_PENDENTE, '2026-01-05 08:00:00', None),
+    (2, 'CV-B', STATUS_CONCLUIDO, '2026-01-05 09:00:00', 1),      # já concluído quando o histórico começou: sem lead time
+    (3, 'CV-C', STATUS_PENDENTE, '2026-01-05 10:00:00', None),
+    (4, 'CV-A', STATUS_EM_MONTAGEM, '2026-01-06 08:00:00', None),
+    (5, 'CV-A', STATUS_CONCLUIDO, '2026-01-07 20:00:00', 1),      # lead 2,5 dias, TERAVIX
+    (6, 'CV-C', STATUS_EM_MONTAGEM, '2026-01-08 10:00:00', None),
+    (7, 'CV-D', STATUS_PENDENTE, '2026-01-09 12:00:00', None),
+    (8, 'CV-C', STATUS_CONCLUIDO, '2026-01-09 10:00:00', 0),      # lead 4 dias, PV
+    (9, 'CV-E', STATUS_URGENTE, '2026-01-10 00:00:00', None),
+    (10, 'CV-D', None, '2026-01-10 12:00:00', None),              # saiu da planilha
+]
+AGORA = datetime(2026, 1, 11)
+
+def incorporar_em_partes(linhas, cortes):
+    historico = analise.HistoricoFluxo()
+    for inicio, fim in zip([0, *cortes], [*cortes, len(linhas)]): historico.incorporar(linhas[inicio:fim])
+    return historico
+
+def assert_mesmos_agregados(agregados, esperado):
+    ordenado = lambda df: df.sort_values('pedido_id', ignore_index=True)
+    pd.testing.assert_frame_equal(ordenado(agregados.lead_times), ordenado(esperado.lead_times))
+    pd.testing.assert_frame_equal(ordenado(agregados.wip), ordenado(esperado.wip))
+    pd.testing.assert_frame_equal(agregados.ciclo_por_status.sort_index(), esperado.ciclo_por_status.sort_index())
+    pd.testing.assert_frame_equal(agregados.lead_semanal, esperado.lead_semanal)
+
+@pytest.mark.parametrize('cortes', [[1], [4], [2, 5, 8], list(range(1, len(EVENTOS)))])
+def test_incorporacao_incremental_igual_ao_recalculo(cortes):
+    completo = analise.HistoricoFluxo().incorporar(EVENTOS)
+    historico = incorporar_em_partes(EVENTOS, cortes)
+    assert historico.ultimo_id == 10
+    assert_mesmos_agregados(historico.agregados, completo)
+    # Sem eventos novos, os agregados não mudam
+    assert_mesmos_agregados(historico.incorporar([]), completo)
+
+def test_carregar_agregados_incorpora_so_os_eventos_novos(motor_sintetico):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    motor_sintetico.sincronizar_banco_de_dados(snapshot)
+    analise.carregar_agregados(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+
+    df = snapshot.df_bruto.copy()
+    em_montagem = df.index[df[COLUNA_STATUS] == STATUS_EM_MONTAGEM][:20]
+    df.loc[em_montagem, COLUNA_STATUS] = STATUS_CONCLUIDO; df.loc[em_montagem, COLUNA_DATA_HORA] = pd.Timestamp.now().floor('s')
+    motor_sintetico.sincronizar_banco_de_dados(replace(snapshot, df_bruto=df, lido_em=datetime.now()))
+    incremental = analise.carregar_agregados(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+
+    conexao = banco.conectar_banco(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    banco.anexar_historico(conexao, motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    completo = analise.HistoricoFluxo().incorporar(banco.ler_historico_status(conexao, 0, 'todos_concluidos'))
+    conexao.close()
+    assert 0 < len(incremental.lead_times) <= 20  # só os pedidos vistos em aberto e concluídos depois têm lead time
+    assert_mesmos_agregados(incremental, completo)
+
+def test_lead_time_e_wip_de_um_historico_conhecido():
+    agregados = analise.HistoricoFluxo().incorporar(EVENTOS)
+    assert sorted(zip(agregados.lead_times['pedido_id'], agregados.lead_times['lead_dias'], agregados.lead_times['is_teravix'])) == \
+        [('CV-A', 2.5, True), ('CV-C', 4.0, False)]
+    assert analise.resumir_lead_times(agregados, '2026-01-01') == {'TERAVIX': (1, 2.5, 2.5), 'PV': (1, 4.0, 4.0)}
+    assert analise.resumir_lead_times(agregados, '2026-01-08', '2026-01-10') == {'TERAVIX': (0, None, None), 'PV': (1, 4.0, 4.0)}
+
+    # Em aberto só o CV-E (o CV-D saiu da planilha), há um dia
+    assert agregados.wip['pedido_id'].tolist() == ['CV-E']
+    assert analise.resumir_wip(agregados, AGORA) == (1, 1.0, 1.0, 1.0)
+
+    # Tempo em cada status: Pendente 1 dia (A), 3 dias (C) e 1 dia (D); Em Montagem 1,5 dia (A) e 1 dia (C)
+    ciclo = analise.resumo_fluxo(agregados, AGORA)['ciclo']
+    assert list(ciclo) == [STATUS_PENDENTE, STATUS_EM_MONTAGEM]
+    assert ciclo[STATUS_PENDENTE] == (3, 1.0, pytest.approx(2.6))
+    assert ciclo[STATUS_EM_MONTAGEM] == (2, 1.25, pytest.approx(1.45))
@@ -0,0 +1,96 @@
+"""BaixadorPlanilha contra um servidor HTTP local que faz o papel do link da planilha (ETag, 304 e falhas)."""
+import os
+import threading
+import urllib.error
+import http.client
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from baixador import BaixadorPlanilha
+
+class ServidorPlanilha:
+    """Serve 'conteudo' com ETag; modo 'erro' responde 500 e 'truncado' corta a resposta no meio."""
+    def __init__(self):
+        self.conteudo = b'versao 1' * 20000; self.versao = 1; self.modo = 'normal'; self.cabecalhos_recebidos = []
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def log_message(self, formato, *args):
+                pass
+
+            def do_GET(self):
+                servidor.cabecalhos_recebidos.append(dict(self.headers))
+                etag = f'"v{servidor.versao}"'
+                if servidor.modo == 'erro': return self.send_error(500)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304); self.send_header('ETag', etag); self.end_headers(); return
+                self.send_response(200); self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(servidor.conteudo))); self.end_headers()
+                self.wfile.write(servidor.conteudo[:len(servidor.conteudo) // 2] if servidor.modo == 'truncado' else servidor.conteudo)
+
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}/planilha.xlsm"
+
+    def publicar(self, conteudo):
+        self.conteudo = conteudo; self.versao += 1
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorPlanilha()
+    threading.Thread(target=servidor.http.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.http.shutdown(); servidor.http.server_close()
+
+def ler(caminho):
+    with open(caminho, 'rb') as arquivo: return arquivo.read()
+
+def restos_de_download(pasta):
+    return [nome for nome in os.listdir(pasta) if nome.endswith('.download')]
+
+def test_200_depois_304(servidor, tmp_path):
+    destino = str(tmp_path / "planilha.xlsm")
+    baixador = BaixadorPlanilha(servidor.url, destino)
+
+    primeiro = baixador.baixar()
+    assert (primeiro.status, primeiro.mudou, primeiro.bytes_recebidos) == (200, True, len(servidor.conteudo))
+    assert ler(destino) == servidor.conteudo
+
+    segundo = baixador.baixar()
+    assert (segundo.status, segundo.mudou, segundo.bytes_recebidos) == (304, False, 0)
+    assert servidor.cabecalhos_recebidos[-1].get('If-None-Match') == '"v1"'
+    assert segundo.hash_conteudo == primeiro.hash_conteudo
+    assert baixador.respostas_304 == 1
+
+def test_conteudo_novo_substitui_a_copia(servidor, tmp_path):
+    destino = str(tmp_path / "planilha.xlsm")
+    baixador = BaixadorPlanilha(servidor.url, destino); baixador.baixar()
+
+    servidor.publicar(b'versao 2' * 30000)
+    resultado = baixador.baixar()
+    assert (resultado.status, resultado.mudou) == (200, True)
+    assert ler(destino) == servidor.conteudo
+
+    # ETag novo com o mesmo conteúdo: baixa, mas não regrava a cópia
+    servidor.publicar(servidor.conteudo)
+    modificado = os.stat(destino).st_mtime_ns
+    resultado = baixador.baixar()
+    assert (resultado.status, resultado.mudou) == (200, False)
+    assert os.stat(destino).st_mtime_ns == modificado and baixador.downloads_sem_mudanca == 1
+    assert restos_de_download(tmp_path) == []
+
+@pytest.mark.parametrize('modo, erro', [('erro', urllib.error.HTTPError), ('truncado', http.client.IncompleteRead)])
+def test_falha_mantem_a_copia_anterior(servidor, tmp_path, modo, erro):
+    destino = str(tmp_path / "planilha.xlsm")
+    baixador = BaixadorPlanilha(servidor.url, destino); baixador.baixar()
+    anterior = ler(destino)
+
+    servidor.publicar(b'versao 3' * 30000); servidor.modo = modo
+    with pytest.raises(erro):
+        baixador.baixar()
+    assert ler(destino) == anterior
+    assert restos_de_download(tmp_path) == []
+
+    # Com o servidor de volta, a próxima verificação baixa a versão nova
+    servidor.modo = 'normal'
+    assert baixador.baixar().mudou and ler(destino) == servidor.conteudo
@@ -0,0 +1,60 @@
+"""Esquema e migrações do producao.db, e o intervalo de dias usado nas consultas por período."""
+import sqlite3
+from datetime import date
+
+import banco
+
+def tabelas(conexao):
+    return {nome for (nome,) in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def test_banco_novo_recebe_todas_as_migracoes(tmp_path):
+    caminho = str(tmp_path / "producao.db")
+    banco.inicializar_banco(caminho)
+    conexao = sqlite3.connect(caminho)
+    assert conexao.execute("PRAGMA user_version").fetchone()[0] == len(banco.MIGRACOES_BANCO)
+    assert conexao.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert {'concluidos', 'producao_diaria', 'producao_diaria_painel', 'eventos_status', 'status_atual', 'arquivamento'} <= tabelas(conexao)
+    conexao.close()
+
+def test_migracao_de_banco_antigo(tmp_path):
+    """Banco do formato original (sem migrações), com datas gravadas pelo pandas: tudo é convertido e resumido uma vez."""
+    caminho = str(tmp_path / "producao.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.execute(banco.SQL_CRIAR_CONCLUIDOS)
+    conexao.executemany("INSERT INTO concluidos VALUES (?, ?, ?, ?, ?, ?)", [
+        ('2025-10-01 08:30:00.000000', 'CV-1', 'TERAVIX (10)', 3, 'Computador', None),
+        ('2025-10-01T15:00:00', 'CV-2', '120001', 5, 'Notebook', 'montagem'),
+        ('2025-10-02 09:00:00', 'OS-3', None, 2, 'Notebook', None),
+    ])
+    conexao.commit(); conexao.close()
+
+    banco.inicializar_banco(caminho)
+    banco.inicializar_banco(caminho)  # segunda abertura: nada a aplicar
+    conexao = sqlite3.connect(caminho)
+    assert conexao.execute("PRAGMA user_version").fetchone()[0] == len(banco.MIGRACOES_BANCO)
+    assert [d for (d,) in conexao.execute("SELECT data_conclusao FROM concluidos ORDER BY pedido_id")] == \
+           ['2025-10-01 08:30:00', '2025-10-01 15:00:00', '2025-10-02 09:00:00']
+    assert conexao.execute("SELECT pedido_id FROM concluidos WHERE is_teravix").fetchall() == [('CV-1',)]
+    assert conexao.execute("SELECT * FROM producao_diaria ORDER BY dia").fetchall() == [('2025-10-01', 1, 3, 1, 5), ('2025-10-02', 0, 0, 1, 2)]
+    assert conexao.execute("SELECT * FROM producao_diaria_painel ORDER BY dia").fetchall() == [('2025-10-01', 1, 3, 1, 5)]
+    conexao.close()
+
+def test_atualizar_producao_diaria_recalcula_so_os_dias_pedidos(tmp_path):
+    caminho = str(tmp_path / "producao.db")
+    banco.inicializar_banco(caminho)
+    conexao = banco.conectar_banco(caminho)
+    with conexao:
+        conexao.execute("INSERT INTO concluidos (data_conclusao, pedido_id, pv, qtd_maquinas) VALUES ('2025-10-01 10:00:00', 'CV-1', 'TERAVIX', 4)")
+        banco.atualizar_producao_diaria(conexao, ['2025-10-01'])
+    assert banco.ler_producao_diaria(conexao) == [('2025-10-01', 1, 4, 0, 0)]
+    assert banco.resumir_periodo(conexao, date(2025, 10, 1), date(2025, 10, 31)) == (1, 4, 0, 0)
+    conexao.close()
+
+def test_intervalo_dias():
+    assert banco.intervalo_dias(date(2025, 10, 1), date(2025, 10, 1)) == ('2025-10-01', '2025-10-02')
+    assert banco.intervalo_dias(date(2025, 10, 1), date(2025, 10, 31)) == ('2025-10-01', '2025-11-01')
+    assert banco.intervalo_dias(date(2024, 2, 1), date(2024, 2, 29)) == ('2024-02-01', '2024-03-01')
+    assert banco.intervalo_dias(date(2025, 12, 31), date(2025, 12, 31)) == ('2025-12-31', '2026-01-01')
+    # Datas com horário no mesmo dia ficam dentro do intervalo semiaberto
+    inicio, fim = banco.intervalo_dias(date(2025, 10, 1), date(2025, 10, 1))
+    assert inicio <= '2025-10-01 23:59:59' < fim
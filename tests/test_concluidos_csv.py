@@ -0,0 +1,37 @@
+"""Importação de arquivos no formato do concluidos.csv num banco que já tem histórico arquivado."""
+from datetime import date
+
+import banco
+import concluidos_csv
+
+def test_importacao_conta_os_pedidos_ja_arquivados(tmp_path):
+    caminho = str(tmp_path / "producao.db")
+    banco.inicializar_banco(caminho)
+    conexao = banco.conectar_banco(caminho)
+    with conexao:
+        conexao.executemany("INSERT INTO concluidos (data_conclusao, pedido_id, pv, qtd_maquinas, origem) VALUES (?, ?, ?, ?, ?)", [
+            ('2024-01-10 10:00:00', 'CV-1', 'TERAVIX', 2, None),           # da planilha, vai para o arquivo
+            ('2024-01-11 10:00:00', 'CV-2', '120001', 3, 'antigo.csv'),    # importado antes, vai para o arquivo
+            ('2026-09-01 10:00:00', 'CV-3', '120002', 1, None),            # da planilha, fica no banco principal
+        ])
+        banco.recalcular_producao_diaria_periodo(conexao, '2024-01-10', '2026-09-01')
+    conexao.close()
+    assert banco.arquivar_historico(caminho, date(2025, 1, 1)) == 2
+
+    arquivo = tmp_path / "exportado.csv"
+    arquivo.write_text("data_conclusao;pedido_id;pv;qtd_maquinas;equipamento;servico\n"
+                       "10/01/2024 10:00;CV-1;TERAVIX;9;;\n"
+                       "11/01/2024 10:00;CV-2;120001;4;;\n"
+                       "01/02/2024 10:00;CV-4;120003;5;;\n"
+                       "01/09/2026 10:00;CV-3;120002;7;;\n"
+                       "02/09/2026 10:00;CV-5;120004;1;;\n", encoding='utf-8')
+    relatorio = concluidos_csv.importar_concluidos(str(arquivo), caminho)
+
+    assert (relatorio.novos, relatorio.atualizados, relatorio.mantidos_planilha) == (2, 1, 2)
+    assert relatorio.arquivados == 3  # CV-1 e CV-2 regravados no banco principal e CV-4, todos antes do corte
+
+    conexao = banco.conectar_banco(caminho)
+    banco.anexar_historico(conexao, caminho)
+    assert dict(conexao.execute("SELECT pedido_id, qtd_maquinas FROM todos_concluidos")) == {'CV-1': 2, 'CV-2': 4, 'CV-3': 1, 'CV-4': 5, 'CV-5': 1}
+    assert conexao.execute("SELECT COUNT(*) FROM main.concluidos WHERE data_conclusao < '2025-01-01'").fetchone()[0] == 0
+    conexao.close()
@@ -0,0 +1,17 @@
+"""Métricas do dashboard e gráfico semanal: o resumo diário do banco e os contadores da planilha dão os mesmos números."""
+
+def test_metricas_iguais_com_e_sem_sincronizacao(motor_sintetico):
+    com_banco = motor_sintetico.executar_atualizacao(sincronizar=True)
+    sem_banco = motor_sintetico.executar_atualizacao(sincronizar=False)
+    assert com_banco.metricas['total_mes_atual'] > 0
+    assert com_banco.metricas == sem_banco.metricas
+    assert com_banco.dados_grafico == sem_banco.dados_grafico
+
+def test_resumo_do_painel_so_tem_pedidos_cv(motor_sintetico):
+    motor_sintetico.executar_atualizacao(sincronizar=True)
+    conexao = motor_sintetico.conectar_banco(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    todos, painel = (conexao.execute(f"SELECT SUM(pedidos_teravix + pedidos_pv) FROM {tabela}").fetchone()[0]
+                     for tabela in ('producao_diaria', 'producao_diaria_painel'))
+    cv = conexao.execute("SELECT COUNT(*) FROM concluidos WHERE pedido_id LIKE 'CV-%'").fetchone()[0]
+    conexao.close()
+    assert painel == cv < todos
@@ -0,0 +1,45 @@
+"""Log de atualizações: rotação por tamanho, registros em memória e os percentis do overlay."""
+import json
+import os
+
+import numpy as np
+
+from diagnostico import RegistroAtualizacoes, percentil
+
+def ler_log(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return [json.loads(linha) for linha in arquivo]
+
+def test_rotacao_mantem_os_arquivos_mais_recentes(tmp_path):
+    caminho = str(tmp_path / "atualizacoes.jsonl")
+    registro = RegistroAtualizacoes(caminho, tamanho_maximo=2000, arquivos_antigos=2, capacidade=10)
+    for numero in range(100):
+        registro.registrar('concluida', tempos={'leitura': numero / 100, 'desenho': 0.01}, contagens={'numero': numero})
+
+    assert os.path.exists(f"{caminho}.1") and os.path.exists(f"{caminho}.2") and not os.path.exists(f"{caminho}.3")
+    partes = [f"{caminho}.2", f"{caminho}.1", caminho]
+    assert all(os.path.getsize(parte) < 2000 for parte in partes)
+    # Do mais antigo ao atual, os arquivos guardados são a sequência contínua das últimas atualizações
+    numeros = [linha['contagens']['numero'] for parte in partes for linha in ler_log(parte)]
+    assert numeros == list(range(100 - len(numeros), 100)) and len(numeros) < 100
+
+    # Reaberto, o registro recupera do log atual as últimas atualizações para o overlay
+    reaberto = RegistroAtualizacoes(caminho, tamanho_maximo=2000, arquivos_antigos=2, capacidade=10)
+    assert [r['contagens']['numero'] for r in reaberto.recentes] == [r['contagens']['numero'] for r in ler_log(caminho)][-10:]
+
+def test_percentis_so_das_atualizacoes_concluidas():
+    registro = RegistroAtualizacoes(None, capacidade=20)
+    totais = [0.5, 0.1, 0.9, 0.3, 0.7, 0.2, 1.5, 0.4]
+    for total in totais: registro.registrar('concluida', tempos={'leitura': total / 2, 'calculo': total / 2})
+    registro.registrar('ignorada'); registro.registrar('falhou', erro='planilha bloqueada')
+
+    for fracao in (0.5, 0.95):
+        valores = registro.percentis(fracao)
+        assert np.isclose(valores['total'], np.percentile(totais, fracao * 100))
+        assert np.isclose(valores['leitura'], np.percentile([t / 2 for t in totais], fracao * 100))
+        assert valores['sincronizacao'] is None
+    assert percentil([], 0.5) is None
+
+    texto = registro.texto_overlay()
+    assert f"p50{registro.percentis(0.5)['total']:>13.3f}" in texto and f"p95{registro.percentis(0.95)['total']:>13.3f}" in texto
+    assert "falhou: planilha bloqueada" in texto
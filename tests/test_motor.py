@@ -0,0 +1,139 @@
+"""Motor sem Qt: atualização completa, separação das colunas do painel e contadores incrementais contra uma recontagem."""
+from dataclasses import replace
+from datetime import datetime
+
+import pandas as pd
+
+import banco
+import motor
+from planilha import (COLUNA_PEDIDO_ID, COLUNA_STATUS, COLUNA_QTD, COLUNA_DIA, COLUNA_DATA_HORA, COLUNA_IS_TERAVIX,
+                      STATUS_CONCLUIDO, STATUS_CANCELADO, STATUS_URGENTE)
+
+def test_executar_atualizacao_sincroniza_e_monta_modelo(motor_sintetico):
+    modelo = motor_sintetico.executar_atualizacao(sincronizar=True)
+    contagens = modelo.contagens
+    assert contagens['novos'] == contagens['concluidos_planilha'] > 0
+    assert 'erro_sincronizacao' not in contagens
+    assert len(modelo.prioridades) <= 4
+    assert len(modelo.dados_grafico) == 4
+
+    # Sem mudanças na planilha, a segunda sincronização não grava nada
+    contagens = motor_sintetico.executar_atualizacao(sincronizar=True).contagens
+    assert (contagens['novos'], contagens['atualizados'], contagens['removidos'], contagens['mudancas_status']) == (0, 0, 0, 0)
+
+def test_executar_atualizacao_cancelada(motor_sintetico):
+    assert motor_sintetico.executar_atualizacao(sincronizar=False, cancelado=lambda: True) is None
+
+def test_carregar_dados(motor_sintetico):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    df, principal, concluidos_hoje, cancelados_hoje, totais_concluidos, totais_cancelados = motor_sintetico.carregar_dados(snapshot)
+    assert not principal[COLUNA_STATUS].isin([STATUS_CONCLUIDO, STATUS_CANCELADO]).any()
+    assert principal['Prioridade'].tolist() == list(range(1, len(principal) + 1))
+    urgente = (principal[COLUNA_STATUS].astype(str).str.strip().str.lower() == STATUS_URGENTE.lower()).tolist()
+    assert urgente == sorted(urgente, reverse=True)  # urgentes primeiro
+
+    hoje = pd.Timestamp.now().normalize()
+    for totais, status, do_dia in ((totais_concluidos, STATUS_CONCLUIDO, concluidos_hoje), (totais_cancelados, STATUS_CANCELADO, cancelados_hoje)):
+        esperado = df[(df[COLUNA_STATUS] == status) & (df[COLUNA_DIA] == hoje)]
+        assert len(do_dia) == len(esperado) == totais[2]
+        assert int(esperado[COLUNA_QTD].sum()) == totais[5]
+
+def recontagem(snapshot):
+    contadores = motor.ContadoresProducao()
+    contadores.aplicar_snapshot(snapshot)
+    return contadores
+
+def assert_mesmos_totais(contadores, esperado):
+    assert contadores.por_dia.keys() == esperado.por_dia.keys()
+    for chave, totais in esperado.por_dia.items(): assert contadores.por_dia[chave].tolist() == totais.tolist()
+
+def test_contadores_incrementais_batem_com_recontagem(motor_sintetico):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    contadores = motor_sintetico.ContadoresProducao()
+    contadores.aplicar_snapshot(snapshot)
+
+    df = snapshot.df.copy()
+    df.iloc[:50, df.columns.get_loc(COLUNA_STATUS)] = STATUS_CANCELADO             # mudança de status
+    posicao_dia, posicao_hora = df.columns.get_loc(COLUNA_DIA), df.columns.get_loc(COLUNA_DATA_HORA)
+    df.iloc[100:120, posicao_dia] = df.iloc[100:120, posicao_dia] + pd.Timedelta(days=1)  # data movida
+    df.iloc[100:120, posicao_hora] = df.iloc[100:120, posicao_hora] + pd.Timedelta(days=1)
+    df.iloc[200:210, df.columns.get_loc(COLUNA_QTD)] = 77                          # quantidade editada
+    novas = df.iloc[-30:].copy()                                                    # linhas acrescentadas no fim
+    novas[COLUNA_PEDIDO_ID] = [f"CV-9{i:09d}" for i in range(len(novas))]
+    alterado = replace(snapshot, df=pd.concat([df, novas], ignore_index=True))
+
+    assert contadores.aplicar_snapshot(alterado) >= 30
+    assert contadores.recontagens == 1  # só a primeira carga; o resto foi por deltas
+    assert_mesmos_totais(contadores, recontagem(alterado))
+
+    # Linhas apagadas no meio: recontagem do zero, com o mesmo resultado
+    removido = replace(snapshot, df=alterado.df.drop(index=range(300, 310)).reset_index(drop=True))
+    contadores.aplicar_snapshot(removido)
+    assert contadores.recontagens == 2
+    assert_mesmos_totais(contadores, recontagem(removido))
+
+def relogio(monkeypatch, modulo, agora):
+    """Fixa datetime.now() do módulo em agora."""
+    class Relogio(datetime):
+        @classmethod
+        def now(cls, tz=None): return agora
+    monkeypatch.setattr(modulo, 'datetime', Relogio)
+
+def test_contadores_viram_o_dia_e_o_mes(motor_sintetico, monkeypatch):
+    """Na virada da meia-noite (aqui também de mês), os totais de hoje passam a ser os do novo dia sem recontar a planilha."""
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    vespera = pd.Timestamp(datetime.now().date().replace(day=1)) - pd.Timedelta(days=1); virada = vespera + pd.Timedelta(days=1)
+    relogio(monkeypatch, motor_sintetico, (vespera + pd.Timedelta(hours=23, minutes=59)).to_pydatetime())
+    concluidos_vespera = motor_sintetico.carregar_dados(snapshot)[4]
+    assert concluidos_vespera == recontagem(snapshot).totais_dia(STATUS_CONCLUIDO, vespera) and concluidos_vespera[2] > 0
+
+    # Pedido concluído logo depois da meia-noite, acrescentado no fim da planilha
+    nova = snapshot.df[snapshot.df[COLUNA_STATUS] == STATUS_CONCLUIDO].iloc[[0]].copy()
+    nova[COLUNA_PEDIDO_ID] = "CV-9000000001"; nova[COLUNA_DIA] = virada; nova[COLUNA_DATA_HORA] = virada + pd.Timedelta(seconds=30); nova[COLUNA_QTD] = 7
+    depois = replace(snapshot, df=pd.concat([snapshot.df, nova], ignore_index=True))
+    relogio(monkeypatch, motor_sintetico, (virada + pd.Timedelta(minutes=1)).to_pydatetime())
+    concluidos_hoje = motor_sintetico.carregar_dados(depois)[4]
+    antes = recontagem(snapshot).totais_dia(STATUS_CONCLUIDO, virada)
+    acrescimo = (1, 0, 1, 7, 0, 7) if bool(nova[COLUNA_IS_TERAVIX].iloc[0]) else (0, 1, 1, 0, 7, 7)
+    assert concluidos_hoje == tuple(a + b for a, b in zip(antes, acrescimo))
+    contadores = motor_sintetico.contadores_producao
+    assert contadores.recontagens == 1 and contadores.linhas_alteradas == 1
+    assert contadores.totais_dia(STATUS_CONCLUIDO, vespera) == concluidos_vespera
+    assert_mesmos_totais(contadores, recontagem(depois))
+
+    # O mês atual passa a ter só o primeiro dia, e a véspera entra no mês anterior
+    metricas = motor_sintetico.calcular_metricas_dashboard(contadores.producao_diaria(vespera.replace(day=1)))
+    assert (metricas['total_mes_atual'], metricas['total_mes_atual_qtd']) == (concluidos_hoje[2], concluidos_hoje[5])
+    mes_anterior = recontagem(snapshot).producao_diaria(vespera.replace(day=1)).loc[:vespera]
+    assert metricas['total_mes_anterior'] == int(mes_anterior[['pedidos_teravix', 'pedidos_pv']].to_numpy().sum())
+
+def test_producao_diaria_dos_contadores_igual_ao_calculo_direto(motor_sintetico):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    contadores = recontagem(snapshot)
+    direto = motor_sintetico.calcular_producao_diaria(snapshot.df)
+    incremental = contadores.producao_diaria(direto.index.min())
+    pd.testing.assert_frame_equal(incremental, direto.astype('int64'), check_names=False, check_freq=False, check_index_type=False)
+
+def test_arquivamento_fica_fora_da_sincronizacao(motor_sintetico, tmp_path):
+    """A sincronização não arquiva; o passo à parte arquiva, e uma falha nele não impede a sincronização seguinte."""
+    corte = motor_sintetico.corte_historico(datetime.now()).isoformat()
+    conexao = banco.conectar_banco(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    antigos = lambda: conexao.execute("SELECT COUNT(*) FROM main.concluidos WHERE data_conclusao < ?", (corte,)).fetchone()[0]
+    concluidos = motor_sintetico.executar_atualizacao(sincronizar=True).contagens['concluidos_planilha']
+    pendentes = antigos()
+    assert pendentes > 0
+
+    # Arquivo do histórico impossível de abrir (uma pasta no lugar): só um aviso, nada sai do banco principal
+    (tmp_path / "producao_historico.db").mkdir()
+    assert motor_sintetico.arquivar_historico_se_preciso() == 0
+    assert antigos() == pendentes
+    assert 'erro_sincronizacao' not in motor_sintetico.executar_atualizacao(sincronizar=True).contagens
+
+    (tmp_path / "producao_historico.db").rmdir()
+    assert motor_sintetico.arquivar_historico_se_preciso() == pendentes
+    assert antigos() == 0 and motor_sintetico.arquivar_historico_se_preciso() == 0
+    contagens = motor_sintetico.executar_atualizacao(sincronizar=True).contagens
+    assert (contagens['novos'], contagens['atualizados'], contagens['removidos']) == (0, 0, 0)
+    banco.anexar_historico(conexao, motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    assert conexao.execute("SELECT COUNT(*) FROM todos_concluidos").fetchone()[0] == concluidos
+    conexao.close()
@@ -0,0 +1,113 @@
+"""Partes do painel Qt que não precisam de janela: atualizações canceladas ou substituídas, virada do dia e sinais do modelo das listas."""
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+prioridades = pytest.importorskip('prioridades')
+
+from motor import FiltroMudancasArquivo
+
+def painel_falso(geracao):
+    registros = []
+    return SimpleNamespace(geracao_atualizacao=geracao, banco_inicializado=False, filtro_mudancas=FiltroMudancasArquivo('planilha.xlsm'),
+                           registrar_atualizacao=lambda resultado, **campos: registros.append(resultado), registros=registros)
+
+def test_atualizacao_ignorada_de_geracao_antiga_nao_conta():
+    painel = painel_falso(geracao=3)
+    prioridades.PainelMtec.atualizacao_ignorada(painel, 2)
+    assert (painel.banco_inicializado, painel.filtro_mudancas.atualizacoes_ignoradas, painel.registros) == (False, 0, [])
+    prioridades.PainelMtec.atualizacao_ignorada(painel, 3)
+    assert (painel.banco_inicializado, painel.filtro_mudancas.atualizacoes_ignoradas, painel.registros) == (True, 1, ['ignorada'])
+
+def trabalhador(geracao, resultados):
+    trabalho = prioridades.TrabalhadorAtualizacao(geracao, sincronizar=True)
+    trabalho.sinais.concluida.connect(lambda geracao, modelo: resultados.append(('concluida', geracao)))
+    trabalho.sinais.falhou.connect(lambda geracao, mensagem: resultados.append(('falhou', geracao)))
+    trabalho.sinais.ignorada.connect(lambda geracao: resultados.append(('ignorada', geracao)))
+    return trabalho
+
+def test_atualizacao_cancelada_nao_entrega_resultado(motor_sintetico, monkeypatch, tmp_path):
+    monkeypatch.setattr(prioridades, 'CAMINHO_ULTIMO_MODELO', str(tmp_path / "ultimo_modelo.json"))
+    # Cancelada depois da sincronização: o banco foi gravado, mas os cálculos não são feitos nem entregues
+    verificacoes = []
+    cancelado = lambda: verificacoes.append(None) or len(verificacoes) > 1
+    assert motor_sintetico.executar_atualizacao(sincronizar=True, cancelado=cancelado) is None and len(verificacoes) == 2
+    assert motor_sintetico.executar_atualizacao(sincronizar=True).contagens['novos'] == 0
+
+    resultados = []
+    cancelado = trabalhador(1, resultados); cancelado.cancelar(); cancelado.run()
+    assert resultados == [] and not os.path.exists(prioridades.CAMINHO_ULTIMO_MODELO)
+    # Uma falha de uma atualização já cancelada também não é entregue
+    monkeypatch.setattr(prioridades, 'executar_atualizacao_se_mudou', lambda *_: 1 / 0)
+    cancelado = trabalhador(2, resultados); cancelado.cancelar(); cancelado.run()
+    assert resultados == []
+
+def test_resultado_de_geracao_substituida_e_descartado(motor_sintetico, monkeypatch, tmp_path):
+    monkeypatch.setattr(prioridades, 'CAMINHO_ULTIMO_MODELO', str(tmp_path / "ultimo_modelo.json"))
+    desenhados, registros = [], []
+    painel = SimpleNamespace(geracao_atualizacao=2, is_showing_error=False, banco_inicializado=False, estado_http=None,
+                             desenhar_modelo=desenhados.append, registrar_inicializacao=lambda **_: None, findChildren=lambda _: [],
+                             registrar_atualizacao=lambda resultado, *_, **__: registros.append(resultado))
+    for geracao in (1, 2):
+        trabalho = prioridades.TrabalhadorAtualizacao(geracao, sincronizar=True)
+        trabalho.sinais.concluida.connect(lambda geracao, modelo: prioridades.PainelMtec.aplicar_modelo_visao(painel, geracao, modelo))
+        trabalho.sinais.falhou.connect(lambda geracao, mensagem: prioridades.PainelMtec.falha_na_atualizacao(painel, geracao, mensagem))
+        trabalho.run()
+    # As duas terminaram, mas só a da geração atual chega à tela
+    assert len(desenhados) == 1 and registros == ['concluida'] and painel.banco_inicializado
+    prioridades.PainelMtec.falha_na_atualizacao(painel, 1, "planilha bloqueada")
+    assert registros == ['concluida']
+
+def test_virada_do_dia_atualiza_e_reagenda(monkeypatch):
+    agora = datetime(2026, 1, 31, 23, 59, 59, 500000)
+    class Relogio(datetime):
+        @classmethod
+        def now(cls, tz=None): return agora
+    monkeypatch.setattr(prioridades, 'datetime', Relogio)
+    atualizacoes, disparos = [], []
+    painel = SimpleNamespace(timer_meia_noite=SimpleNamespace(start=disparos.append),
+                             atualizar_dados_e_ui=lambda **opcoes: atualizacoes.append(opcoes))
+    painel.agendar_meia_noite = lambda: prioridades.PainelMtec.agendar_meia_noite(painel)
+
+    painel.agendar_meia_noite()
+    assert disparos == [1500]  # um segundo depois da meia-noite
+
+    agora = datetime(2026, 2, 1, 0, 0, 1)
+    prioridades.PainelMtec.virar_dia(painel)
+    assert atualizacoes == [{'forcar': True, 'arquivar': True}]
+    assert disparos[-1] == 24 * 3600 * 1000  # próxima meia-noite
+
+def linha(titulo, qtd=1):
+    return {'titulo': titulo, 'pv': '', 'qtd': qtd, 'detalhe': ''}
+
+def modelo_com_sinais():
+    modelo = prioridades.ModeloPedidos(); sinais = []
+    modelo.rowsInserted.connect(lambda _, primeira, ultima: sinais.append(('inseridas', primeira, ultima)))
+    modelo.rowsRemoved.connect(lambda _, primeira, ultima: sinais.append(('removidas', primeira, ultima)))
+    modelo.dataChanged.connect(lambda primeira, ultima, *_: sinais.append(('alteradas', primeira.row(), ultima.row())))
+    modelo.modelReset.connect(lambda: sinais.append(('reset',)))
+    return modelo, sinais
+
+def test_modelo_pedidos_emite_so_o_que_mudou():
+    modelo, sinais = modelo_com_sinais()
+    modelo.atualizar([(chave, linha(chave)) for chave in 'ABCDE'])
+    assert sinais == [('inseridas', 0, 4)]
+
+    # B e C saem, X entra entre D e E, E muda de quantidade e A continua igual
+    sinais.clear()
+    modelo.atualizar([('A', linha('A')), ('D', linha('D')), ('X', linha('X')), ('E', linha('E', qtd=2))])
+    assert sinais == [('removidas', 1, 2), ('inseridas', 2, 2), ('alteradas', 3, 3)]
+    assert [modelo.data(modelo.index(i), prioridades.Qt.UserRole) for i in range(modelo.rowCount())] == \
+        [linha('A'), linha('D'), linha('X'), linha('E', qtd=2)]
+
+    sinais.clear()
+    modelo.atualizar([('A', linha('A')), ('D', linha('D')), ('X', linha('X')), ('E', linha('E', qtd=2))])
+    assert sinais == []
+
+    # Mudança de ordem entre pedidos que continuam vira um único reset
+    modelo.atualizar([('E', linha('E')), ('A', linha('A')), ('D', linha('D'))])
+    assert sinais == [('reset',)]
+    assert modelo.chaves == ['E', 'A', 'D'] and modelo.rowCount() == 3
@@ -0,0 +1,32 @@
+"""Leitura tipada da planilha e o cache em disco (.npz sem pickle) ao lado dela."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import dados_sinteticos
+import planilha
+
+def test_cache_devolve_o_mesmo_quadro(tmp_path):
+    caminho = str(tmp_path / "Status_dos_pedidos.xlsm")
+    dados_sinteticos.gravar_planilha(dados_sinteticos.gerar_pedidos(500, semente=3), caminho)
+    lido, origem = planilha.carregar_planilha(caminho)
+    assert origem == 'planilha' and os.path.exists(planilha.caminho_cache(caminho))
+    assert isinstance(lido[planilha.COLUNA_PEDIDO_ID].dtype, pd.StringDtype)
+    do_cache, origem = planilha.carregar_planilha(caminho)
+    assert origem == 'cache'
+    pd.testing.assert_frame_equal(do_cache, lido)
+
+def test_cache_com_objetos_python_e_ignorado(tmp_path):
+    """Um cache adulterado que precisaria de pickle para ser lido nunca é carregado: a planilha é relida."""
+    caminho = str(tmp_path / "Status_dos_pedidos.xlsm")
+    dados_sinteticos.gravar_planilha(dados_sinteticos.gerar_pedidos(50, semente=3), caminho)
+    lido, _ = planilha.carregar_planilha(caminho)
+    cabecalho = json.dumps({'versao': planilha.VERSAO_CACHE, 'impressao': list(planilha.impressao_arquivo(caminho)), 'hash': None,
+                            'colunas': [{'nome': 'Pedido', 'tipo': 'numpy'}]}).encode()
+    with open(planilha.caminho_cache(caminho), 'wb') as arquivo:
+        np.savez(arquivo, cabecalho=np.frombuffer(cabecalho, dtype=np.uint8), c0=np.array([object()], dtype=object))
+    relido, origem = planilha.carregar_planilha(caminho)
+    assert origem == 'planilha'
+    pd.testing.assert_frame_equal(relido, lido)
@@ -0,0 +1,79 @@
+"""Servidor HTTP do estado do painel: ETag/304, long-poll, validação de ?espera e o feed SSE."""
+import json
+import time
+import threading
+import http.client
+
+import pytest
+
+from servidor_http import EstadoPainel, ServidorPainel, RECURSOS
+
+def dados(prioridades, metricas=None):
+    campos = {campo for lista in RECURSOS.values() if lista for campo in lista}
+    conteudo = {campo: [] for campo in campos}
+    conteudo.update(prioridades=prioridades, metricas=metricas or {'mes': 10})
+    return conteudo
+
+@pytest.fixture
+def servidor():
+    estado = EstadoPainel(); servidor = ServidorPainel(estado, '127.0.0.1', 0); servidor.iniciar()
+    yield servidor
+    servidor.encerrar()
+
+def pedir(servidor, caminho, etag=None, timeout=10):
+    conexao = http.client.HTTPConnection('127.0.0.1', servidor.porta, timeout=timeout)
+    conexao.request('GET', caminho, headers={'If-None-Match': etag} if etag else {})
+    resposta = conexao.getresponse(); corpo = resposta.read(); conexao.close()
+    return resposta.status, resposta.getheader('ETag'), corpo
+
+def test_etag_e_304(servidor):
+    assert pedir(servidor, '/painel')[0] == 503
+    servidor.estado.atualizar(dados(['CV-1']))
+    status, etag, corpo = pedir(servidor, '/prioridades')
+    assert status == 200 and json.loads(corpo)['prioridades'] == ['CV-1']
+    assert pedir(servidor, '/prioridades', etag)[0] == 304
+    _, etag_metricas, _ = pedir(servidor, '/metricas')
+
+    # Só as prioridades mudam: as métricas continuam com 304
+    assert servidor.estado.atualizar(dados(['CV-2'])) == ['/painel', '/prioridades']
+    assert pedir(servidor, '/metricas', etag_metricas)[0] == 304
+    status, novo_etag, corpo = pedir(servidor, '/prioridades', etag)
+    assert status == 200 and novo_etag != etag and json.loads(corpo)['prioridades'] == ['CV-2']
+    assert pedir(servidor, '/inexistente')[0] == 404
+
+def test_long_poll_acorda_na_mudanca_e_esgota_o_tempo(servidor):
+    servidor.estado.atualizar(dados(['CV-1']))
+    _, etag, _ = pedir(servidor, '/prioridades')
+
+    inicio = time.perf_counter()
+    assert pedir(servidor, '/prioridades?espera=0.3', etag)[0] == 304
+    assert 0.25 <= time.perf_counter() - inicio < 5
+
+    threading.Timer(0.3, lambda: servidor.estado.atualizar(dados(['CV-3']))).start()
+    inicio = time.perf_counter()
+    status, _, corpo = pedir(servidor, '/prioridades?espera=30', etag)
+    assert status == 200 and json.loads(corpo)['prioridades'] == ['CV-3']
+    assert time.perf_counter() - inicio < 5
+
+@pytest.mark.parametrize('espera', ['nan', 'inf', '-inf', '-1', 'abc'])
+def test_espera_invalida_e_recusada(servidor, espera):
+    servidor.estado.atualizar(dados(['CV-1']))
+    _, etag, _ = pedir(servidor, '/prioridades')
+    status, _, corpo = pedir(servidor, f'/prioridades?espera={espera}', etag, timeout=5)
+    assert status == 400 and 'espera' in json.loads(corpo)['erro']
+
+def test_feed_de_eventos(servidor):
+    servidor.estado.atualizar(dados(['CV-1']))
+    conexao = http.client.HTTPConnection('127.0.0.1', servidor.porta, timeout=10)
+    conexao.request('GET', '/eventos')
+    resposta = conexao.getresponse()
+    assert resposta.status == 200 and resposta.getheader('Content-Type').startswith('text/event-stream')
+
+    threading.Timer(0.2, lambda: servidor.estado.atualizar(dados(['CV-1'], {'mes': 11}))).start()
+    linhas = []
+    while not linhas or linhas[-1] != '':
+        linhas.append(resposta.fp.readline().decode('utf-8').rstrip('\n'))
+    campos = dict(linha.split(': ', 1) for linha in linhas if linha)
+    assert campos['id'] == '2' and campos['event'] == 'painel'
+    assert json.loads(campos['data'])['recursos'] == ['/painel', '/metricas']
+    conexao.close()
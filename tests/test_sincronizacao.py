@@ -0,0 +1,133 @@
+"""Sincronização do banco com a planilha: edições, remoções, linhas importadas e o histórico arquivado."""
+from dataclasses import replace
+from datetime import datetime
+
+import pandas as pd
+
+import banco
+import concluidos_csv
+from planilha import (COLUNA_PEDIDO_ID, COLUNA_STATUS, COLUNA_QTD, COLUNA_DATA_HORA, STATUS_CONCLUIDO, STATUS_PENDENTE, STATUS_EM_MONTAGEM,
+                      STATUS_CANCELADO)
+
+def sincronizar(motor, snapshot, df_bruto):
+    resultado = motor.sincronizar_banco_de_dados(replace(snapshot, df_bruto=df_bruto, lido_em=datetime.now()))
+    assert isinstance(resultado, dict), resultado
+    return resultado
+
+def concluidos_da_planilha(df_bruto):
+    return df_bruto[(df_bruto[COLUNA_STATUS] == STATUS_CONCLUIDO) & df_bruto[COLUNA_DATA_HORA].notna()]
+
+def test_edicoes_de_pedidos_antes_do_corte_vao_para_o_historico(motor_sintetico):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    sincronizar(motor_sintetico, snapshot, snapshot.df_bruto)
+    assert motor_sintetico.arquivar_historico_se_preciso() > 0
+    conexao = banco.conectar_banco(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    corte = pd.Timestamp(banco.ler_corte_historico(conexao))
+
+    df = snapshot.df_bruto.copy()
+    concluidos = concluidos_da_planilha(df)
+    recente = concluidos.index[concluidos[COLUNA_DATA_HORA] >= corte][0]
+    editado, revertido = concluidos.index[concluidos[COLUNA_DATA_HORA] < corte][:2]
+    data_recente = df.at[recente, COLUNA_DATA_HORA]
+    df.at[recente, COLUNA_DATA_HORA] = corte - pd.Timedelta(days=10)   # data movida para antes do corte
+    df.at[editado, COLUNA_QTD] = 99                                     # pedido já arquivado editado
+    df.at[revertido, COLUNA_STATUS] = STATUS_PENDENTE                   # pedido arquivado que deixou de estar concluído
+    contagens = sincronizar(motor_sintetico, snapshot, df)
+    assert (contagens['historico_gravados'], contagens['historico_removidos']) == (2, 1)
+
+    banco.anexar_historico(conexao, motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    no_banco = lambda esquema, indice: conexao.execute(f"SELECT data_conclusao, qtd_maquinas FROM {esquema}.concluidos WHERE pedido_id = ?",
+                                                       (df.at[indice, COLUNA_PEDIDO_ID],)).fetchone()
+    assert no_banco('main', recente) is None
+    assert no_banco('arquivo', recente)[0] == (corte - pd.Timedelta(days=10)).strftime('%Y-%m-%d %H:%M:%S')
+    assert no_banco('arquivo', editado)[1] == 99
+    assert no_banco('arquivo', revertido) is None
+
+    def confere_resumos(df_bruto):
+        esperado = concluidos_da_planilha(df_bruto)
+        assert conexao.execute("SELECT COUNT(*), SUM(qtd_maquinas) FROM todos_concluidos").fetchone() == (len(esperado), int(esperado[COLUNA_QTD].sum()))
+        assert conexao.execute("SELECT SUM(pedidos_teravix + pedidos_pv), SUM(qtd_teravix + qtd_pv) FROM toda_producao_diaria").fetchone() == \
+               (len(esperado), int(esperado[COLUNA_QTD].sum()))
+    confere_resumos(df)
+
+    # A data volta para depois do corte: o pedido sai do arquivo e volta ao banco principal
+    df.at[recente, COLUNA_DATA_HORA] = data_recente
+    sincronizar(motor_sintetico, snapshot, df)
+    assert no_banco('main', recente) is not None and no_banco('arquivo', recente) is None
+    confere_resumos(df)
+    conexao.close()
+
+def data_status(momento):
+    return None if pd.isna(momento) else momento.strftime('%Y-%m-%d %H:%M:%S')
+
+def test_mudancas_de_status_viram_eventos(motor_sintetico):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    df = snapshot.df_bruto.copy()
+    status = motor_sintetico.status_atual_planilha(df)
+    assert sincronizar(motor_sintetico, snapshot, df)['mudancas_status'] == len(status)  # primeira carga: um evento por pedido
+    conexao = banco.conectar_banco(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    assert dict(banco.ler_status_atual(conexao)) == status.to_dict()
+    ultimo = banco.ultimo_evento_status(conexao)
+
+    unicos = df[~df[COLUNA_PEDIDO_ID].duplicated(keep=False)]
+    concluido = unicos.index[unicos[COLUNA_STATUS] == STATUS_EM_MONTAGEM][0]
+    cancelado, removido = unicos.index[unicos[COLUNA_STATUS] == STATUS_PENDENTE][:2]
+    ids = {indice: df.at[indice, COLUNA_PEDIDO_ID] for indice in (concluido, cancelado, removido)}
+    momento = pd.Timestamp.now().floor('s') - pd.Timedelta(hours=1)
+    df.at[concluido, COLUNA_STATUS] = STATUS_CONCLUIDO; df.at[concluido, COLUNA_DATA_HORA] = momento
+    df.at[cancelado, COLUNA_STATUS] = STATUS_CANCELADO
+    df = df.drop(index=removido)
+    assert sincronizar(motor_sintetico, snapshot, df)['mudancas_status'] == 3
+
+    eventos = conexao.execute("SELECT pedido_id, status_anterior, status_novo, data_status FROM eventos_status WHERE id > ? ORDER BY pedido_id",
+                              (ultimo,)).fetchall()
+    assert eventos == sorted([(ids[concluido], STATUS_EM_MONTAGEM, STATUS_CONCLUIDO, data_status(momento)),
+                              (ids[cancelado], STATUS_PENDENTE, STATUS_CANCELADO, data_status(df.at[cancelado, COLUNA_DATA_HORA])),
+                              (ids[removido], STATUS_PENDENTE, None, None)])
+    historico = {pedido: (novo, is_teravix) for _, pedido, novo, _, is_teravix in banco.ler_historico_status(conexao, ultimo)}
+    teravix = conexao.execute("SELECT is_teravix FROM concluidos WHERE pedido_id = ?", (ids[concluido],)).fetchone()
+    assert teravix is not None and historico[ids[concluido]] == (STATUS_CONCLUIDO, teravix[0])
+    assert historico[ids[cancelado]] == (STATUS_CANCELADO, None) and historico[ids[removido]] == (None, None)
+
+    atual = dict(banco.ler_status_atual(conexao))
+    assert atual == motor_sintetico.status_atual_planilha(df).to_dict() and ids[removido] not in atual
+
+    # O status_atual gravado basta para a próxima sincronização, mesmo sem a cópia em memória
+    motor_sintetico._memo_status_atual.clear()
+    assert sincronizar(motor_sintetico, snapshot, df)['mudancas_status'] == 0
+    conexao.close()
+
+def test_reconciliacao_de_remocao_quantidade_e_linha_importada(motor_sintetico, tmp_path):
+    snapshot = motor_sintetico.ler_snapshot_planilha()
+    sincronizar(motor_sintetico, snapshot, snapshot.df_bruto)
+    importado = pd.Timestamp.now().floor('s') - pd.Timedelta(days=2)
+    arquivo = tmp_path / "importado.csv"
+    arquivo.write_text("data_conclusao;pedido_id;pv;qtd_maquinas;equipamento;servico\n"
+                       f"{importado.strftime('%d/%m/%Y %H:%M')};CV-8000000001;120001;4;;\n", encoding='utf-8')
+    assert concluidos_csv.importar_concluidos(str(arquivo), motor_sintetico.CAMINHO_BANCO_DE_DADOS).novos == 1
+
+    df = snapshot.df_bruto.copy()
+    concluidos = concluidos_da_planilha(df)
+    concluidos = concluidos[~concluidos[COLUNA_PEDIDO_ID].duplicated(keep=False)]
+    removido, editado = concluidos.index[:2]
+    ids = {indice: df.at[indice, COLUNA_PEDIDO_ID] for indice in (removido, editado)}
+    df.at[editado, COLUNA_QTD] = df.at[editado, COLUNA_QTD] + 5
+    df = df.drop(index=removido)
+    contagens = sincronizar(motor_sintetico, snapshot, df)
+    assert (contagens['novos'], contagens['atualizados'], contagens['removidos']) == (0, 1, 1)
+
+    conexao = banco.conectar_banco(motor_sintetico.CAMINHO_BANCO_DE_DADOS)
+    no_banco = lambda pedido: conexao.execute("SELECT qtd_maquinas, origem FROM concluidos WHERE pedido_id = ?", (pedido,)).fetchone()
+    assert no_banco(ids[removido]) is None
+    assert no_banco(ids[editado]) == (int(df.at[editado, COLUNA_QTD]), None)
+    assert no_banco('CV-8000000001') == (4, 'importado.csv')  # fora da planilha, mas importada: a sincronização não a remove
+
+    # O resumo diário acompanha: planilha mais a linha importada
+    esperado = concluidos_da_planilha(df)
+    assert conexao.execute("SELECT SUM(pedidos_teravix + pedidos_pv), SUM(qtd_teravix + qtd_pv) FROM producao_diaria").fetchone() == \
+           (len(esperado) + 1, int(esperado[COLUNA_QTD].sum()) + 4)
+    # Sincronizar de novo não mexe em nada, nem na linha importada
+    contagens = sincronizar(motor_sintetico, snapshot, df)
+    assert (contagens['novos'], contagens['atualizados'], contagens['removidos']) == (0, 0, 0)
+    assert no_banco('CV-8000000001') == (4, 'importado.csv')
+    conexao.close()
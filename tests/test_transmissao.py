@@ -0,0 +1,72 @@
+"""Publicador e Assinante por socket local: ida e volta do quadro e um painel lento que não atrasa os outros."""
+import os
+import time
+import queue
+import socket
+
+import pytest
+
+import transmissao
+from transmissao import Publicador, Assinante, quadro_modelo, quadro_erro, serializar, dados_modelo
+
+@pytest.fixture
+def publicador():
+    publicador = Publicador('127.0.0.1', 0); publicador.iniciar()
+    yield publicador
+    publicador.encerrar()
+
+def conectar(publicador):
+    recebidas, conexao = queue.Queue(), queue.Queue()
+    assinante = Assinante('127.0.0.1', publicador.porta, recebidas.put, lambda conectado, texto: conexao.put(conectado))
+    assinante.iniciar()
+    assert conexao.get(timeout=5) is True
+    return assinante, recebidas
+
+def esperar_conectados(publicador, total):
+    limite = time.monotonic() + 10
+    while len(publicador.assinantes) != total and time.monotonic() < limite: time.sleep(0.01)
+    assert len(publicador.assinantes) == total
+
+def test_quadro_vai_e_volta(publicador, motor_sintetico):
+    publicador.publicar(quadro_erro("planilha em uso"))
+    assinante, recebidas = conectar(publicador)
+    try:
+        # Quem conecta depois recebe na hora o último quadro publicado
+        assert recebidas.get(timeout=5)['mensagem'] == "planilha em uso"
+
+        modelo = motor_sintetico.executar_atualizacao(sincronizar=False)
+        esperar_conectados(publicador, 1)
+        assert publicador.publicar(quadro_modelo(modelo)) == 1
+        mensagem = recebidas.get(timeout=5)
+        assert mensagem['tipo'] == 'modelo'
+        assert dados_modelo(mensagem['modelo']) == dados_modelo(modelo)
+    finally:
+        assinante.encerrar()
+
+def test_painel_lento_nao_atrasa_os_outros(publicador, monkeypatch):
+    monkeypatch.setattr(transmissao, 'TIMEOUT_ENVIO', 2)
+    # Um painel que conecta e nunca lê, com buffer de recepção mínimo (definido antes de conectar, para valer na janela do TCP):
+    # o quadro grande não cabe nos buffers e o envio a ele fica parado
+    lento = socket.socket(); lento.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096); lento.connect(('127.0.0.1', publicador.porta))
+    assinante, recebidas = conectar(publicador)
+    try:
+        esperar_conectados(publicador, 2)
+        grande = serializar({'versao': transmissao.VERSAO_PROTOCOLO, 'tipo': 'erro', 'mensagem': os.urandom(8 * 1024 * 1024).hex()})
+        inicio = time.perf_counter()
+        assert publicador.publicar(grande) == 2
+        assert time.perf_counter() - inicio < 0.5  # publicar não espera a rede
+        # Espera as threads de envio pegarem o quadro grande; senão o seguinte o substituiria antes de sair
+        limite = time.monotonic() + 5
+        while any(painel.pendente is not None for painel in publicador.assinantes) and time.monotonic() < limite: time.sleep(0.01)
+        inicio = time.perf_counter()
+        publicador.publicar(quadro_erro("segundo"))
+        assert time.perf_counter() - inicio < 0.5
+
+        # O painel rápido recebe os quadros (o grande pode ser substituído pelo seguinte antes de sair)
+        mensagens = [recebidas.get(timeout=5)['mensagem']]
+        if mensagens[0] != "segundo": mensagens.append(recebidas.get(timeout=5)['mensagem'])
+        assert mensagens[-1] == "segundo"
+        # O lento é desconectado quando o envio passa de TIMEOUT_ENVIO
+        esperar_conectados(publicador, 1)
+    finally:
+        assinante.encerrar(); lento.close()
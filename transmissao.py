@@ -0,0 +1,311 @@
+"""
+Um único processo de dados para vários painéis: o publicador (python cli.py publicar) monitora a planilha, sincroniza o banco
+e calcula o ModeloVisao uma vez, e envia o modelo serializado a todos os painéis conectados (python prioridades.py --cliente).
+Os quadros são JSON comprimido com zlib, precedidos do tamanho em 4 bytes. Este módulo só usa a biblioteca padrão,
+para que o painel em modo cliente não importe pandas.
+"""
+import os
+import json
+import zlib
+import time
+import socket
+import struct
+import threading
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+HOST_PADRAO, PORTA_PADRAO = '127.0.0.1', 8765
+VERSAO_PROTOCOLO = 1
+CABECALHO = struct.Struct('>I')           # tamanho do quadro em bytes
+TAMANHO_MAXIMO_QUADRO = 64 * 1024 * 1024
+TIMEOUT_ENVIO = 5                         # segundos; um painel que não recebe nesse tempo é desconectado
+INTERVALO_RECONEXAO = 5
+JANELA_SILENCIO = 1.5                     # mesma janela de silêncio do painel (JANELA_SILENCIO_MS)
+INTERVALO_ONLINE = 300                    # no modo online, o link é verificado a cada 5 minutos
+
+def endereco(texto, porta_padrao=PORTA_PADRAO):
+    """'host:porta', 'porta' ou 'host' em (host, porta)."""
+    host, _, porta = texto.rpartition(':') if ':' in texto else ('', '', texto)
+    if not porta.isdigit(): host, porta = texto, porta_padrao
+    return host or HOST_PADRAO, int(porta)
+
+# --- SERIALIZAÇÃO ---
+def serializar(mensagem):
+    return zlib.compress(json.dumps(mensagem, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def dados_modelo(modelo):
+    """ModeloVisao como dicionário pronto para JSON; as semanas do gráfico vão como texto ISO."""
+    dados = asdict(modelo)
+    dados['dados_grafico'] = [(semana.isoformat(), valor) for semana, valor in modelo.dados_grafico]
+    return dados
+
+def quadro_modelo(modelo):
+    return serializar({'versao': VERSAO_PROTOCOLO, 'tipo': 'modelo', 'publicado_em': datetime.now().isoformat(timespec='seconds'), 'modelo': dados_modelo(modelo)})
+
+def quadro_erro(mensagem):
+    return serializar({'versao': VERSAO_PROTOCOLO, 'tipo': 'erro', 'publicado_em': datetime.now().isoformat(timespec='seconds'), 'mensagem': mensagem})
+
+def ler_quadro(dados):
+    """Mensagem de um quadro recebido; o modelo volta como ModeloVisao, com tuplas onde o painel espera tuplas."""
+    from motor import ModeloVisao
+    mensagem = json.loads(zlib.decompress(dados).decode('utf-8'))
+    if mensagem.get('versao') != VERSAO_PROTOCOLO: raise ValueError(f"versão de protocolo {mensagem.get('versao')} não suportada")
+    if mensagem['tipo'] == 'modelo':
+        dados = mensagem['modelo']
+        dados['dados_grafico'] = [(datetime.fromisoformat(semana), valor) for semana, valor in dados['dados_grafico']]
+        dados['totais_concluidos'] = tuple(dados['totais_concluidos']); dados['totais_cancelados'] = tuple(dados['totais_cancelados'])
+        mensagem['modelo'] = ModeloVisao(**dados)
+    return mensagem
+
+def enviar_quadro(conexao, dados):
+    conexao.sendall(CABECALHO.pack(len(dados)) + dados)
+
+def receber_exato(conexao, tamanho):
+    partes = []
+    while tamanho:
+        parte = conexao.recv(min(tamanho, 1024 * 1024))
+        if not parte: raise ConnectionError("o publicador encerrou a conexão")
+        partes.append(parte); tamanho -= len(parte)
+    return b''.join(partes)
+
+def receber_quadro(conexao):
+    tamanho, = CABECALHO.unpack(receber_exato(conexao, CABECALHO.size))
+    if tamanho > TAMANHO_MAXIMO_QUADRO: raise ValueError(f"quadro de {tamanho} bytes excede o limite")
+    return receber_exato(conexao, tamanho)
+
+# --- ÚLTIMO MODELO EM DISCO ---
+def salvar_quadro(caminho, quadro):
+    """Grava o quadro de um modelo (o mesmo enviado aos painéis) trocando o arquivo de uma vez, para nunca deixá-lo pela metade."""
+    temporario = caminho + '.tmp'
+    try:
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(quadro)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"AVISO: Não foi possível salvar o último modelo do painel: {e}")
+
+def carregar_ultimo_modelo(caminho):
+    """(ModeloVisao, datetime em que foi calculado) do último modelo salvo, ou None se não houver um modelo legível."""
+    try:
+        with open(caminho, 'rb') as arquivo:
+            mensagem = ler_quadro(arquivo.read())
+        if mensagem['tipo'] != 'modelo': return None
+        return mensagem['modelo'], datetime.fromisoformat(mensagem['publicado_em'])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError, KeyError, zlib.error) as e:
+        print(f"AVISO: Último modelo salvo em '{caminho}' ignorado: {e}")
+        return None
+
+# --- PUBLICADOR ---
+class PainelConectado:
+    """
+    Um painel conectado ao publicador, com uma thread de envio própria: um painel lento ou meio desconectado só atrasa
+    a si mesmo. Só o quadro mais recente espera a vez; um quadro ainda não enviado é substituído pelo seguinte.
+    """
+    def __init__(self, conexao, origem, ao_desconectar):
+        self.conexao = conexao; self.origem = origem; self.ao_desconectar = ao_desconectar
+        self.condicao = threading.Condition(); self.pendente = None; self.encerrado = False
+
+    def iniciar(self, quadro=None):
+        self.pendente = quadro
+        threading.Thread(target=self.executar, name=f"publicador-envio-{self.origem[0]}:{self.origem[1]}", daemon=True).start()
+
+    def entregar(self, quadro):
+        with self.condicao:
+            self.pendente = quadro; self.condicao.notify()
+
+    def executar(self):
+        while True:
+            with self.condicao:
+                self.condicao.wait_for(lambda: self.encerrado or self.pendente is not None)
+                if self.encerrado: return
+                quadro, self.pendente = self.pendente, None
+            try:
+                enviar_quadro(self.conexao, quadro)
+            except OSError as e:
+                if not self.encerrado: print(f"AVISO: Painel {self.origem[0]}:{self.origem[1]} desconectado: {e}")
+                self.fechar(); self.ao_desconectar(self); return
+
+    def fechar(self):
+        with self.condicao:
+            self.encerrado = True; self.condicao.notify()
+        try:
+            self.conexao.shutdown(socket.SHUT_RDWR)  # destrava um envio em andamento
+        except OSError:
+            pass
+        self.conexao.close()
+
+class Publicador:
+    """
+    Aceita painéis na porta e entrega a cada um o último quadro publicado; quem entra depois recebe o quadro atual na hora.
+    Os envios acontecem nas threads de cada PainelConectado, fora da trava: publicar não espera a rede.
+    """
+    def __init__(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        self.host = host; self.porta = porta
+        self.assinantes = []; self.ultimo_quadro = None
+        self.trava = threading.Lock()
+        self.servidor = None
+
+    def iniciar(self):
+        self.servidor = socket.create_server((self.host, self.porta))
+        self.porta = self.servidor.getsockname()[1]
+        threading.Thread(target=self.aceitar, name="publicador-aceitar", daemon=True).start()
+        print(f"INFO: Publicando o painel em {self.host}:{self.porta}.")
+
+    def aceitar(self):
+        while True:
+            try:
+                conexao, origem = self.servidor.accept()
+            except OSError:
+                return  # servidor encerrado
+            conexao.settimeout(TIMEOUT_ENVIO); conexao.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            painel = PainelConectado(conexao, origem, self.remover)
+            with self.trava:
+                self.assinantes.append(painel); painel.iniciar(self.ultimo_quadro); conectados = len(self.assinantes)
+            print(f"INFO: Painel conectado de {origem[0]}:{origem[1]} ({conectados} conectado(s)).")
+
+    def remover(self, painel):
+        with self.trava:
+            if painel in self.assinantes: self.assinantes.remove(painel)
+
+    def publicar(self, quadro):
+        """Entrega o quadro (já serializado uma única vez) a todos os painéis conectados; devolve quantos são."""
+        with self.trava:
+            self.ultimo_quadro = quadro
+            for painel in self.assinantes: painel.entregar(quadro)
+            return len(self.assinantes)
+
+    def encerrar(self):
+        if self.servidor is not None: self.servidor.close()
+        with self.trava:
+            assinantes, self.assinantes = self.assinantes, []
+        for painel in assinantes: painel.fechar()
+
+def segundos_ate_meia_noite(agora):
+    return (datetime.combine(agora.date() + timedelta(days=1), datetime.min.time()) - agora).total_seconds() + 1
+
+def atualizar_e_publicar(publicador, filtro, forcar=False, estado_http=None):
+    """
+    Uma atualização do publicador; forcar ignora o filtro de conteúdo (virada do dia). Erros são publicados aos painéis.
+    Com estado_http (servidor_http.EstadoPainel), o modelo também passa a ser servido por HTTP.
+    """
+    import motor
+    try:
+        modelo = motor.executar_atualizacao_se_mudou(not motor.USAR_LINK_ONLINE, None if forcar else filtro)
+    except Exception as e:
+        print(f"ERRO: {e}")
+        if estado_http is not None: estado_http.registrar_erro(str(e))
+        publicador.publicar(quadro_erro(str(e))); return
+    if modelo is motor.ATUALIZACAO_IGNORADA:
+        filtro.contar('atualizacoes_ignoradas')
+        print(f"INFO: Conteúdo da planilha não mudou; leitura ignorada ({filtro.resumo()})."); return
+    quadro = quadro_modelo(modelo)
+    salvar_quadro(motor.CAMINHO_ULTIMO_MODELO, quadro)
+    if estado_http is not None: estado_http.atualizar(dados_modelo(modelo))
+    enviados = publicador.publicar(quadro)
+    print(f"INFO: Modelo publicado ({len(quadro)} bytes) para {enviados} painel(is).")
+    erro = (modelo.contagens or {}).get('erro_sincronizacao')
+    if erro:
+        print(f"AVISO: A sincronização do banco falhou; métricas publicadas com os dados anteriores: {erro}")
+        if estado_http is not None: estado_http.registrar_erro(f"sincronização do banco: {erro}")
+
+def executar_publicador(host=HOST_PADRAO, porta=PORTA_PADRAO, estado_http=None):
+    """
+    Laço do processo publicador: atualiza ao iniciar, a cada mudança da planilha (com a janela de silêncio e o filtro de
+    conteúdo do painel), a cada INTERVALO_ONLINE no modo online e logo após a meia-noite, e publica cada modelo.
+    Ao iniciar e na virada do dia, antes da atualização, arquiva o histórico antigo do banco (só no modo local, que sincroniza).
+    """
+    import motor
+    motor.inicializar_banco_de_dados()
+    if not motor.USAR_LINK_ONLINE: motor.arquivar_historico_se_preciso()
+    publicador = Publicador(host, porta); publicador.iniciar()
+    filtro = motor.FiltroMudancasArquivo(motor.CAMINHO_PLANILHA_STATUS)
+    mudou = threading.Event(); observer = None
+    if not motor.USAR_LINK_ONLINE:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+        alvo = os.path.normpath(motor.CAMINHO_PLANILHA_STATUS)
+
+        class MonitorPlanilha(FileSystemEventHandler):
+            def on_modified(self, event):
+                if not event.is_directory and os.path.normpath(event.src_path) == alvo:
+                    filtro.contar('eventos_recebidos'); mudou.set()
+
+            def on_created(self, event):
+                self.on_modified(event)
+
+            def on_moved(self, event):
+                # O Excel pode salvar em um arquivo temporário e depois renomeá-lo para o nome final
+                if not event.is_directory and os.path.normpath(event.dest_path) == alvo:
+                    filtro.contar('eventos_recebidos'); mudou.set()
+
+        observer = Observer(); observer.schedule(MonitorPlanilha(), path=motor.CAMINHO_PASTA_DADOS, recursive=False); observer.start()
+        print(f"Monitorando a pasta '{motor.CAMINHO_PASTA_DADOS}' por mudanças...")
+
+    try:
+        atualizar_e_publicar(publicador, filtro, estado_http=estado_http)
+        while True:
+            ate_meia_noite = segundos_ate_meia_noite(datetime.now())
+            espera = min(ate_meia_noite, INTERVALO_ONLINE) if motor.USAR_LINK_ONLINE else ate_meia_noite
+            if mudou.wait(espera):
+                # Agrupa a rajada de eventos de um salvamento do Excel em uma única atualização
+                while True:
+                    mudou.clear()
+                    if not mudou.wait(JANELA_SILENCIO): break
+                    filtro.contar('eventos_agrupados')
+                if not filtro.metadados_mudaram():
+                    filtro.contar('atualizacoes_ignoradas')
+                    print(f"INFO: Tamanho e data da planilha não mudaram; atualização ignorada ({filtro.resumo()})."); continue
+                atualizar_e_publicar(publicador, filtro, estado_http=estado_http)
+            else:
+                # Sem evento: virada do dia (forçada, os totais mudam de data) ou intervalo do modo online
+                virada = espera == ate_meia_noite
+                if virada and not motor.USAR_LINK_ONLINE: motor.arquivar_historico_se_preciso()
+                atualizar_e_publicar(publicador, filtro, forcar=virada, estado_http=estado_http)
+    except KeyboardInterrupt:
+        print("INFO: Publicador encerrado.")
+    finally:
+        if observer is not None: observer.stop(); observer.join()
+        publicador.encerrar()
+
+# --- ASSINANTE ---
+class Assinante:
+    """
+    Conecta ao publicador em uma thread própria e chama ao_receber(mensagem) a cada quadro e ao_mudar_conexao(conectado, texto)
+    quando a conexão cai ou volta; reconecta sozinho a cada INTERVALO_RECONEXAO segundos.
+    """
+    def __init__(self, host, porta, ao_receber, ao_mudar_conexao):
+        self.host = host; self.porta = porta
+        self.ao_receber = ao_receber; self.ao_mudar_conexao = ao_mudar_conexao
+        self.encerrado = threading.Event(); self.conexao = None
+
+    def iniciar(self):
+        threading.Thread(target=self.executar, name="assinante-painel", daemon=True).start()
+
+    def executar(self):
+        while not self.encerrado.is_set():
+            try:
+                self.conexao = socket.create_connection((self.host, self.porta), timeout=INTERVALO_RECONEXAO)
+                self.conexao.settimeout(None); self.conexao.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                self.ao_mudar_conexao(True, f"Conectado ao publicador em {self.host}:{self.porta}.")
+                while True:
+                    quadro = receber_quadro(self.conexao)
+                    inicio = time.perf_counter()
+                    mensagem = ler_quadro(quadro)
+                    mensagem['tempo_recebimento'] = time.perf_counter() - inicio  # descompressão e leitura do JSON
+                    self.ao_receber(mensagem)
+            except (OSError, ValueError) as e:
+                if self.encerrado.is_set(): return
+                self.ao_mudar_conexao(False, f"Sem conexão com o publicador em {self.host}:{self.porta} ({e}); tentando novamente...")
+            finally:
+                if self.conexao is not None: self.conexao.close()
+            self.encerrado.wait(INTERVALO_RECONEXAO)
+
+    def encerrar(self):
+        self.encerrado.set()
+        if self.conexao is not None:
+            try:
+                self.conexao.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass